@@ -1,12 +1,21 @@
-﻿from flask import Flask, request, jsonify,Response,json, render_template,flash,redirect,url_for,session,send_from_directory, send_file
+﻿from flask import Flask, request, jsonify,Response,json, render_template,flash,redirect,url_for,session,send_from_directory, send_file, stream_with_context
 import logging
 import os
 import sys
 import uuid
+import time
+import threading
+from contextlib import closing
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
-from language_utils import detect_language
+from language_utils import TextAnalysisContext, get_language_detection_stats
+from translation import translator
+from jobs import job_manager, JobQueueFull
 from report_export import export_chat_to_excel
+from model_registry import (
+    register_model, get_model, is_model_ready, warm_models, get_model_states,
+    ModelNotReady, STATE_FAILED, RETRY_AFTER_SECONDS
+)
 
 # Suppress TensorFlow warnings before importing (TF 2.20+ compatible)
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
@@ -31,30 +40,77 @@ from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity
 from flask_migrate import Migrate
 from flask_cors import CORS
 
-# Lazy load heavy ML modules - don't load on app startup
+# Lazy load heavy ML modules - imported and warmed in a background thread at startup
 ML_AVAILABLE = False
 detect_text_emotion = None
+detect_text_emotion_many = None
 generate_emotion_aware_response = None
+stream_emotion_aware_response = None
 generate_face_emotion_response = None
 process_image = None
 process_video = None
 
-def load_ml_modules():
-    """Load ML modules only when needed"""
-    global ML_AVAILABLE, detect_text_emotion, generate_emotion_aware_response
-    global generate_face_emotion_response, process_image, process_video
+# Set MODEL_WARMUP=0 to load models on the first request instead of at boot
+MODEL_WARMUP = os.getenv('MODEL_WARMUP', '1') != '0'
+
+def import_ml_modules():
+    """Import the detection modules (registers their models with the model registry)"""
+    global detect_text_emotion, detect_text_emotion_many, generate_emotion_aware_response
+    global stream_emotion_aware_response, generate_face_emotion_response, process_image, process_video
+    
+    from detections.detection import detect_text_emotion, detect_text_emotion_many, generate_emotion_aware_response, generate_face_emotion_response
+    from detections.detection import stream_emotion_aware_response
+    from detections.image_detection import process_image
+    from detections.video_detection import process_video
+    return True
+
+register_model("ml_modules", import_ml_modules)
+
+def load_ml_modules(wait=False):
+    """
+    Load ML modules only when needed
+    Concurrent callers share one import; without wait this returns immediately while loading
+    """
+    global ML_AVAILABLE
     
     if not ML_AVAILABLE:
         try:
-            from detections.detection import detect_text_emotion, generate_emotion_aware_response, generate_face_emotion_response
-            from detections.image_detection import process_image
-            from detections.video_detection import process_video
+            get_model("ml_modules", wait=wait)
             ML_AVAILABLE = True
             logging.info("ML modules loaded successfully")
-        except Exception as e:
-            logging.warning(f"ML modules import failed: {e}. Some features will be unavailable.")
+        except ModelNotReady as e:
+            if e.state == STATE_FAILED:
+                logging.warning(f"ML modules import failed: {e.error}. Some features will be unavailable.")
             ML_AVAILABLE = False
 
+def warm_up_models():
+    """Import ML modules, then load the text and face models, in a background thread"""
+    def _warm():
+        load_ml_modules(wait=True)
+        if ML_AVAILABLE:
+            # multilingual_text_emotion is only registered when MULTILINGUAL_TEXT_MODEL is set
+            warm_models("text_emotion", "face_emotion", "multilingual_text_emotion")
+    
+    threading.Thread(target=_warm, name="model-warmup", daemon=True).start()
+
+def ml_unavailable_response(*model_names):
+    """
+    Return a fast 503 response with Retry-After while the ML modules (or the
+    given models) are still loading, or None when everything is ready
+    """
+    load_ml_modules()
+    if ML_AVAILABLE and all(is_model_ready(name) for name in model_names):
+        return None
+    
+    response = jsonify({
+        'error': 'ML models are still loading. Please try again shortly.',
+        'models': get_model_states(),
+        'success': False
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+    return response
+
 from models import (
     mongo, create_user, find_user_by_email, find_user_by_phone, find_user_by_id,
     update_user_last_login, create_chat, get_user_chats, create_global_chat,
@@ -64,7 +120,6 @@ from models import (
 )  # Import MongoDB functions from models.py
 # alias global chat stats separately to avoid naming conflict with route
 from models import get_global_chat_stats as model_get_global_chat_stats
-from deep_translator import GoogleTranslator
 from werkzeug.utils import secure_filename
 from bson import ObjectId
 from flask_bcrypt import Bcrypt
@@ -89,6 +144,9 @@ app.config['MAX_CONTENT_LENGTH']= 100 * 1024 * 1024
 # Session timeout in seconds
 SESSION_TIMEOUT = 24 * 60 * 60  # 24 hours
 
+# Maximum number of texts accepted by the batch text detection endpoint
+MAX_BATCH_TEXTS = int(os.getenv('MAX_BATCH_TEXTS', '1000'))
+
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
@@ -116,6 +174,14 @@ bcrypt = Bcrypt(app)
 jwt = JWTManager(app)
 CORS(app)
 
+# Optional WebSocket transport for live emotion (pip install flask-sock)
+try:
+    from flask_sock import Sock, ConnectionClosed
+    sock = Sock(app)
+except ImportError:
+    sock = None
+    logging.info("flask-sock not installed; /ws/live-emotion is disabled (live clients fall back to HTTP)")
+
 # Error handlers to return JSON instead of HTML
 @app.errorhandler(404)
 def not_found(error):
@@ -138,8 +204,10 @@ if tf is not None:
         pass  # tf.get_logger() removed in TF 2.20+
 logging.getLogger("tensorflow").setLevel(logging.ERROR)
 
-# Load ML modules at startup
-load_ml_modules()
+# Warm ML modules and models in the background at startup. Spawned video workers
+# re-import this file as __mp_main__ and load only the face model themselves.
+if MODEL_WARMUP and __name__ != "__mp_main__":
+    warm_up_models()
 
 def get_date_filter(period):
     """Get date filter based on period (day/week/month/all)"""
@@ -198,11 +266,26 @@ def health_check():
     from models import is_db_connected
     try:
         db_connected = is_db_connected()
-        return jsonify({
+        health = {
             'status': 'healthy' if db_connected else 'degraded',
             'database': 'connected' if db_connected else 'disconnected',
             'timestamp': datetime.utcnow().isoformat()
-        }), 200 if db_connected else 503
+        }
+        health['models'] = get_model_states()
+        health['language_detection'] = get_language_detection_stats()
+        health['translation'] = translator.stats()
+        health['jobs'] = job_manager.stats()
+        if ML_AVAILABLE:
+            from detections.detection import get_text_emotion_cache_stats, get_hedge_stats
+            from groq_gateway import groq_gateway
+            from detections.live_session import live_sessions
+            from detections.frame_ingest import ingest_metrics
+            health['live_sessions'] = live_sessions.stats()
+            health['image_ingest'] = ingest_metrics.snapshot()
+            health['text_emotion_cache'] = get_text_emotion_cache_stats()
+            health['text_emotion_hedging'] = get_hedge_stats()
+            health['groq'] = groq_gateway.stats()
+        return jsonify(health), 200 if db_connected else 503
     except Exception as e:
         logging.error(f"Health check error: {e}")
         return jsonify({
@@ -223,18 +306,44 @@ def text_detection():
 def image_detection():
     return render_template("image_detection.html")
 
+def wants_image_echo():
+    """True when the client asks for the analyzed image back (echo_image=1 in the query, form or JSON body)"""
+    value = request.values.get("echo_image")
+    if value is None and request.is_json:
+        value = (request.get_json(silent=True) or {}).get("echo_image")
+    return str(value).lower() in ("1", "true", "yes")
+
+def read_uploaded_image(fields=("file",)):
+    """
+    Decode the image of the current request: a raw image/jpeg (or png) body,
+    a multipart upload in one of fields, or JSON image_base64
+
+    Returns:
+        tuple: (image, scale, transport), image None when no image was sent
+
+    Raises:
+        ValueError: If the image is too large or cannot be decoded
+    """
+    from detections.frame_ingest import read_request_image
+    return read_request_image(request, fields)
+
 @app.route("/image_detection", methods=['POST'])
 def image_detection_api():
     """API endpoint for image emotion detection via DeepFace"""
     try:
-        if "file" in request.files:
-            file = request.files["file"]
-            response = process_image(file)
-            return jsonify(response), 200
-        elif request.is_json and "image_base64" in request.json:
-            response = process_image()
-            return jsonify(response), 200
-        return jsonify({"error": "No valid image provided"}), 400
+        # Ensure ML modules are loaded
+        unavailable = ml_unavailable_response('face_emotion')
+        if unavailable:
+            return unavailable
+        
+        try:
+            image_np, _, _ = read_uploaded_image()
+        except ValueError as e:
+            return jsonify({"error": str(e), "success": False}), 400
+        if image_np is None:
+            return jsonify({"error": "No valid image provided"}), 400
+        response = process_image(image=image_np, echo_image=wants_image_echo())
+        return jsonify(response), 200
     except Exception as e:
         logging.error(f"Image detection error: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -247,6 +356,11 @@ def video_detection():
 def video_detection_api():
     """API endpoint for video emotion detection via DeepFace"""
     try:
+        # Ensure ML modules are loaded
+        unavailable = ml_unavailable_response('face_emotion')
+        if unavailable:
+            return unavailable
+        
         file = request.files.get("file")
         if not file:
             return jsonify({"error": "No file provided"}), 400
@@ -465,10 +579,9 @@ def protected():
 def test_emotion():
     try:
         # Ensure ML modules are loaded
-        if not ML_AVAILABLE or detect_text_emotion is None:
-            load_ml_modules()
-            if not ML_AVAILABLE:
-                return jsonify({'error': 'ML modules not available. Please try again.', 'success': False}), 503
+        unavailable = ml_unavailable_response()
+        if unavailable:
+            return unavailable
         
         data = request.json
         text = data.get("text", "")
@@ -491,10 +604,9 @@ def detect_text_emotion_endpoint():
     """
     try:
         # Ensure ML modules are loaded
-        if not ML_AVAILABLE or detect_text_emotion is None:
-            load_ml_modules()
-            if not ML_AVAILABLE:
-                return jsonify({'error': 'ML modules not available. Please try again.', 'success': False}), 503
+        unavailable = ml_unavailable_response()
+        if unavailable:
+            return unavailable
         
         data = request.json
         if not data:
@@ -509,21 +621,7 @@ def detect_text_emotion_endpoint():
         emotion_result, status_code = detect_text_emotion(text)
         
         if status_code == 200:
-            # Format response for frontend compatibility
-            response = {
-                'emotion': emotion_result.get('Dominant_emotion', {}).get('label', 'neutral'),
-                'confidence': emotion_result.get('Dominant_emotion', {}).get('score', 0.5),
-                'percentage': emotion_result.get('Dominant_emotion', {}).get('percentage', 0),
-                'emotion_analysis': emotion_result.get('Emotion Analysis', []),
-                'analysis_report': emotion_result.get('analysis_report', ''),
-                'key_indicators': emotion_result.get('key_indicators', []),
-                'emotional_intensity': emotion_result.get('emotional_intensity', 'Unknown'),
-                'model_used': emotion_result.get('model_used', 'unknown'),
-                'detected_language': emotion_result.get('detected_language', 'en'),
-                'language_name': emotion_result.get('language_name', 'English'),
-                'was_translated': emotion_result.get('was_translated', False),
-                'success': True
-            }
+            response = format_text_emotion_response(emotion_result)
 
             # Save to analytics if user is logged in
             if "user_id" in session:
@@ -542,16 +640,91 @@ def detect_text_emotion_endpoint():
 
             return jsonify(response), 200
         else:
-            return jsonify({
+            response = jsonify({
                 'error': emotion_result.get('error', 'Emotion detection failed'),
                 'success': False
-            }), status_code
+            })
+            response.status_code = status_code
+            if status_code == 503:
+                response.headers['Retry-After'] = str(emotion_result.get('retry_after', RETRY_AFTER_SECONDS))
+            return response
             
     except Exception as e:
         logging.error(f"Text emotion detection error: {str(e)}")
         return jsonify({'error': str(e), 'success': False}), 500
 
 
+def format_text_emotion_response(emotion_result):
+    """Format a detect_text_emotion result for frontend compatibility"""
+    return {
+        'emotion': emotion_result.get('Dominant_emotion', {}).get('label', 'neutral'),
+        'confidence': emotion_result.get('Dominant_emotion', {}).get('score', 0.5),
+        'percentage': emotion_result.get('Dominant_emotion', {}).get('percentage', 0),
+        'emotion_analysis': emotion_result.get('Emotion Analysis', []),
+        'analysis_report': emotion_result.get('analysis_report', ''),
+        'key_indicators': emotion_result.get('key_indicators', []),
+        'emotional_intensity': emotion_result.get('emotional_intensity', 'Unknown'),
+        'model_used': emotion_result.get('model_used', 'unknown'),
+        'detected_language': emotion_result.get('detected_language', 'en'),
+        'language_name': emotion_result.get('language_name', 'English'),
+        'was_translated': emotion_result.get('was_translated', False),
+        'success': True
+    }
+
+
+@app.route("/detect_text_emotion_batch", methods=['POST'])
+def detect_text_emotion_batch_endpoint():
+    """
+    Batch endpoint for text emotion detection
+    Scores many texts per call with the local model (e.g. re-scoring chat logs)
+    """
+    try:
+        # Ensure ML modules are loaded
+        unavailable = ml_unavailable_response()
+        if unavailable:
+            return unavailable
+        
+        data = request.json
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        texts = data.get("texts")
+        if not isinstance(texts, list) or not texts:
+            return jsonify({'error': 'Please provide a non-empty list of texts.', 'success': False}), 400
+        
+        if len(texts) > MAX_BATCH_TEXTS:
+            return jsonify({'error': f'Too many texts. Maximum is {MAX_BATCH_TEXTS} per request.', 'success': False}), 400
+        
+        try:
+            results = detect_text_emotion_many(texts, data.get("language"))
+        except ModelNotReady:
+            return ml_unavailable_response('text_emotion')
+        
+        formatted = []
+        for index, (emotion_result, status_code) in enumerate(results):
+            if status_code == 200:
+                response = format_text_emotion_response(emotion_result)
+            else:
+                response = {
+                    'error': emotion_result.get('error', 'Emotion detection failed'),
+                    'status': status_code,
+                    'success': False
+                }
+            response['index'] = index
+            formatted.append(response)
+        
+        return jsonify({
+            'results': formatted,
+            'total': len(formatted),
+            'detected': sum(1 for r in formatted if r['success']),
+            'success': True
+        }), 200
+        
+    except Exception as e:
+        logging.error(f"Batch text emotion detection error: {str(e)}")
+        return jsonify({'error': str(e), 'success': False}), 500
+
+
 @app.route("/get_text_detection_history", methods=['GET'])
 def get_text_detection_history():
     """
@@ -638,19 +811,18 @@ def track_emotion():
 def upload_image():
     try:
         # Ensure ML modules are loaded
-        if not ML_AVAILABLE or process_image is None:
-            load_ml_modules()
-            if not ML_AVAILABLE:
-                return jsonify({"error": "ML modules not available. Please try again.", "success": False}), 503
-        
-        if "file" in request.files:
-            file = request.files["file"]
-            response = process_image(file)
-            return jsonify(response)
-        elif request.is_json and "image_base64" in request.json:
-            response = process_image()
-            return jsonify(response)
-        return jsonify({"error":"No valid image provided"}), 400
+        unavailable = ml_unavailable_response('face_emotion')
+        if unavailable:
+            return unavailable
+        
+        try:
+            image_np, _, _ = read_uploaded_image()
+        except ValueError as e:
+            return jsonify({"error": str(e), "success": False}), 400
+        if image_np is None:
+            return jsonify({"error":"No valid image provided"}), 400
+        response = process_image(image=image_np, echo_image=wants_image_echo())
+        return jsonify(response)
     except Exception as e:
         logging.error(f"Image upload error: {str(e)}")
         return jsonify({"error": str(e), "success": False}), 500
@@ -660,21 +832,27 @@ def detect_image_emotion():
     """API endpoint for image emotion detection - used by image_detection.html"""
     try:
         # Ensure ML modules are loaded
-        if not ML_AVAILABLE or process_image is None:
-            load_ml_modules()
-            if not ML_AVAILABLE:
-                return jsonify({"error": "ML modules not available. Please try again.", "success": False}), 503
+        unavailable = ml_unavailable_response('face_emotion')
+        if unavailable:
+            return unavailable
         
-        # The frontend sends the file with field name 'image'
-        file = request.files.get("image") or request.files.get("file")
-        if file:
-            response = process_image(file)
+        # The frontend sends the file with field name 'image'; raw image bodies and base64 JSON also work
+        try:
+            image_np, _, transport = read_uploaded_image(("image", "file"))
+        except ValueError as e:
+            return jsonify({"error": str(e), "success": False}), 400
+        if image_np is None:
+            return jsonify({"error": "No valid image provided"}), 400
 
-            # Save to analytics if user is logged in
+        response = process_image(image=image_np, echo_image=wants_image_echo())
+
+        # Save uploads (not camera snapshots sent as base64) to analytics if user is logged in
+        if transport != "base64":
+            file = request.files.get("image") or request.files.get("file")
             if "user_id" in session and response.get("success", False):
                 try:
                     # Use a descriptive message or filename for the log
-                    msg = f"[Image Analysis] {file.filename}" if hasattr(file, 'filename') else "[Image Analysis]"
+                    msg = f"[Image Analysis] {file.filename}" if file and file.filename else "[Image Analysis]"
                     
                     create_chat(
                         user_id=session["user_id"],
@@ -688,11 +866,7 @@ def detect_image_emotion():
                 except Exception as e:
                     logging.warning(f"Failed to save image emotion analytics: {e}")
 
-            return jsonify(response)
-        elif request.is_json and "image_base64" in request.json:
-            response = process_image()
-            return jsonify(response)
-        return jsonify({"error": "No valid image provided"}), 400
+        return jsonify(response)
     except Exception as e:
         logging.error(f"Image emotion detection error: {str(e)}")
         return jsonify({"error": str(e), "success": False}), 500
@@ -732,10 +906,9 @@ def get_image_detection_history():
 def video_upload():
     try:
         # Ensure ML modules are loaded
-        if not ML_AVAILABLE or process_video is None:
-            load_ml_modules()
-            if not ML_AVAILABLE:
-                return jsonify({"error": "ML modules not available. Please try again.", "success": False}), 503
+        unavailable = ml_unavailable_response('face_emotion')
+        if unavailable:
+            return unavailable
         
         file = request.files.get("file")
         if not file:
@@ -771,10 +944,9 @@ def detect_video_emotion():
     """API endpoint for video emotion detection - used by video_detection.html"""
     try:
         # Ensure ML modules are loaded
-        if not ML_AVAILABLE or process_video is None:
-            load_ml_modules()
-            if not ML_AVAILABLE:
-                return jsonify({"error": "ML modules not available. Please try again.", "success": False}), 503
+        unavailable = ml_unavailable_response('face_emotion')
+        if unavailable:
+            return unavailable
         
         # The frontend sends the file with field name 'video'
         file = request.files.get("video") or request.files.get("file")
@@ -807,122 +979,348 @@ def detect_video_emotion():
         logging.error(f"Video emotion detection error: {str(e)}")
         return jsonify({"error": str(e), "success": False}), 500
 
+# ==================== BACKGROUND JOBS ====================
+
+def save_video_analytics(user_id, filename, result):
+    """Record a finished video analysis in the user's analytics history"""
+    if not result.get("success", False):
+        return
+    create_chat(
+        user_id=user_id,
+        user_message=f"[Video Analysis] {filename}" if filename else "[Video Analysis]",
+        ai_response=None,
+        detected_emotion=result.get("dominant_emotion", "neutral"),
+        emotion_score=float(result.get("dominant_emotion_confidence", 0.0)),
+        detected_language='en',
+        language_name='English'
+    )
+
+def run_video_job(params, progress):
+    """Job handler: analyze a saved video, then delete the upload"""
+    from detections.video_detection import analyze_video
+    get_model("face_emotion", wait=True)
+    progress(0, "Analyzing video")
+    try:
+        return analyze_video(
+            params["video_path"],
+            frame_skip=params.get("frame_skip"),
+            sample_fps=params.get("sample_fps"),
+            max_frames=params.get("max_frames"),
+            progress_callback=progress
+        )
+    finally:
+        try:
+            os.remove(params["video_path"])
+        except OSError:
+            pass
+
+def run_text_batch_job(params, progress):
+    """Job handler: score a list of texts in slices, reporting progress after each slice"""
+    get_model("text_emotion", wait=True)
+    texts = params["texts"]
+    formatted = []
+    slice_size = 256
+    for start in range(0, len(texts), slice_size):
+        results = detect_text_emotion_many(texts[start:start + slice_size], params.get("language"))
+        for offset, (emotion_result, status_code) in enumerate(results):
+            if status_code == 200:
+                response = format_text_emotion_response(emotion_result)
+            else:
+                response = {
+                    'error': emotion_result.get('error', 'Emotion detection failed'),
+                    'status': status_code,
+                    'success': False
+                }
+            response['index'] = start + offset
+            formatted.append(response)
+        progress(len(formatted) * 100 / len(texts), f"Scored {len(formatted)} of {len(texts)} texts")
+    return {
+        'results': formatted,
+        'total': len(formatted),
+        'detected': sum(1 for r in formatted if r['success']),
+        'success': True
+    }
+
+job_manager.register_handler("video", run_video_job)
+job_manager.register_handler("text_batch", run_text_batch_job)
+
+def job_response(job, status_code=200):
+    """Serialize a job with its status URLs"""
+    data = job.to_dict()
+    data['status_url'] = url_for('get_job_status', job_id=job.id)
+    data['events_url'] = url_for('stream_job_events', job_id=job.id)
+    return jsonify(data), status_code
+
+def find_user_job(job_id):
+    """Return the job if the current session may see it, else None"""
+    job = job_manager.get(job_id)
+    if job is None or (job.user_id and job.user_id != session.get("user_id")):
+        return None
+    return job
+
+@app.route("/api/jobs/video", methods=['POST'])
+def submit_video_job():
+    """Queue a video analysis and return its job id immediately (202)"""
+    try:
+        unavailable = ml_unavailable_response()
+        if unavailable:
+            return unavailable
+        
+        file = request.files.get("video") or request.files.get("file")
+        if not file:
+            return jsonify({"error": "No video file provided"}), 400
+        
+        from detections.video_detection import save_video_upload
+        video_path = save_video_upload(file, unique=True)
+        user_id = session.get("user_id")
+        filename = file.filename
+        
+        on_success = (lambda result: save_video_analytics(user_id, filename, result)) if user_id else None
+        try:
+            job = job_manager.submit(
+                "video",
+                {
+                    "video_path": video_path,
+                    "filename": filename,
+                    "frame_skip": request.form.get("frame_skip", type=int),
+                    "sample_fps": request.form.get("sample_fps", type=float),
+                    "max_frames": request.form.get("max_frames", type=int)
+                },
+                user_id=user_id,
+                on_success=on_success
+            )
+        except JobQueueFull:
+            os.remove(video_path)
+            response = jsonify({"error": "Too many analyses are queued. Please try again shortly.", "success": False})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+            return response
+        
+        return job_response(job, 202)
+    except Exception as e:
+        logging.error(f"Video job submission error: {str(e)}")
+        return jsonify({"error": str(e), "success": False}), 500
+
+@app.route("/api/jobs/text-batch", methods=['POST'])
+def submit_text_batch_job():
+    """Queue a bulk text emotion analysis and return its job id immediately (202)"""
+    try:
+        unavailable = ml_unavailable_response()
+        if unavailable:
+            return unavailable
+        
+        data = request.json
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        texts = data.get("texts")
+        if not isinstance(texts, list) or not texts:
+            return jsonify({'error': 'Please provide a non-empty list of texts.', 'success': False}), 400
+        
+        if len(texts) > MAX_BATCH_TEXTS:
+            return jsonify({'error': f'Too many texts. Maximum is {MAX_BATCH_TEXTS} per request.', 'success': False}), 400
+        
+        try:
+            job = job_manager.submit(
+                "text_batch", {"texts": texts, "language": data.get("language")}, user_id=session.get("user_id")
+            )
+        except JobQueueFull:
+            response = jsonify({"error": "Too many analyses are queued. Please try again shortly.", "success": False})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+            return response
+        
+        return job_response(job, 202)
+    except Exception as e:
+        logging.error(f"Text batch job submission error: {str(e)}")
+        return jsonify({"error": str(e), "success": False}), 500
+
+@app.route("/api/jobs/<job_id>", methods=['GET'])
+def get_job_status(job_id):
+    """Return the state and progress of a job, with its result once it has succeeded"""
+    job = find_user_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return job_response(job)
+
+@app.route("/api/jobs/<job_id>/events", methods=['GET'])
+def stream_job_events(job_id):
+    """Stream job progress as Server-Sent Events until the job finishes"""
+    job = find_user_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    
+    def generate():
+        last = None
+        current = job
+        while True:
+            # Jobs run by another worker process are re-read from MongoDB
+            current = job_manager.get(job_id) or current
+            snapshot = (current.state, current.progress, current.message)
+            if snapshot != last:
+                last = snapshot
+                yield sse_event('progress', current.to_dict(include_result=False))
+            if current.done:
+                yield sse_event('done', current.to_dict())
+                return
+            time.sleep(0.5)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def live_stream_key(stream_id):
+    """
+    Registry key of one camera stream of the current client, or None without a stream_id
+    
+    The client's stream_id is scoped to the logged-in user (else the remote
+    address), so two tabs or cameras never share a face track and one client
+    cannot pick up another's stream. The address alone is never a key:
+    clients behind one NAT would share a session.
+    """
+    if not stream_id:
+        return None
+    owner = session.get("user_id") or request.remote_addr
+    return f"{owner}:{str(stream_id)[:64]}"
+
 @app.route("/detect_live_emotion", methods=["POST"])
 def detect_live_emotion():
     """
-    Detect emotion from live video frame (base64 image)
+    Detect emotion from live video frame (raw JPEG body, multipart or base64 JSON)
     Used by live_chat.html for real-time emotion detection
+    
+    The face is tracked between frames of the same camera stream (the
+    client's "stream_id", new per capture start), so full face detection
+    only runs every FACE_REDETECT_INTERVAL frames or when the track is
+    lost. Frames without a stream_id are analyzed without any stream state.
+    Clients that can hold a connection open should prefer /ws/live-emotion.
+    
+    At most one frame per stream is analyzed at a time and one more may
+    wait; older waiting frames are dropped (dropped=True). Every response
+    carries suggested_interval_ms, the capture interval the server sustains.
     """
     try:
-        if not ML_AVAILABLE:
-            load_ml_modules()
-            if not ML_AVAILABLE:
-                return jsonify({"error": "ML modules not available. Please try again.", "success": False}), 503
+        unavailable = ml_unavailable_response('face_emotion')
+        if unavailable:
+            return unavailable
         
-        # Import necessary libraries
-        import base64
-        from io import BytesIO
-        import numpy as np
-        from PIL import Image
-
-        # Check for file upload (multipart/form-data) or JSON base64
-        image_np = None
-        
-        if 'image' in request.files:
-            file = request.files['image']
-            image = Image.open(file.stream).convert('RGB')
-            image_np = np.array(image)
-        else:
-            # Fallback to base64 from JSON
-            data = request.json or {}
-            image_base64 = data.get("image_base64")
-            
-            if image_base64:
-                # Decode base64 to image
-                import base64
-                from io import BytesIO
-                image_data = base64.b64decode(image_base64.split(",")[1] if "," in image_base64 else image_base64)
-                image = Image.open(BytesIO(image_data)).convert('RGB')
-                image_np = np.array(image)
+        # The frame arrives as a raw image/jpeg body, a multipart "image" upload or JSON image_base64
+        try:
+            image_np, scale, _ = read_uploaded_image(("image",))
+        except ValueError as e:
+            return jsonify({"error": str(e), "success": False}), 400
         
         if image_np is None:
             return jsonify({"error": "No image data provided"}), 400
-            
-        # Convert RGB to BGR for DeepFace (OpenCV format)
-        if len(image_np.shape) == 3 and image_np.shape[2] == 3:
-            image_np = image_np[:, :, ::-1].copy()
         
-        # Use DeepFace for emotion detection
-        # Ensure deepface path is set up (should be done by load_ml_modules or top level)
-        try:
-            from deepface import DeepFace
-        except ImportError:
-             # Setup local DeepFace path if import fails
-             sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'deepface'))
-             from deepface import DeepFace
-
-        result = DeepFace.analyze(
-            image_np,
-            actions=['emotion'],
-            enforce_detection=False,
-            silent=True
-        )
+        stream_id = request.args.get("stream_id") or request.form.get("stream_id")
+        if not stream_id and request.is_json:
+            stream_id = (request.get_json(silent=True) or {}).get("stream_id")
         
-        if result and isinstance(result, list) and len(result) > 0:
-            # DeepFace returns numpy floats, convert to native Python float
-            emotion_dict = {k: float(v) for k, v in result[0]['emotion'].items()}
-            detected_emotion = result[0]['dominant_emotion']
-            confidence = float(emotion_dict.get(detected_emotion, 0)) / 100
-            
-            # Extract face region for bounding box
-            region = result[0].get('region', {})
-            face_box = {
-                'x': int(region.get('x', 0)),
-                'y': int(region.get('y', 0)),
-                'w': int(region.get('w', 0)),
-                'h': int(region.get('h', 0))
-            }
-            
-            return jsonify({
-                "emotion": detected_emotion,
-                "confidence": round(confidence, 4),
-                "confidence_percentage": round(confidence * 100, 2),
-                "emotion_scores": emotion_dict,
-                "region": face_box,
-                "success": True
-            }), 200
-        else:
-            return jsonify({
-                "error": "No face detected",
-                "success": False
-            }), 200 # Return 200 with success=False so frontend handles it gracefully
+        # Face track and last result live on the stream's session; a frame that is
+        # superseded by a newer one while waiting is dropped with a cheap response
+        from detections.live_session import live_sessions, LiveSession
+        key = live_stream_key(stream_id)
+        live = live_sessions.get(key) if key else LiveSession()
+        payload = live.analyze_latest(image_np, scale=scale)
+        # Return 200 with success=False when no face is found so frontend handles it gracefully
+        return jsonify(payload), 200
             
     except Exception as e:
         logging.error(f"Live emotion detection error: {str(e)}")
         return jsonify({"error": str(e), "success": False}), 500
 
+def live_emotion_socket(ws):
+    """
+    WebSocket transport for live emotion detection (/ws/live-emotion?stream_id=...)
+    
+    The client sends each camera frame as a binary JPEG/PNG message and gets
+    one JSON result back per frame, in the same shape as /detect_live_emotion.
+    Session checks run once at the handshake, so each frame only costs decode
+    plus inference. With a stream_id the face track is the same one the HTTP
+    route uses for that stream (so falling back to HTTP keeps it); without
+    one it lives on the connection. Text messages are JSON commands:
+    {"type": "reset"} drops the face track.
+    """
+    from detections.frame_ingest import ingest_bytes, TRANSPORT_WEBSOCKET
+    from detections.live_session import live_sessions, LiveSession
+
+    key = live_stream_key(request.args.get("stream_id"))
+    live = live_sessions.get(key) if key else LiveSession(f"ws:{uuid.uuid4().hex}")
+    while True:
+        try:
+            message = ws.receive()
+        except ConnectionClosed:
+            break
+        if message is None:
+            break
+
+        if isinstance(message, str):
+            try:
+                command = json.loads(message)
+            except ValueError:
+                command = None
+            if not isinstance(command, dict):
+                try:
+                    ws.send(json.dumps({"error": "Commands must be JSON objects", "success": False}))
+                except ConnectionClosed:
+                    break
+                continue
+            if command.get("type") == "reset":
+                live.reset()
+            continue
+
+        load_ml_modules()
+        if not (ML_AVAILABLE and is_model_ready('face_emotion')):
+            ws.send(json.dumps({"error": "ML models are still loading", "retry_after": RETRY_AFTER_SECONDS, "success": False}))
+            continue
+
+        try:
+            image, scale = ingest_bytes(message, TRANSPORT_WEBSOCKET)
+            if key:
+                # Re-fetched per frame so a long-lived socket keeps its session from idling out
+                live = live_sessions.get(key)
+            payload = live.analyze_latest(image, scale=scale)
+        except ValueError as e:
+            payload = {"error": str(e), "success": False}
+        except Exception as e:
+            logging.error(f"Live emotion socket error: {str(e)}")
+            payload = {"error": str(e), "success": False}
+
+        try:
+            ws.send(json.dumps(payload))
+        except ConnectionClosed:
+            break
+
+if sock is not None:
+    sock.route("/ws/live-emotion")(live_emotion_socket)
+
 @app.route("/multilang_text", methods=['POST'])
 def multilang_text():
     try:
         # Ensure ML modules are loaded
-        if not ML_AVAILABLE or detect_text_emotion is None:
-            load_ml_modules()
-            if not ML_AVAILABLE:
-                return jsonify({"error": "ML modules not available. Please try again.", "success": False}), 503
+        unavailable = ml_unavailable_response()
+        if unavailable:
+            return unavailable
         
         input_text = request.json.get('text')
         if not input_text:
             return jsonify({"error": "No text provided."}), 400
         
-        translated_text = GoogleTranslator(source='auto', target='en').translate(input_text)
-        emotion_response, status_code = detect_text_emotion(translated_text)
+        # detect_text_emotion detects the language and translates (through the shared cache) itself
+        emotion_response, status_code = detect_text_emotion(input_text)
 
         if status_code != 200:
             return jsonify({"error": emotion_response.get("error", "Emotion detection failed.")}), status_code
 
+        # Text scored as written (English, or the multilingual model) has no translation to show
+        was_translated = bool(emotion_response.get('was_translated'))
         return jsonify({
             'original_text': input_text,
-            'translated_text': translated_text,
+            'translated_text': emotion_response.get('analysis_text') if was_translated else None,
+            'was_translated': was_translated,
             'top_emotion': emotion_response['Dominant_emotion']['label'],
             'Dominant_emotion': emotion_response['Dominant_emotion'],
             'emotion_analysis': emotion_response.get('Emotion Analysis', []),
@@ -948,6 +1346,46 @@ def chat():
     return render_template("chat.html", user={'name': 'User'})
 
 
+def detect_chat_emotion(user_message):
+    """
+    Detect the language and dominant emotion of a chat message.
+    Falls back to English / neutral when detection fails.
+
+    Returns:
+        tuple: (user_language, lang_name, emotion_label, emotion_score)
+    """
+    # One context per message: language detection and translation run once
+    context = TextAnalysisContext(user_message)
+    user_language, lang_name = context.language, context.language_name
+    logging.info(f"Detected user language: {lang_name} ({user_language})")
+    
+    # Detect emotion in user's message
+    try:
+        emotion_response, status_code = detect_text_emotion(user_message, context=context)
+        logging.info(f"Emotion detection status: {status_code}")
+
+        if status_code != 200:
+            # If emotion detection fails, use neutral response
+            logging.warning(f"Emotion detection failed with status {status_code}: {emotion_response}")
+            emotion_label = "neutral"
+            emotion_score = 0.5
+        else:
+            emotion_label = emotion_response.get('Dominant_emotion', {}).get('label', 'neutral')
+            emotion_score = emotion_response.get('Dominant_emotion', {}).get('score', 0.5)
+            logging.info(f"Detected emotion: {emotion_label} with score {emotion_score}")
+    except Exception as e:
+        logging.error(f"Emotion detection exception: {str(e)}")
+        emotion_label = "neutral"
+        emotion_score = 0.5
+
+    return user_language, lang_name, emotion_label, emotion_score
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @app.route("/api/chat", methods=['POST'])
 def ai_chat():
     """Handle chat messages and emotion-based responses with multilingual support"""
@@ -970,39 +1408,11 @@ def ai_chat():
 
         try:
             # Ensure ML modules are loaded
-            if not ML_AVAILABLE or detect_text_emotion is None or generate_emotion_aware_response is None:
-                logging.info("ML modules not available, loading...")
-                load_ml_modules()
-                if not ML_AVAILABLE:
-                    return jsonify({'error': 'ML modules not available. Please try again.', 'success': False}), 503
-            
-            # Detect user language
-            try:
-                user_language, lang_name, _ = detect_language(user_message)
-                logging.info(f"Detected user language: {lang_name} ({user_language})")
-            except Exception as e:
-                logging.warning(f"Language detection failed: {e}. Defaulting to English.")
-                user_language = 'en'
-                lang_name = 'English'
+            unavailable = ml_unavailable_response()
+            if unavailable:
+                return unavailable
             
-            # Detect emotion in user's message
-            try:
-                emotion_response, status_code = detect_text_emotion(user_message, user_language)
-                logging.info(f"Emotion detection status: {status_code}")
-
-                if status_code != 200:
-                    # If emotion detection fails, use neutral response
-                    logging.warning(f"Emotion detection failed with status {status_code}: {emotion_response}")
-                    emotion_label = "neutral"
-                    emotion_score = 0.5
-                else:
-                    emotion_label = emotion_response.get('Dominant_emotion', {}).get('label', 'neutral')
-                    emotion_score = emotion_response.get('Dominant_emotion', {}).get('score', 0.5)
-                    logging.info(f"Detected emotion: {emotion_label} with score {emotion_score}")
-            except Exception as e:
-                logging.error(f"Emotion detection exception: {str(e)}")
-                emotion_label = "neutral"
-                emotion_score = 0.5
+            user_language, lang_name, emotion_label, emotion_score = detect_chat_emotion(user_message)
 
             # Generate emotion-aware response in user's language
             try:
@@ -1047,6 +1457,94 @@ def ai_chat():
         return jsonify({'error': 'An unexpected error occurred'}), 500
 
 
+@app.route("/api/chat/stream", methods=['POST'])
+def ai_chat_stream():
+    """
+    Stream the chat reply as Server-Sent Events.
+
+    Events: 'emotion' (detected emotion and language, sent first),
+    'token' (reply text as it is generated), then 'done' with the
+    timestamp, or 'error' (partial=True when the reply was cut off
+    upstream). Only complete replies are saved.
+    """
+    if "user_id" not in session:
+        logging.warning("Chat stream request without user_id in session")
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    data = request.json
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+
+    user_message = data.get('message', '').strip()
+    if not user_message:
+        return jsonify({'error': 'Message cannot be empty'}), 400
+
+    unavailable = ml_unavailable_response()
+    if unavailable:
+        return unavailable
+
+    user_id = session["user_id"]
+    logging.info(f"Streaming chat reply for user {user_id[:8]}: {user_message[:50]}...")
+    user_language, lang_name, emotion_label, emotion_score = detect_chat_emotion(user_message)
+
+    def generate():
+        from groq_gateway import GroqStreamInterrupted
+
+        parts = []
+        completed = False
+        canned = False
+        try:
+            yield sse_event('emotion', {
+                'emotion': emotion_label,
+                'emotion_score': float(emotion_score),
+                'language': user_language,
+                'language_name': lang_name
+            })
+            # closing() hands a disconnect straight down to the Groq stream so its breaker slot is freed
+            with closing(stream_emotion_aware_response(user_message, emotion_label, emotion_score, user_language)) as reply:
+                for delta in reply:
+                    parts.append(delta)
+                    yield sse_event('token', {'text': delta})
+            completed = True
+        except GroqStreamInterrupted:
+            yield sse_event('error', {'error': 'The response was interrupted', 'ai_response': ''.join(parts), 'partial': True})
+        except Exception as e:
+            logging.error(f"Chat stream error: {str(e)}", exc_info=True)
+            canned = not parts
+            if canned:
+                parts.append("Thank you for sharing. I'm here to listen. Tell me more about what you're thinking.")
+            yield sse_event('error', {'error': 'Failed to finish the response', 'ai_response': ''.join(parts), 'partial': not canned})
+        finally:
+            # Runs on completion, error, or client disconnect; a cut-off reply is not saved as the full one
+            chat_data = None
+            ai_response = ''.join(parts).strip()
+            if ai_response and (completed or canned):
+                try:
+                    chat_data = create_chat(
+                        user_id=user_id,
+                        user_message=user_message,
+                        ai_response=ai_response,
+                        detected_emotion=emotion_label,
+                        emotion_score=float(emotion_score),
+                        detected_language=user_language,
+                        language_name=lang_name
+                    )
+                except Exception as e:
+                    logging.error(f"Database save failed: {str(e)}")
+
+        if completed:
+            yield sse_event('done', {
+                'ai_response': ai_response,
+                'timestamp': chat_data['timestamp'].isoformat() if chat_data and isinstance(chat_data.get('timestamp'), datetime) else datetime.now().isoformat()
+            })
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route("/api/chat-history", methods=['GET'])
 def get_chat_history():
     """Get user's chat history"""
@@ -1362,11 +1860,9 @@ def post_global_chat():
 
     try:
         # Ensure ML modules are loaded
-        if not ML_AVAILABLE or detect_text_emotion is None or generate_emotion_aware_response is None:
-            logging.info("ML modules not available, loading...")
-            load_ml_modules()
-            if not ML_AVAILABLE:
-                return jsonify({'error': 'ML modules not available. Please try again.', 'success': False}), 503
+        unavailable = ml_unavailable_response()
+        if unavailable:
+            return unavailable
         
         # Get or create anonymous user_id for session tracking
         if "user_id" not in session:
@@ -1386,16 +1882,12 @@ def post_global_chat():
 
         # Detect user language and emotion from text if message provided
         if user_message:
-            try:
-                user_language, lang_name, _ = detect_language(user_message)
-                logging.info(f"Global chat - Detected user language: {lang_name} ({user_language})")
-            except Exception as e:
-                logging.warning(f"Language detection failed: {e}. Defaulting to English.")
-                user_language = 'en'
-                lang_name = 'English'
+            context = TextAnalysisContext(user_message)
+            user_language, lang_name = context.language, context.language_name
+            logging.info(f"Global chat - Detected user language: {lang_name} ({user_language})")
             
             try:
-                emotion_response, status_code = detect_text_emotion(user_message, user_language)
+                emotion_response, status_code = detect_text_emotion(user_message, context=context)
                 if status_code == 200:
                     text_emotion = emotion_response.get('Dominant_emotion', {}).get('label', 'neutral')
                     emotion_score = emotion_response.get('Dominant_emotion', {}).get('score', 0.5)
@@ -1608,6 +2100,11 @@ def face_emotion_response():
     if not face_emotion:
         return jsonify({'error': 'Face emotion required'}), 400
 
+    # Ensure ML modules are loaded
+    unavailable = ml_unavailable_response()
+    if unavailable:
+        return unavailable
+
     try:
         response = generate_face_emotion_response(face_emotion)
         return jsonify({
@@ -1752,7 +2249,13 @@ def export_global_chat_report():
 
 @app.route("/api/export-live-scan-report", methods=['POST'])
 def export_live_scan_report():
-    """Export live camera scan data to Excel with optional captured frame images."""
+    """
+    Export live camera scan data to Excel with optional captured frame images.
+    
+    Frames are sent either as multipart files ("scans" holds the scan list as
+    JSON and frame_<index> the JPEG of that scan) or, for older clients, as
+    base64 "frame" strings inside a JSON body.
+    """
     if "user_id" not in session:
         return jsonify({'error': 'Unauthorized'}), 401
 
@@ -1763,8 +2266,13 @@ def export_live_scan_report():
         from io import BytesIO
         import xlsxwriter
 
-        data = request.json or {}
-        scans = data.get('scans', [])
+        frame_files = {}
+        if request.mimetype == 'multipart/form-data':
+            scans = json.loads(request.form.get('scans') or '[]')
+            frame_files = request.files
+        else:
+            data = request.json or {}
+            scans = data.get('scans', [])
 
         if not scans:
             return jsonify({'error': 'No scan data provided'}), 400
@@ -1841,16 +2349,20 @@ def export_live_scan_report():
                 ws_tl.write(row, 2, f"{round(conf * 100, 1)}%", data_fmt)
 
                 # Embed frame image if available
+                frame_file = frame_files.get(f'frame_{idx}')
                 frame_b64 = scan.get('frame')
-                if frame_b64:
+                if frame_file or frame_b64:
                     try:
-                        # Strip data-url prefix if present
-                        if ',' in frame_b64:
-                            frame_b64 = frame_b64.split(',', 1)[1]
-                        img_bytes = base64.b64decode(frame_b64)
                         img_path = os.path.join(tmp_dir, f'frame_{idx}.jpg')
-                        with open(img_path, 'wb') as f:
-                            f.write(img_bytes)
+                        if frame_file:
+                            # Streamed straight to disk, no base64 round trip
+                            frame_file.save(img_path)
+                        else:
+                            # Strip data-url prefix if present
+                            if ',' in frame_b64:
+                                frame_b64 = frame_b64.split(',', 1)[1]
+                            with open(img_path, 'wb') as f:
+                                f.write(base64.b64decode(frame_b64))
                         ws_tl.insert_image(row, 3, img_path, {
                             'x_scale': 0.25, 'y_scale': 0.25,
                             'x_offset': 4, 'y_offset': 4,
@@ -0,0 +1,189 @@
+"""
+Result Caching Module
+Bounded in-memory LRU cache with TTL and an optional SQLite tier
+that every worker process on the host can share
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Expired SQLite rows are purged once every this many writes
+PURGE_EVERY_WRITES = 500
+
+
+def normalize_text(text):
+    """Normalize text for cache lookups (collapse whitespace; case is kept, "NO" and "no" read differently)"""
+    return " ".join((text or "").split())
+
+
+def make_cache_key(*parts):
+    """Build a content-addressed key from the given parts"""
+    raw = "\x1f".join("" if part is None else str(part) for part in parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TieredCache:
+    """
+    Two-tier cache for JSON-serializable values.
+
+    The memory tier is a bounded LRU; the optional disk tier is a SQLite
+    file (db_path) so results survive restarts and are shared by all
+    gunicorn workers. Both tiers honour the same TTL.
+    """
+
+    def __init__(self, name, max_entries=1024, ttl_seconds=3600, db_path=None):
+        self.name = name
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self.db_path = db_path
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+
+        if self.db_path:
+            try:
+                self._init_db()
+            except Exception as e:
+                logger.warning(f"Cache '{name}': disk tier disabled ({e})")
+                self.db_path = None
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return json.loads(payload)
+                del self._memory[key]
+
+        payload = self._disk_get(key, now)
+        if payload is not None:
+            expires_at, payload = payload
+            with self._lock:
+                self._memory_put(key, payload, expires_at)
+                self.hits += 1
+                self.disk_hits += 1
+            return json.loads(payload)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        """Store a JSON-serializable value under key"""
+        try:
+            payload = json.dumps(value)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Cache '{self.name}': value not cacheable ({e})")
+            return
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._memory_put(key, payload, expires_at)
+        self._disk_set(key, payload, expires_at)
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+        conn = self._connection()
+        if conn is not None:
+            try:
+                with conn:
+                    conn.execute("DELETE FROM cache")
+            except sqlite3.Error as e:
+                logger.warning(f"Cache '{self.name}': failed to clear disk tier ({e})")
+
+    def stats(self):
+        """Return hit/miss counters and tier sizes"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'memory_entries': len(self._memory),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'disk_tier': bool(self.db_path),
+        }
+
+    def _memory_put(self, key, payload, expires_at):
+        self._memory[key] = (expires_at, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # ---- SQLite tier ----
+
+    def _init_db(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connection(self):
+        if not self.db_path:
+            return None
+        # One connection per thread and per process (gunicorn forks after import)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _disk_get(self, key, now):
+        conn = self._connection()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT expires_at, value FROM cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            return row
+        except sqlite3.Error as e:
+            logger.warning(f"Cache '{self.name}': disk read failed ({e})")
+            return None
+
+    def _disk_set(self, key, payload, expires_at):
+        conn = self._connection()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, payload, expires_at)
+                )
+                self._writes += 1
+                if self._writes % PURGE_EVERY_WRITES == 0:
+                    conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error as e:
+            logger.warning(f"Cache '{self.name}': disk write failed ({e})")
@@ -1 +1,6 @@
-from . import detection,image_detection,video_detection
\ No newline at end of file
+"""
+Emotion detection package
+Submodules are imported where they are used (from detections.detection import ...),
+so a spawned video worker that imports detections.video_worker does not load the
+text models or the Groq stack.
+"""
@@ -0,0 +1,118 @@
+"""
+Micro-batching scheduler for local model inference
+Groups concurrent single-item requests into one batched forward pass
+"""
+
+import os
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+
+# How long the scheduler waits for more requests before running a batch
+BATCH_MAX_WAIT_MS = float(os.getenv('EMOTION_BATCH_MAX_WAIT_MS', '5'))
+
+# Largest number of requests scored in one forward pass
+BATCH_MAX_SIZE = int(os.getenv('EMOTION_BATCH_MAX_SIZE', '16'))
+
+
+class MicroBatcher:
+    """
+    In-process request queue in front of a batch function.
+
+    Calls arriving within max_wait_ms of each other are grouped (up to
+    max_batch_size) and passed to batch_fn as one list. Each caller gets
+    back its own item from the returned list.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS, name="micro-batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        self.batches_run = 0
+        self.items_processed = 0
+        self.largest_batch = 0
+
+    def submit(self, item):
+        """Queue one item and return a Future for its result"""
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((item, future))
+        return future
+
+    def run(self, item, timeout=None):
+        """Queue one item and block until its result is ready"""
+        return self.submit(item).result(timeout)
+
+    def stats(self):
+        """Return scheduler counters"""
+        return {
+            'batches_run': self.batches_run,
+            'items_processed': self.items_processed,
+            'largest_batch': self.largest_batch,
+            'average_batch_size': round(self.items_processed / self.batches_run, 2) if self.batches_run else 0,
+            'queued': self._queue.qsize(),
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+        }
+
+    def _ensure_worker(self):
+        # Start lazily, and restart after a fork (gunicorn workers do not inherit threads)
+        pid = os.getpid()
+        if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+                return
+            if self._pid != pid:
+                self._queue = queue.Queue()
+            self._pid = pid
+            self._thread = threading.Thread(target=self._worker, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _worker(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        items = [item for item, _ in batch]
+        try:
+            outputs = self.batch_fn(items)
+            if len(outputs) != len(items):
+                raise ValueError(f"Batch function returned {len(outputs)} results for {len(items)} inputs")
+        except Exception as e:
+            logging.error(f"{self.name}: batch of {len(items)} failed: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches_run += 1
+        self.items_processed += len(items)
+        self.largest_batch = max(self.largest_batch, len(items))
+
+        for (_, future), output in zip(batch, outputs):
+            future.set_result(output)
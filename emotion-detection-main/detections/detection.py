@@ -1,53 +1,265 @@
 import re
 import os
 import json
+import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import closing
 from transformers import pipeline
 from nltk.corpus import words
 from textblob import TextBlob
-from groq import Groq
 from dotenv import load_dotenv
 import sys
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
-from language_utils import detect_language, translate_to_english, translate_to_language, get_multilingual_emotion_response
+from language_utils import (
+    SUPPORTED_LANGUAGES, TextAnalysisContext, translate_many_to_english, get_multilingual_emotion_response
+)
+from cache_utils import TieredCache, make_cache_key, normalize_text
+from model_registry import register_model, get_model, is_model_ready, ModelNotReady
+from groq_gateway import groq_gateway, GroqStreamInterrupted
+from .batching import MicroBatcher
 
 # Load environment variables
 load_dotenv()
 
-# Global Groq client
-groq_client = None
+# Local text model backend: "torch" (fp32 transformers pipeline) or "onnx-int8" (onnxruntime, CPU)
+TEXT_EMOTION_BACKEND = os.getenv('TEXT_EMOTION_BACKEND', 'torch').lower()
 
-# Helper to get Groq client with proper environment loading
-def get_groq_client():
-    global groq_client
-    if groq_client:
-        return groq_client
-    
-    # Try to load .env from root if it's not already loaded
-    if not os.getenv('GROQ_API_KEY'):
-        root_env = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
-        if os.path.exists(root_env):
-            load_dotenv(root_env)
+# Reported in model_used for each local backend
+LOCAL_MODEL_NAMES = {
+    "torch": "local_roberta_base_go_emotions",
+    "onnx-int8": "local_roberta_base_go_emotions_onnx_int8",
+}
+
+# Fallback emotion pipeline and word list, loaded by the model registry (not at import time)
+valid_words = set()
+active_text_backend = "torch"
+
+
+def load_text_emotion_model():
+    """Build the local go_emotions classifier for the configured backend and load the NLTK word list"""
+    global valid_words, active_text_backend
+    valid_words = set(words.words())
     
-    api_key = os.getenv('GROQ_API_KEY')
-    if api_key:
+    if TEXT_EMOTION_BACKEND in ("onnx", "onnx-int8"):
         try:
-            groq_client = Groq(api_key=api_key)
-            return groq_client
+            from .onnx_backend import load_onnx_emotion_model
+            classifier = load_onnx_emotion_model()
+            active_text_backend = "onnx-int8"
+            return classifier
         except Exception as e:
-            logging.error(f"Failed to initialize Groq client: {e}")
-    return None
+            logging.warning(f"ONNX text backend unavailable ({e}). Falling back to torch pipeline.")
+    
+    active_text_backend = "torch"
+    return pipeline("text-classification", model="SamLowe/roberta-base-go_emotions", top_k=None)
+
+
+register_model("text_emotion", load_text_emotion_model)
+
+
+def get_emotion_pipeline(wait=False):
+    """Return the local pipeline, raising ModelNotReady while it is still loading"""
+    return get_model("text_emotion", wait=wait)
+
+
+# Optional multilingual classifier (e.g. an XLM-R emotion model) scored on the original text.
+# Leave empty to always translate non-English text to English first.
+MULTILINGUAL_TEXT_MODEL = os.getenv('MULTILINGUAL_TEXT_MODEL', '').strip()
+
+# Languages routed to the multilingual model instead of translation
+MULTILINGUAL_LANGUAGES = {
+    code.strip().lower()
+    for code in os.getenv(
+        'MULTILINGUAL_LANGUAGES',
+        'hi,bn,ta,te,mr,gu,kn,ml,pa,es,fr,de,it,pt,nl,pl,ro,sv,ru,uk,tr,ar'
+    ).split(',')
+    if code.strip()
+}
+
+# Reported in route for each way a text can be scored
+ROUTE_MULTILINGUAL = "multilingual_local"
+ROUTE_GROQ = "groq"
+ROUTE_LOCAL = "local"
+ROUTE_HEDGED = "hedged"
+
+
+def load_multilingual_text_model():
+    """Build the multilingual text-classification pipeline"""
+    return pipeline("text-classification", model=MULTILINGUAL_TEXT_MODEL, top_k=None)
+
+
+if MULTILINGUAL_TEXT_MODEL:
+    register_model("multilingual_text_emotion", load_multilingual_text_model)
+
+
+def use_multilingual_model(language):
+    """
+    Check whether text in language should be scored by the multilingual model
+    
+    Starts loading the model on first use; until it is ready, text keeps
+    going through the translation path.
+    """
+    if not MULTILINGUAL_TEXT_MODEL or language == 'en' or language not in MULTILINGUAL_LANGUAGES:
+        return False
+    return is_model_ready("multilingual_text_emotion")
+
+# Number of texts scored per forward pass by detect_text_emotion_many
+TEXT_BATCH_SIZE = int(os.getenv('TEXT_BATCH_SIZE', '32'))
+
+
+def score_texts_with_pipeline(texts):
+    """Run one padded forward pass of the local pipeline over a list of texts"""
+    return get_emotion_pipeline()(texts, batch_size=len(texts), truncation=True)
+
+
+# Groups concurrent single-text requests into one forward pass
+text_batcher = MicroBatcher(score_texts_with_pipeline, name="text-emotion-batcher")
+
+
+def score_texts_with_multilingual_pipeline(texts):
+    """Run one padded forward pass of the multilingual pipeline over a list of texts"""
+    return get_model("multilingual_text_emotion")(texts, batch_size=len(texts), truncation=True)
+
+
+multilingual_batcher = MicroBatcher(score_texts_with_multilingual_pipeline, name="multilingual-emotion-batcher")
+
+# Long texts are split into overlapping token windows instead of being truncated at 512 tokens
+TEXT_CHUNK_TOKENS = int(os.getenv('TEXT_CHUNK_TOKENS', '500'))
+TEXT_CHUNK_OVERLAP = int(os.getenv('TEXT_CHUNK_OVERLAP', '64'))
+
+# Upper bound on windows scored per text; anything beyond is ignored and reported as truncated
+TEXT_MAX_CHUNKS = int(os.getenv('TEXT_MAX_CHUNKS', '64'))
+
+
+def split_into_token_windows(text, tokenizer, window_tokens=TEXT_CHUNK_TOKENS, overlap=TEXT_CHUNK_OVERLAP, max_chunks=TEXT_MAX_CHUNKS):
+    """
+    Split text into overlapping windows of at most window_tokens tokens
+    
+    Args:
+        text (str): The text to split
+        tokenizer: Fast tokenizer of the local model (needs offset mappings)
+        window_tokens (int): Tokens per window, excluding special tokens
+        overlap (int): Tokens shared by consecutive windows
+        max_chunks (int): Largest number of windows returned
+        
+    Returns:
+        tuple: (list of (start_char, end_char, token_count), truncated flag);
+        a single window means the text fits without chunking
+    """
+    window_tokens = max(16, window_tokens)
+    stride = max(1, window_tokens - max(0, min(overlap, window_tokens - 1)))
+    
+    # Only tokenize as much text as the window budget can cover, so huge inputs stay bounded
+    char_budget = (stride * (max_chunks - 1) + window_tokens) * 12
+    truncated = len(text) > char_budget
+    offsets = tokenizer(
+        text[:char_budget], add_special_tokens=False, return_offsets_mapping=True
+    )["offset_mapping"]
+    
+    if len(offsets) <= window_tokens:
+        return [(0, len(text), len(offsets))], truncated
+    
+    windows = []
+    for start in range(0, len(offsets), stride):
+        if len(windows) == max_chunks:
+            truncated = True
+            break
+        end = min(start + window_tokens, len(offsets))
+        windows.append((offsets[start][0], offsets[end - 1][1], end - start))
+        if end == len(offsets):
+            break
+    return windows, truncated
+
+
+def score_long_text(text, windows, truncated=False, batch_size=TEXT_BATCH_SIZE):
+    """
+    Score token windows in batches and aggregate them into one distribution
+    
+    Window scores are averaged weighted by token count; only running sums
+    and a compact per-window timeline are kept in memory.
+    
+    Args:
+        text (str): The full text
+        windows (list): (start_char, end_char, token_count) tuples from split_into_token_windows
+        truncated (bool): Whether the text was cut off at TEXT_MAX_CHUNKS windows
+        batch_size (int): Number of windows scored per forward pass
+        
+    Returns:
+        tuple: (emotion_data, status_code) with a "chunks" timeline added
+    """
+    totals = {}
+    total_weight = 0
+    timeline = []
+    batch_size = max(1, int(batch_size))
+    
+    for start in range(0, len(windows), batch_size):
+        batch = windows[start:start + batch_size]
+        outputs = score_texts_with_pipeline([text[s:e] for s, e, _ in batch])
+        
+        for offset, ((char_start, char_end, token_count), scores) in enumerate(zip(batch, outputs)):
+            if isinstance(scores, list) and scores and isinstance(scores[0], list):
+                scores = scores[0]
+            for item in scores:
+                totals[item["label"]] = totals.get(item["label"], 0.0) + item["score"] * token_count
+            total_weight += token_count
+            
+            top = max(scores, key=lambda x: x["score"])
+            timeline.append({
+                "index": start + offset,
+                "start_char": char_start,
+                "end_char": char_end,
+                "tokens": token_count,
+                "label": top["label"],
+                "score": round(top["score"], 4)
+            })
+    
+    aggregated = [{"label": label, "score": total / total_weight} for label, total in totals.items()]
+    response, status_code = format_local_model_result(text, aggregated)
+    if status_code == 200:
+        response["chunks"] = {
+            "count": len(windows),
+            "window_tokens": TEXT_CHUNK_TOKENS,
+            "overlap_tokens": TEXT_CHUNK_OVERLAP,
+            "truncated": truncated,
+            "timeline": timeline
+        }
+    return response, status_code
+
+# Result cache for detect_text_emotion (set TEXT_EMOTION_CACHE_DB to share it across workers)
+text_emotion_cache = TieredCache(
+    "text_emotion",
+    max_entries=int(os.getenv('TEXT_EMOTION_CACHE_SIZE', '2048')),
+    ttl_seconds=int(os.getenv('TEXT_EMOTION_CACHE_TTL', '86400')),
+    db_path=os.getenv('TEXT_EMOTION_CACHE_DB') or None
+)
+
+# Hedged mode: race the local model against Groq and keep whichever answers within the budget
+TEXT_EMOTION_HEDGING = os.getenv('TEXT_EMOTION_HEDGING', '0') == '1'
+
+# Head start given to Groq before the local model is started (0 = start both at once)
+HEDGE_DELAY_MS = float(os.getenv('HEDGE_DELAY_MS', '150'))
 
-# Fallback emotion pipeline
-emotion_pipeline = pipeline("text-classification", model="SamLowe/roberta-base-go_emotions", top_k=None)
-valid_words=set(words.words())
+# Latency budget for a hedged detection, also used as the Groq call deadline
+HEDGE_LATENCY_BUDGET_MS = float(os.getenv('HEDGE_LATENCY_BUDGET_MS', '2500'))
+
+# Separate pools so a backlog of slow Groq calls can never queue the local hedge behind them
+_hedge_executor = ThreadPoolExecutor(max_workers=int(os.getenv('HEDGE_MAX_WORKERS', '16')), thread_name_prefix="text-hedge")
+_local_hedge_executor = ThreadPoolExecutor(max_workers=int(os.getenv('HEDGE_LOCAL_WORKERS', '4')), thread_name_prefix="text-hedge-local")
+_hedge_lock = threading.Lock()
+hedge_stats = {"groq": 0, "local": 0, "local_fallback": 0}
 
 def is_gibberish(text):
     if len(set(text))<=2:
         return True
     
+    # The vowel checks below only apply to Latin-script text (Tamil, Hindi, CJK... have no a/e/i/o/u)
+    letters = [char for char in text if char.isalpha()]
+    if letters and sum(1 for char in letters if not char.isascii()) > len(letters) / 2:
+        return False
+    
     if re.match(r"^[^a-zA-Z\s]+$", text):  
         return True
     
@@ -72,88 +284,320 @@ def is_meaningful(text):
     return True
 
 
-def detect_text_emotion(text, user_language=None):
+def detect_text_emotion(text, user_language=None, context=None):
     """
     Detect emotion from text with multilingual support
     
     Args:
         text (str): The text to analyze
         user_language (str): User's language code (optional, will be detected if not provided)
+        context (TextAnalysisContext): Request context to reuse (optional); the result is stored on it
         
     Returns:
         tuple: (emotion_data, status_code)
     """
+    context = context or TextAnalysisContext(text, user_language)
 
     if not text.strip():
         return {"error": "Please enter a statement."}, 400  
     
     # Simplified meaningful check - just check for gibberish
-    if is_gibberish(text):
+    if context.gibberish is None:
+        context.gibberish = is_gibberish(text)
+    if context.gibberish:
         return {"error":"No Emotion Detected. Please enter a valid statement."},400
     
-    # Detect language if not provided
-    if user_language is None:
-        try:
-            user_language, lang_name, _ = detect_language(text)
-            logging.info(f"Detected language: {lang_name} ({user_language})")
-        except Exception as e:
-            logging.warning(f"Language detection failed: {e}. Defaulting to English.")
-            user_language = 'en'
-            lang_name = 'English'
-    else:
-        lang_name = user_language
+    # Repeated messages cost a cache lookup instead of translation and an LLM round trip
+    backend = "groq" if groq_gateway.is_available() else f"local-{active_text_backend}"
+    cache_key = text_emotion_cache_key(text, context.language, backend)
+    cached = text_emotion_cache.get(cache_key)
+    if cached is None and backend == "groq" and TEXT_EMOTION_HEDGING:
+        # Hedged requests accept a local answer, and the local model often wins the race
+        cached = text_emotion_cache.get(text_emotion_cache_key(text, context.language, f"local-{active_text_backend}"))
+    if cached is not None:
+        emotion_result, status_code = cached
+        if status_code == 200:
+            emotion_result['original_text'] = text
+            if not emotion_result.get('was_translated'):
+                emotion_result['analysis_text'] = text
+        context.emotion_result, context.status_code = emotion_result, status_code
+        return emotion_result, status_code
     
-    # Translate to English for emotion detection if not in English
-    text_for_analysis = text
-    was_translated = False
+    emotion_result, status_code = analyze_text_emotion(text, context=context)
     
-    if user_language != 'en':
-        try:
-            text_for_analysis, _, was_translated = translate_to_english(text, user_language)
-            logging.info(f"Translated text for emotion analysis from {user_language}")
-        except Exception as e:
-            logging.warning(f"Translation failed: {e}. Using original text for emotion detection.")
-            text_for_analysis = text
-            was_translated = False
+    # Server errors are not cached so a transient failure is retried next time
+    if status_code < 500:
+        # A local fallback (Groq error or open breaker) is stored under the local key, not Groq's
+        produced_by = result_backend(emotion_result, backend)
+        if produced_by != backend:
+            cache_key = text_emotion_cache_key(text, context.language, produced_by)
+        text_emotion_cache.set(cache_key, [emotion_result, status_code])
+    
+    context.emotion_result, context.status_code = emotion_result, status_code
+    return emotion_result, status_code
+
+
+def text_emotion_cache_key(text, language, backend):
+    """Build the text emotion cache key for the backend that answers (or answered) the request"""
+    if MULTILINGUAL_TEXT_MODEL and is_model_ready("multilingual_text_emotion", start=False):
+        backend += f"+{MULTILINGUAL_TEXT_MODEL}"
+    return make_cache_key(normalize_text(text), language, backend)
+
+
+def result_backend(emotion_result, routed_backend):
+    """
+    Return the cache backend name of the model that produced emotion_result
+    
+    Args:
+        emotion_result (dict): Result of analyze_text_emotion
+        routed_backend (str): Backend the request was routed to (used for input errors
+            and multilingual results, which do not depend on Groq)
+        
+    Returns:
+        str: "groq" or "local-<backend>"
+    """
+    model_used = emotion_result.get("model_used") or ""
+    if not model_used or emotion_result.get("route") == ROUTE_MULTILINGUAL:
+        return routed_backend
+    if model_used.startswith("groq"):
+        return "groq"
+    return f"local-{active_text_backend}"
+
+
+def analyze_text_emotion(text, user_language=None, context=None):
+    """
+    Run language detection, translation and emotion scoring for one text (uncached)
     
-    # Try Groq first if available
-    client = get_groq_client()
-    if client:
+    Args:
+        text (str): The text to analyze
+        user_language (str): User's language code (optional, will be detected if not provided)
+        context (TextAnalysisContext): Request context holding the language and translation (optional)
+        
+    Returns:
+        tuple: (emotion_data, status_code)
+    """
+    context = context or TextAnalysisContext(text, user_language)
+    user_language, lang_name = context.language, context.language_name
+    
+    # Languages covered by the multilingual model are scored as written, without a translation round trip
+    if use_multilingual_model(user_language):
+        emotion_result, status_code = detect_emotion_with_multilingual_model(text)
+        if status_code == 200:
+            add_language_info(emotion_result, text, text, user_language, lang_name, False, ROUTE_MULTILINGUAL)
+        if status_code < 500:
+            return emotion_result, status_code
+        logging.warning(f"Multilingual model error: {emotion_result.get('error')}. Translating instead.")
+    
+    # Translated at most once per request (and cached across requests)
+    text_for_analysis, was_translated = context.english_text, context.was_translated
+    
+    # Hedged mode races Groq against the local model under a latency budget
+    if TEXT_EMOTION_HEDGING and groq_gateway.is_available():
+        emotion_result, status_code = detect_emotion_hedged(text_for_analysis)
+        if status_code == 200:
+            add_language_info(emotion_result, text, text_for_analysis, user_language, lang_name, was_translated, ROUTE_HEDGED)
+        return emotion_result, status_code
+    
+    # Try Groq first if available (skipped while the circuit breaker is open)
+    if groq_gateway.is_available():
         try:
             logging.info(f"Attempting Groq detection for text: {text_for_analysis[:50]}...")
-            emotion_result, status_code = detect_emotion_with_groq(text_for_analysis, client)
+            emotion_result, status_code = detect_emotion_with_groq(text_for_analysis)
             
             if status_code == 200:
-                # Add language information
-                emotion_result['detected_language'] = user_language
-                emotion_result['language_name'] = lang_name
-                emotion_result['was_translated'] = was_translated
-                emotion_result['original_text'] = text
-                emotion_result['analysis_text'] = text_for_analysis if was_translated else text
+                add_language_info(emotion_result, text, text_for_analysis, user_language, lang_name, was_translated, ROUTE_GROQ)
                 
             return emotion_result, status_code
         except Exception as e:
             logging.warning(f"Groq API error: {e}. Using local model instead.")
     else:
-        logging.info("Groq client not initialized. Using local model.")
+        logging.info("Groq not configured or circuit breaker open. Using local model.")
     
     # Fallback to local model
     emotion_result, status_code = detect_emotion_with_local_model(text_for_analysis)
     
     if status_code == 200:
-        # Add language information
-        emotion_result['detected_language'] = user_language
-        emotion_result['language_name'] = lang_name
-        emotion_result['was_translated'] = was_translated
-        emotion_result['original_text'] = text
-        emotion_result['analysis_text'] = text_for_analysis if was_translated else text
+        add_language_info(emotion_result, text, text_for_analysis, user_language, lang_name, was_translated, ROUTE_LOCAL)
     
     return emotion_result, status_code
 
 
-def detect_emotion_with_groq(text, client):
+def add_language_info(emotion_result, text, text_for_analysis, user_language, lang_name, was_translated, route=None):
+    """Attach language, translation and routing details to a successful emotion result"""
+    emotion_result['detected_language'] = user_language
+    emotion_result['language_name'] = lang_name
+    emotion_result['was_translated'] = was_translated
+    emotion_result['original_text'] = text
+    emotion_result['analysis_text'] = text_for_analysis if was_translated else text
+    if route:
+        emotion_result['route'] = route
+    return emotion_result
+
+
+def detect_text_emotion_many(texts, user_language=None, batch_size=TEXT_BATCH_SIZE):
+    """
+    Detect emotion for many texts in one call using the local model
+    
+    Texts are sorted by length and scored in padded batches so each forward
+    pass holds inputs of similar size, instead of one forward pass per text.
+    
+    Args:
+        texts (list): The texts to analyze
+        user_language (str): Language code shared by all texts (optional, detected per text if not provided)
+        batch_size (int): Number of texts scored per forward pass
+        
+    Returns:
+        list: (emotion_data, status_code) tuples in the same order as texts
+        
+    Raises:
+        ModelNotReady: If the local model is still loading
+    """
+    # Fail fast (the caller answers 503) instead of translating texts we cannot score yet
+    get_emotion_pipeline()
+    
+    results = [None] * len(texts)
+    pending = []
+    
+    for index, text in enumerate(texts):
+        if not isinstance(text, str) or not text.strip():
+            results[index] = ({"error": "Please enter a statement."}, 400)
+            continue
+        if is_gibberish(text):
+            results[index] = ({"error": "No Emotion Detected. Please enter a valid statement."}, 400)
+            continue
+        
+        pending.append((index, TextAnalysisContext(text, user_language)))
+    
+    # One bulk translation call (and cache lookup) for every non-English text
+    translations = translate_many_to_english(
+        [context.text for _, context in pending], [context.language for _, context in pending]
+    )
+    for (_, context), (english_text, was_translated) in zip(pending, translations):
+        context.set_english_text(english_text, was_translated)
+    pending = [
+        (index, context.text, context.english_text, context.language, context.language_name, context.was_translated)
+        for index, context in pending
+    ]
+    
+    # Bucket by length so padding inside each batch stays small
+    pending.sort(key=lambda item: len(item[2]))
+    batch_size = max(1, int(batch_size))
+    
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        batch_texts = [item[2] for item in batch]
+        
+        try:
+            outputs = score_texts_with_pipeline(batch_texts)
+        except Exception as e:
+            logging.error(f"Batch model error: {str(e)}")
+            for item in batch:
+                results[item[0]] = ({"error": f"Model error: {str(e)}"}, 500)
+            continue
+        
+        for (index, text, text_for_analysis, language, lang_name, was_translated), scores in zip(batch, outputs):
+            emotion_result, status_code = format_local_model_result(text_for_analysis, scores)
+            if status_code == 200:
+                add_language_info(emotion_result, text, text_for_analysis, language, lang_name, was_translated, ROUTE_LOCAL)
+            results[index] = (emotion_result, status_code)
+    
+    logging.info(f"Batch emotion detection complete: {len(pending)} texts scored in batches of {batch_size}")
+    return results
+
+
+def get_text_emotion_cache_stats():
+    """Return hit/miss counters for the text emotion result cache"""
+    return text_emotion_cache.stats()
+
+
+def detect_emotion_hedged(text):
+    """
+    Race Groq against the local model and return the first usable result within the latency budget
+    
+    Groq gets a head start of HEDGE_DELAY_MS; the local model is started after that
+    delay (or as soon as Groq fails) on its own pool. If the budget runs out, the local
+    result is used; a local call that has not started yet is run in the caller's thread.
+    The winning backend is recorded in the result as hedge_winner.
+    
+    Args:
+        text (str): The (English) text to analyze
+        
+    Returns:
+        tuple: (emotion_data, status_code)
+    """
+    start = time.monotonic()
+    budget = HEDGE_LATENCY_BUDGET_MS / 1000
+    deadline = start + budget
+    hedge_at = start + HEDGE_DELAY_MS / 1000
+    
+    futures = {_hedge_executor.submit(detect_emotion_with_groq, text, budget): "groq"}
+    local_future = None
+    local_result = None
+    winner = None
+    result = None
+    
+    while futures or local_future is None:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        
+        # Start the local model once the head start is over
+        if local_future is None and now >= hedge_at:
+            local_future = _local_hedge_executor.submit(detect_emotion_with_local_model, text)
+            futures[local_future] = "local"
+        
+        timeout = deadline - now if local_future is not None else min(deadline, hedge_at) - now
+        done, _ = wait(list(futures), timeout=max(0, timeout), return_when=FIRST_COMPLETED)
+        
+        for future in done:
+            backend = futures.pop(future)
+            if backend == "groq":
+                if future.exception() is None:
+                    winner, result = backend, future.result()
+                    break
+                logging.warning(f"Hedged Groq call failed: {future.exception()}")
+                hedge_at = time.monotonic()
+            else:
+                local_result = future.result()
+                if local_result[1] < 500:
+                    winner, result = backend, local_result
+                    break
+        if winner:
+            break
+    
+    if winner is None:
+        # Budget exhausted or neither result usable: the local model is the floor
+        with _hedge_lock:
+            hedge_stats["local_fallback"] += 1
+        if local_result is None:
+            if local_future is None or local_future.cancel():
+                local_result = detect_emotion_with_local_model(text)
+            else:
+                local_result = local_future.result()
+        winner, result = "local", local_result
+    
+    emotion_result, status_code = result
+    with _hedge_lock:
+        hedge_stats[winner] += 1
+    
+    elapsed_ms = round((time.monotonic() - start) * 1000, 1)
+    logging.info(f"Hedged detection won by {winner} in {elapsed_ms}ms")
+    if status_code == 200:
+        emotion_result["hedge_winner"] = winner
+        emotion_result["hedge_latency_ms"] = elapsed_ms
+    return emotion_result, status_code
+
+
+def get_hedge_stats():
+    """Return how often each backend won a hedged detection"""
+    with _hedge_lock:
+        return dict(hedge_stats, enabled=TEXT_EMOTION_HEDGING)
+
+
+def detect_emotion_with_groq(text, timeout=None):
     """
     Detect emotion using Groq API with detailed paragraph analysis
+    timeout overrides the gateway's default deadline (seconds)
     """
     try:
         prompt = f"""Analyze the emotion in the following text and provide both structured data and detailed analysis.
@@ -179,14 +623,15 @@ Respond with ONLY a valid JSON object (no markdown, no extra text) with this exa
 Emotions can be: joy, sadness, anger, fear, disgust, surprise, neutral
 """
         
-        chat_completion = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        chat_completion = groq_gateway.chat_completion(
+            "text_emotion",
             messages=[
                 {"role": "system", "content": "You are an expert emotion psychologist and text analyst. Provide detailed, insightful analysis. Respond with valid JSON only."},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.5,
-            max_tokens=1000
+            max_tokens=1000,
+            timeout=timeout
         )
         
         # Parse the response
@@ -216,7 +661,7 @@ Emotions can be: joy, sadness, anger, fear, disgust, surprise, neutral
             
     except Exception as e:
         logging.error(f"Groq detection error: {str(e)}")
-        logging.error(f"Groq client status: {groq_client}")
+        logging.error(f"Groq circuit breaker: {groq_gateway.breaker.state}")
         logging.error(f"API Key available: {bool(os.getenv('GROQ_API_KEY'))}")
         # Re-raise to trigger fallback
         raise
@@ -288,136 +733,142 @@ def generate_analysis_report(text, emotions_data):
 def detect_emotion_with_local_model(text):
     """
     Fallback: Detect emotion using local transformer model with detailed paragraph analysis
+    
+    Texts longer than one model window are scored in overlapping chunks
+    (see score_long_text) instead of being truncated.
     """
     try:
-        result = emotion_pipeline(text)  
-
-        if isinstance(result, list) and len(result) > 0 and isinstance(result[0], list):
-            result = result[0]  
+        # Fail fast while the model warms up instead of queueing behind the load
+        emotion_pipeline = get_emotion_pipeline()
+        
+        windows, truncated = split_into_token_windows(text, emotion_pipeline.tokenizer)
+        if len(windows) > 1:
+            logging.info(f"Scoring long text in {len(windows)} chunks (truncated={truncated})")
+            return score_long_text(text, windows, truncated)
+        
+        # Concurrent callers share one batched forward pass
+        result = text_batcher.run(text)
+        return format_local_model_result(text, result)
 
-        if isinstance(result, list) and all(isinstance(item, dict) for item in result):
-            sorted_emotions = sorted(result, key=lambda x: x["score"], reverse=True)
+    except ModelNotReady as e:
+        logging.info(f"Local text model not ready: {e}")
+        return {"error": "Emotion model is still loading. Please try again shortly.", "retry_after": e.retry_after}, 503
+    except Exception as e:
+        return {"error": f"Model error: {str(e)}"}, 500
 
-            top_emotion = sorted_emotions[0]
-            if top_emotion["label"] == "neutral" and top_emotion["score"] > 0.95:
-                return {"error": "No Emotion Detected."}, 400
-
-            # Detailed analysis with all emotions and percentages
-            emotion_analysis = [
-                {
-                    "label": em["label"], 
-                    "score": round(em["score"], 4),
-                    "percentage": round(em["score"] * 100, 2)
-                }
-                for em in sorted_emotions  # Show all emotions in detail
-            ]
-
-            # Generate detailed paragraph analysis
-            analysis_details = generate_analysis_report(text, emotion_analysis)
-
-            response = {
-                "Dominant_emotion": {
-                    "label": top_emotion["label"],  
-                    "score": round(top_emotion["score"], 4),
-                    "percentage": round(top_emotion["score"] * 100, 2)
-                },
-                "Emotion Analysis": emotion_analysis,
-                "analysis_report": analysis_details["analysis_report"],
-                "key_indicators": analysis_details["key_indicators"],
-                "emotional_intensity": analysis_details["emotional_intensity"],
-                "model_used": "local_roberta_base_go_emotions"
-            }
-            return response, 200
-        
-        else:
-            return {"error": "Unexpected model output format."}, 500
 
+def detect_emotion_with_multilingual_model(text):
+    """
+    Detect emotion with the multilingual model directly on the original (non-English) text
+    """
+    try:
+        result = multilingual_batcher.run(text)
+        return format_local_model_result(text, result, model_used=f"local_{MULTILINGUAL_TEXT_MODEL.split('/')[-1]}")
+    except ModelNotReady as e:
+        return {"error": "Multilingual emotion model is still loading.", "retry_after": e.retry_after}, 503
     except Exception as e:
         return {"error": f"Model error: {str(e)}"}, 500
 
 
-def generate_emotion_aware_response(user_message, emotion_label, emotion_score, user_language='en'):
+def format_local_model_result(text, result, model_used=None):
     """
-    Generate an AI response that is empathetic and tailored to the user's detected emotion.
-    Supports multilingual responses using Groq API.
+    Build the emotion response for one text from the local pipeline scores
     
+    Args:
+        text (str): The analyzed text
+        result (list): Label/score dicts produced by the pipeline for this text
+        model_used (str): Reported model name (default: the active go_emotions backend)
+        
+    Returns:
+        tuple: (emotion_data, status_code)
+    """
+    if isinstance(result, list) and len(result) > 0 and isinstance(result[0], list):
+        result = result[0]  
+
+    if isinstance(result, list) and len(result) > 0 and all(isinstance(item, dict) for item in result):
+        sorted_emotions = sorted(result, key=lambda x: x["score"], reverse=True)
+
+        top_emotion = sorted_emotions[0]
+        if top_emotion["label"] == "neutral" and top_emotion["score"] > 0.95:
+            return {"error": "No Emotion Detected."}, 400
+
+        # Detailed analysis with all emotions and percentages
+        emotion_analysis = [
+            {
+                "label": em["label"], 
+                "score": round(em["score"], 4),
+                "percentage": round(em["score"] * 100, 2)
+            }
+            for em in sorted_emotions  # Show all emotions in detail
+        ]
+
+        # Generate detailed paragraph analysis
+        analysis_details = generate_analysis_report(text, emotion_analysis)
+
+        response = {
+            "Dominant_emotion": {
+                "label": top_emotion["label"],  
+                "score": round(top_emotion["score"], 4),
+                "percentage": round(top_emotion["score"] * 100, 2)
+            },
+            "Emotion Analysis": emotion_analysis,
+            "analysis_report": analysis_details["analysis_report"],
+            "key_indicators": analysis_details["key_indicators"],
+            "emotional_intensity": analysis_details["emotional_intensity"],
+            "model_used": model_used or LOCAL_MODEL_NAMES[active_text_backend]
+        }
+        return response, 200
+    
+    else:
+        return {"error": "Unexpected model output format."}, 500
+
+
+def build_emotion_aware_messages(user_message, emotion_label, emotion_score, user_language='en'):
+    """
+    Build the Groq chat messages for an emotion-aware reply.
+
     Args:
         user_message (str): The user's message
         emotion_label (str): Detected emotion
         emotion_score (float): Emotion confidence score
         user_language (str): User's language code (default: 'en')
-        
+
     Returns:
-        str: AI-generated response in user's language
+        list: System and user messages for the chat completion
     """
-    client = get_groq_client()
-    
     emotion_label_lower = emotion_label.lower()
+
+    # Build language instruction based on user language
+    language_instruction = ""
+    if user_language != 'en':
+        target_lang = SUPPORTED_LANGUAGES.get(user_language)
+        if target_lang:
+            language_instruction = f"\nIMPORTANT: The user is writing in {target_lang}. You MUST respond ONLY in {target_lang}. Do not use English at all. Match the user's language exactly."
+        else:
+            # Unknown language code but not English — tell AI to detect and match
+            language_instruction = f"\nIMPORTANT: The user is NOT writing in English. Detect the language of their message and respond ENTIRELY in that same language. Do not use English at all. Match the user's language exactly."
     
-    if client:
-        try:
-            # Build language instruction based on user language
-            language_instruction = ""
-            if user_language != 'en':
-                lang_names = {
-                    'es': 'Spanish',
-                    'fr': 'French',
-                    'de': 'German',
-                    'it': 'Italian',
-                    'pt': 'Portuguese',
-                    'ru': 'Russian',
-                    'ja': 'Japanese',
-                    'ko': 'Korean',
-                    'zh-cn': 'Chinese (Simplified)',
-                    'zh-tw': 'Chinese (Traditional)',
-                    'ar': 'Arabic',
-                    'hi': 'Hindi',
-                    'ta': 'Tamil',
-                    'te': 'Telugu',
-                    'bn': 'Bengali',
-                    'ur': 'Urdu',
-                    'th': 'Thai',
-                    'vi': 'Vietnamese',
-                    'tr': 'Turkish',
-                    'nl': 'Dutch',
-                    'sv': 'Swedish',
-                    'pl': 'Polish',
-                    'id': 'Indonesian',
-                    'ms': 'Malay',
-                    'ml': 'Malayalam',
-                    'kn': 'Kannada',
-                    'gu': 'Gujarati',
-                    'mr': 'Marathi',
-                    'pa': 'Punjabi',
-                }
-                target_lang = lang_names.get(user_language, None)
-                if target_lang:
-                    language_instruction = f"\nIMPORTANT: The user is writing in {target_lang}. You MUST respond ONLY in {target_lang}. Do not use English at all. Match the user's language exactly."
-                else:
-                    # Unknown language code but not English — tell AI to detect and match
-                    language_instruction = f"\nIMPORTANT: The user is NOT writing in English. Detect the language of their message and respond ENTIRELY in that same language. Do not use English at all. Match the user's language exactly."
-            
-            # Build emotion-specific guidance for the AI
-            emotion_guidance = {
-                "joy": "The user is happy — genuinely celebrate with them, appreciate their positivity, and encourage them to keep embracing what brings them joy. Be warm and uplifting.",
-                "happy": "The user is feeling good — share in their happiness, compliment their positive outlook, and motivate them to spread this energy. Be enthusiastic and supportive.",
-                "sadness": "The user is sad — offer sincere consolation, validate that their pain is real and matters, remind them that tough times are temporary, and gently suggest healthy coping strategies. Be compassionate and tender.",
-                "sad": "The user is going through a hard time — listen deeply, acknowledge their struggle without minimizing it, offer words of comfort and hope, and remind them they are not alone. Be caring and patient.",
-                "anger": "The user is frustrated or angry — first validate their feelings without judgment, help them see the situation with perspective, and suggest constructive ways to channel their energy. Be calm and understanding.",
-                "angry": "The user is upset — acknowledge that their frustration is valid, help them process what happened, and guide them toward a solution or peace of mind. Be respectful and grounding.",
-                "fear": "The user is anxious or afraid — reassure them with genuine empathy, help them break down what's scaring them into manageable pieces, and remind them of their strength. Be calming and encouraging.",
-                "afraid": "The user is worried — provide comfort and reassurance, normalize their feelings, offer practical perspective, and remind them that courage isn't the absence of fear. Be supportive and gentle.",
-                "disgust": "The user is bothered by something — acknowledge their strong reaction, help them understand what's triggering it, and offer a constructive way to think about or handle the situation. Be respectful.",
-                "surprise": "The user is surprised — share in their amazement, help them process the unexpected, and encourage them to see opportunities in the surprise. Be excited and curious with them.",
-                "neutral": "The user seems reflective — engage meaningfully with their actual words, offer thoughtful perspective, and ask a question that helps them explore their thoughts deeper. Be attentive and insightful.",
-                "love": "The user is feeling love or affection — appreciate the beauty in their emotions, encourage them to cherish and express their feelings, and be warm and heartfelt.",
-                "confusion": "The user seems confused — help clarify their thoughts with patience, break things down simply, and guide them toward clarity. Be patient and supportive.",
-                "approval": "The user is expressing approval — affirm their positive judgment, appreciate their perspective, and encourage them to continue making good assessments."
-            }
-            
-            guidance = emotion_guidance.get(emotion_label_lower, emotion_guidance.get("neutral", "Respond with empathy and genuine care."))
-            
-            prompt = f"""You are a professional emotional wellness counselor and empathetic AI companion named emoti.
+    # Build emotion-specific guidance for the AI
+    emotion_guidance = {
+        "joy": "The user is happy — genuinely celebrate with them, appreciate their positivity, and encourage them to keep embracing what brings them joy. Be warm and uplifting.",
+        "happy": "The user is feeling good — share in their happiness, compliment their positive outlook, and motivate them to spread this energy. Be enthusiastic and supportive.",
+        "sadness": "The user is sad — offer sincere consolation, validate that their pain is real and matters, remind them that tough times are temporary, and gently suggest healthy coping strategies. Be compassionate and tender.",
+        "sad": "The user is going through a hard time — listen deeply, acknowledge their struggle without minimizing it, offer words of comfort and hope, and remind them they are not alone. Be caring and patient.",
+        "anger": "The user is frustrated or angry — first validate their feelings without judgment, help them see the situation with perspective, and suggest constructive ways to channel their energy. Be calm and understanding.",
+        "angry": "The user is upset — acknowledge that their frustration is valid, help them process what happened, and guide them toward a solution or peace of mind. Be respectful and grounding.",
+        "fear": "The user is anxious or afraid — reassure them with genuine empathy, help them break down what's scaring them into manageable pieces, and remind them of their strength. Be calming and encouraging.",
+        "afraid": "The user is worried — provide comfort and reassurance, normalize their feelings, offer practical perspective, and remind them that courage isn't the absence of fear. Be supportive and gentle.",
+        "disgust": "The user is bothered by something — acknowledge their strong reaction, help them understand what's triggering it, and offer a constructive way to think about or handle the situation. Be respectful.",
+        "surprise": "The user is surprised — share in their amazement, help them process the unexpected, and encourage them to see opportunities in the surprise. Be excited and curious with them.",
+        "neutral": "The user seems reflective — engage meaningfully with their actual words, offer thoughtful perspective, and ask a question that helps them explore their thoughts deeper. Be attentive and insightful.",
+        "love": "The user is feeling love or affection — appreciate the beauty in their emotions, encourage them to cherish and express their feelings, and be warm and heartfelt.",
+        "confusion": "The user seems confused — help clarify their thoughts with patience, break things down simply, and guide them toward clarity. Be patient and supportive.",
+        "approval": "The user is expressing approval — affirm their positive judgment, appreciate their perspective, and encourage them to continue making good assessments."
+    }
+    
+    guidance = emotion_guidance.get(emotion_label_lower, emotion_guidance.get("neutral", "Respond with empathy and genuine care."))
+    
+    prompt = f"""You are a professional emotional wellness counselor and empathetic AI companion named emoti.
 
 User's Message: "{user_message}"
 Detected Emotion: {emotion_label} (Confidence: {emotion_score*100:.1f}%)
@@ -437,12 +888,31 @@ Response Guidelines:
 9. NEVER use phrases like "I detect sadness" or "Your emotion score is..." — respond naturally as a human would
 10. Be genuine, specific, and make the person feel truly heard and valued{language_instruction}"""
 
-            chat_completion = client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[
-                    {"role": "system", "content": "You are emoti — a professional, emotionally intelligent AI wellness companion. You combine the warmth of a caring friend with the insight of a professional counselor. You console those in pain, celebrate those in joy, motivate those who are struggling, and guide those who are lost. You speak with genuine empathy, professionalism, and heart. You never give generic responses — every reply is tailored to what the person actually said and what they're truly feeling. You help people feel heard, valued, and empowered. You are fluent in multiple languages and always respond in the user's language."},
-                    {"role": "user", "content": prompt}
-                ],
+    return [
+        {"role": "system", "content": "You are emoti — a professional, emotionally intelligent AI wellness companion. You combine the warmth of a caring friend with the insight of a professional counselor. You console those in pain, celebrate those in joy, motivate those who are struggling, and guide those who are lost. You speak with genuine empathy, professionalism, and heart. You never give generic responses — every reply is tailored to what the person actually said and what they're truly feeling. You help people feel heard, valued, and empowered. You are fluent in multiple languages and always respond in the user's language."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def generate_emotion_aware_response(user_message, emotion_label, emotion_score, user_language='en'):
+    """
+    Generate an AI response that is empathetic and tailored to the user's detected emotion.
+    Supports multilingual responses using Groq API.
+    
+    Args:
+        user_message (str): The user's message
+        emotion_label (str): Detected emotion
+        emotion_score (float): Emotion confidence score
+        user_language (str): User's language code (default: 'en')
+        
+    Returns:
+        str: AI-generated response in user's language
+    """
+    if groq_gateway.is_available():
+        try:
+            chat_completion = groq_gateway.chat_completion(
+                "chat_reply",
+                messages=build_emotion_aware_messages(user_message, emotion_label, emotion_score, user_language),
                 temperature=0.75,
                 max_tokens=400,
                 top_p=0.9
@@ -455,6 +925,66 @@ Response Guidelines:
         except Exception as e:
             logging.warning(f"Groq API error, using fallback: {str(e)}")
     
+    return get_fallback_emotion_response(emotion_label, user_language)
+
+
+def stream_emotion_aware_response(user_message, emotion_label, emotion_score, user_language='en'):
+    """
+    Stream an emotion-aware reply as it is generated.
+
+    Yields Groq tokens as they arrive. If Groq is unavailable or fails
+    before the first token, the predefined fallback reply is yielded
+    in one piece instead.
+
+    Args:
+        user_message (str): The user's message
+        emotion_label (str): Detected emotion
+        emotion_score (float): Emotion confidence score
+        user_language (str): User's language code (default: 'en')
+
+    Yields:
+        str: Pieces of the reply text
+
+    Raises:
+        GroqStreamInterrupted: If Groq fails after part of the reply was yielded
+    """
+    sent_any = False
+    if groq_gateway.is_available():
+        try:
+            with closing(groq_gateway.stream_chat_completion(
+                "chat_reply_stream",
+                messages=build_emotion_aware_messages(user_message, emotion_label, emotion_score, user_language),
+                temperature=0.75,
+                max_tokens=400,
+                top_p=0.9
+            )) as stream:
+                for delta in stream:
+                    sent_any = True
+                    yield delta
+            if sent_any:
+                logging.info(f"Streamed AI response using Groq for emotion: {emotion_label} in language: {user_language}")
+                return
+        except Exception as e:
+            if sent_any:
+                # Part of the reply already reached the client; stop rather than mix in a canned reply
+                logging.warning(f"Groq stream interrupted: {str(e)}")
+                raise GroqStreamInterrupted(str(e)) from e
+            logging.warning(f"Groq API error, using fallback: {str(e)}")
+
+    yield get_fallback_emotion_response(emotion_label, user_language)
+
+
+def get_fallback_emotion_response(emotion_label, user_language='en'):
+    """
+    Predefined reply used when Groq is unavailable.
+
+    Args:
+        emotion_label (str): Detected emotion
+        user_language (str): User's language code (default: 'en')
+
+    Returns:
+        str: Multilingual or English fallback reply
+    """
     # Use multilingual predefined responses
     try:
         multilingual_response = get_multilingual_emotion_response(emotion_label, user_language)
@@ -547,14 +1077,12 @@ def generate_face_emotion_response(face_emotion, text_emotion=None, user_message
     Returns:
         str: AI-generated response tailored to the emotional state
     """
-    client = get_groq_client()
-    
     # Build emotional context
     emotion_context = f"The user is displaying {face_emotion} facial expression"
     if text_emotion and text_emotion.lower() != "neutral":
         emotion_context += f" combined with {text_emotion} sentiment in their message"
     
-    if client:
+    if groq_gateway.is_available():
         try:
             # Build the prompt based on available information
             if user_message:
@@ -589,8 +1117,8 @@ The user is sharing their facial emotion with us. Respond with:
 
 Feel like you genuinely care about what they're experiencing."""
 
-            chat_completion = client.chat.completions.create(
-                model="llama-3.1-8b-instant",
+            chat_completion = groq_gateway.chat_completion(
+                "face_reply",
                 messages=[
                     {"role": "system", "content": "You are an exceptionally perceptive and empathetic AI. You understand facial expressions and emotions deeply. You respond with genuine warmth, real understanding, and helpful perspective. You sound like a best friend who truly gets what people are going through. You're conversational, kind, and insightful."},
                     {"role": "user", "content": prompt}
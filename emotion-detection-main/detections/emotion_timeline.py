@@ -0,0 +1,185 @@
+"""
+Streaming aggregation of per-frame video emotions
+Keeps running counts and float32 sums of the 7-way emotion probabilities,
+a run-length-encoded segment timeline and an optional per-second series,
+so memory and response size no longer grow with every analyzed frame.
+"""
+
+import os
+import numpy as np
+
+# DeepFace emotion labels, in the order of its classifier output
+EMOTION_LABELS = ('angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral')
+LABEL_INDEX = {label: index for index, label in enumerate(EMOTION_LABELS)}
+
+# Return a per-second series of the dominant emotion (0 = segments only)
+VIDEO_TIMELINE_SERIES = os.getenv('VIDEO_TIMELINE_SERIES', '1') != '0'
+
+# Seconds of video per point of the downsampled series
+VIDEO_SERIES_INTERVAL = float(os.getenv('VIDEO_SERIES_INTERVAL', '1'))
+
+# Most segments kept in the timeline; later changes are only counted
+VIDEO_TIMELINE_MAX_SEGMENTS = int(os.getenv('VIDEO_TIMELINE_MAX_SEGMENTS', '1000'))
+
+
+def scores_to_vector(scores):
+    """Convert a DeepFace emotion dict (percentages) to a float32 probability vector"""
+    vector = np.zeros(len(EMOTION_LABELS), dtype=np.float32)
+    for label, value in (scores or {}).items():
+        index = LABEL_INDEX.get(label)
+        if index is not None:
+            vector[index] = float(value) / 100
+    return vector
+
+
+class EmotionAggregator:
+    """
+    Online summary of the emotions detected in a video.
+
+    add() is called once per analyzed (or reused) frame in frame order.
+    Aggregators of consecutive frame ranges are combined with extend(),
+    and to_response() builds the response fields.
+    """
+
+    def __init__(self, series=VIDEO_TIMELINE_SERIES, series_interval=VIDEO_SERIES_INTERVAL,
+                 max_segments=VIDEO_TIMELINE_MAX_SEGMENTS):
+        size = len(EMOTION_LABELS)
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.confidence_sums = np.zeros(size, dtype=np.float32)
+        self.probability_sums = np.zeros(size, dtype=np.float32)
+        self.frames = 0
+        self.reused = 0
+
+        self.max_segments = max(1, max_segments)
+        self.segments = []  # [label_index, start, end, confidence_sum, frames]
+        self.segments_truncated = False
+
+        self.series_interval = series_interval if series else None
+        self.series = []  # [bucket, probability_sum, frames]
+
+    def add(self, emotion, confidence, timestamp, scores=None, reused=False):
+        """
+        Add one frame's detection
+
+        Args:
+            emotion (str): Dominant emotion label
+            confidence (float): Confidence of the dominant emotion (0-1)
+            timestamp (float): Position in the video in seconds
+            scores (dict): Full DeepFace emotion scores in percent (optional)
+            reused (bool): The detection was reused from an earlier frame
+        """
+        index = LABEL_INDEX.get(emotion)
+        if index is None:
+            return
+        vector = scores_to_vector(scores) if scores else None
+        if vector is None:
+            vector = np.zeros(len(EMOTION_LABELS), dtype=np.float32)
+            vector[index] = confidence
+
+        self.frames += 1
+        self.reused += int(reused)
+        self.counts[index] += 1
+        self.confidence_sums[index] += confidence
+        self.probability_sums += vector
+
+        self._add_to_segments([index, timestamp, timestamp, confidence, 1])
+        if self.series_interval:
+            self._add_to_series([int(timestamp // self.series_interval), vector, 1])
+
+    def _add_to_segments(self, segment):
+        last = self.segments[-1] if self.segments else None
+        if last is not None and last[0] == segment[0]:
+            last[2] = segment[2]
+            last[3] += segment[3]
+            last[4] += segment[4]
+        elif len(self.segments) < self.max_segments:
+            self.segments.append(segment)
+        else:
+            self.segments_truncated = True
+
+    def _add_to_series(self, point):
+        last = self.series[-1] if self.series else None
+        if last is not None and last[0] == point[0]:
+            last[1] = last[1] + point[1]
+            last[2] += point[2]
+        else:
+            self.series.append([point[0], point[1].copy(), point[2]])
+
+    def extend(self, other):
+        """Append the aggregate of the frame range that directly follows this one"""
+        self.counts += other.counts
+        self.confidence_sums += other.confidence_sums
+        self.probability_sums += other.probability_sums
+        self.frames += other.frames
+        self.reused += other.reused
+
+        for segment in other.segments:
+            self._add_to_segments(list(segment))
+        self.segments_truncated = self.segments_truncated or other.segments_truncated
+        if self.series_interval:
+            for point in other.series:
+                self._add_to_series(point)
+
+    @property
+    def dominant_emotion(self):
+        return EMOTION_LABELS[int(self.counts.argmax())] if self.frames else None
+
+    def segment_timeline(self):
+        """Return the run-length-encoded timeline: one entry per run of the same emotion"""
+        return [
+            {
+                "emotion": EMOTION_LABELS[index],
+                "start": round(float(start), 2),
+                "end": round(float(end), 2),
+                "confidence": round(float(confidence_sum) / frames, 4),
+                "frames": int(frames),
+            }
+            for index, start, end, confidence_sum, frames in self.segments
+        ]
+
+    def downsampled_series(self):
+        """Return the dominant emotion per series interval, from the mean probabilities of its frames"""
+        series = []
+        for bucket, probability_sum, frames in self.series:
+            mean = probability_sum / frames
+            index = int(mean.argmax())
+            series.append({
+                "timestamp": round(bucket * self.series_interval, 2),
+                "emotion": EMOTION_LABELS[index],
+                "confidence": round(float(mean[index]), 4),
+                "frames": int(frames),
+            })
+        return series
+
+    def to_response(self):
+        """Return the aggregate response fields"""
+        present = [i for i in range(len(EMOTION_LABELS)) if self.counts[i]]
+        segments = self.segment_timeline()
+        series = self.downsampled_series() if self.series_interval else None
+        dominant = self.dominant_emotion
+        dominant_index = LABEL_INDEX[dominant]
+
+        response = {
+            "dominant_emotion": dominant,
+            "dominant_emotion_confidence": round(float(self.confidence_sums[dominant_index] / self.counts[dominant_index]), 4),
+            "total_emotions_detected": int(self.frames),
+            "emotion_distribution": {EMOTION_LABELS[i]: int(self.counts[i]) for i in present},
+            "emotion_percentages": {
+                EMOTION_LABELS[i]: round(float(self.counts[i]) / self.frames * 100, 1) for i in present
+            },
+            "emotion_confidence": {
+                EMOTION_LABELS[i]: round(float(self.confidence_sums[i] / self.counts[i]), 4) for i in present
+            },
+            "mean_emotion_scores": {
+                label: round(float(value) / self.frames * 100, 2)
+                for label, value in zip(EMOTION_LABELS, self.probability_sums)
+            },
+            "timeline_segments": segments,
+            "timeline_segments_truncated": self.segments_truncated,
+        }
+        if series is not None:
+            response["emotion_series"] = series
+        # "emotions" keeps its list-of-{emotion, confidence} shape for existing clients
+        response["emotions"] = series if series is not None else segments
+        response["emotions_timeline"] = response["emotions"][:50]
+        return response
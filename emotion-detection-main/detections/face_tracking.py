@@ -0,0 +1,166 @@
+"""
+Face tracking between full detections
+Runs DeepFace face detection every FACE_REDETECT_INTERVAL frames and follows
+the face in between by template matching around the previous box, so only
+the emotion classifier runs on the tracked crop (detector_backend='skip').
+Falls back to full detection whenever the track is lost.
+"""
+
+import os
+import sys
+
+import cv2
+
+# Setup local DeepFace path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from deepface_config import setup_deepface_path
+setup_deepface_path()
+
+from deepface import DeepFace
+
+# Track faces between detections (0 = run full detection on every frame)
+FACE_TRACKING = os.getenv('FACE_TRACKING', '1') != '0'
+
+# Frames between full face detections while a face is being tracked
+FACE_REDETECT_INTERVAL = int(os.getenv('FACE_REDETECT_INTERVAL', '10'))
+
+# Search area around the previous box, as a fraction of the box size on each side
+FACE_TRACK_SEARCH_MARGIN = float(os.getenv('FACE_TRACK_SEARCH_MARGIN', '0.5'))
+
+# Lowest normalized template-match score that still counts as the same face
+FACE_TRACK_MIN_SCORE = float(os.getenv('FACE_TRACK_MIN_SCORE', '0.6'))
+
+# Padding added around the tracked box before the crop is classified
+CROP_PADDING = 0.1
+
+
+def _to_gray(image):
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+
+def _clip_box(x, y, w, h, width, height):
+    x0, y0 = max(0, int(x)), max(0, int(y))
+    x1, y1 = min(width, int(x + w)), min(height, int(y + h))
+    return x0, y0, max(0, x1 - x0), max(0, y1 - y0)
+
+
+class FaceTracker:
+    """
+    Follows one face across the frames of a video or live stream.
+
+    analyze(frame) returns the first DeepFace result for the frame (with
+    "region" in frame coordinates and "tracked" telling whether face
+    detection was skipped), or None when no result was produced.
+    """
+
+    def __init__(self, redetect_interval=FACE_REDETECT_INTERVAL,
+                 search_margin=FACE_TRACK_SEARCH_MARGIN, min_score=FACE_TRACK_MIN_SCORE):
+        self.redetect_interval = max(1, redetect_interval)
+        self.search_margin = search_margin
+        self.min_score = min_score
+        self.reset()
+
+        self.full_detections = 0
+        self.tracked_frames = 0
+        self.lost_tracks = 0
+
+    def reset(self):
+        """Forget the current face so the next frame is fully detected"""
+        self.box = None
+        self.template = None
+        self.frames_since_detection = 0
+
+    def analyze(self, frame):
+        """
+        Classify the emotion of the face in frame
+
+        Args:
+            frame (numpy.ndarray): Image in the layout the caller passes to DeepFace
+
+        Returns:
+            dict: DeepFace result for the face, or None
+        """
+        if self.box is not None and self.frames_since_detection < self.redetect_interval:
+            result = self._analyze_tracked(frame)
+            if result is not None:
+                return result
+            self.lost_tracks += 1
+            self.reset()
+        return self._analyze_full(frame)
+
+    def _analyze_full(self, frame):
+        self.full_detections += 1
+        results = DeepFace.analyze(frame, actions=['emotion'], enforce_detection=False, silent=True)
+        if not results or not isinstance(results, list):
+            self.reset()
+            return None
+
+        result = results[0]
+        height, width = frame.shape[:2]
+        region = result.get("region") or {}
+        x, y, w, h = _clip_box(region.get("x", 0), region.get("y", 0), region.get("w", 0), region.get("h", 0), width, height)
+
+        # With enforce_detection=False a frame without a face comes back as one whole-frame region
+        if w < 2 or h < 2 or (w >= width and h >= height):
+            self.reset()
+        else:
+            self.box = (x, y, w, h)
+            self.template = _to_gray(frame[y:y + h, x:x + w]).copy()
+            self.frames_since_detection = 0
+
+        result["tracked"] = False
+        return result
+
+    def _track(self, frame):
+        """Return the face box in frame found by template matching, or None if the track is lost"""
+        height, width = frame.shape[:2]
+        x, y, w, h = self.box
+        dx, dy = int(w * self.search_margin), int(h * self.search_margin)
+        sx, sy, sw, sh = _clip_box(x - dx, y - dy, w + 2 * dx, h + 2 * dy, width, height)
+        if sw < w or sh < h:
+            return None
+
+        scores = cv2.matchTemplate(_to_gray(frame[sy:sy + sh, sx:sx + sw]), self.template, cv2.TM_CCOEFF_NORMED)
+        _, best_score, _, best_location = cv2.minMaxLoc(scores)
+        if best_score < self.min_score:
+            return None
+        return sx + best_location[0], sy + best_location[1], w, h
+
+    def _analyze_tracked(self, frame):
+        box = self._track(frame)
+        if box is None:
+            return None
+
+        height, width = frame.shape[:2]
+        x, y, w, h = box
+        pad_x, pad_y = int(w * CROP_PADDING), int(h * CROP_PADDING)
+        cx, cy, cw, ch = _clip_box(x - pad_x, y - pad_y, w + 2 * pad_x, h + 2 * pad_y, width, height)
+
+        results = DeepFace.analyze(
+            frame[cy:cy + ch, cx:cx + cw],
+            actions=['emotion'],
+            detector_backend='skip',
+            enforce_detection=False,
+            silent=True
+        )
+        if not results or not isinstance(results, list):
+            return None
+
+        self.box = box
+        # Follow gradual changes in pose and lighting
+        self.template = _to_gray(frame[y:y + h, x:x + w]).copy()
+        self.frames_since_detection += 1
+        self.tracked_frames += 1
+
+        result = results[0]
+        result["region"] = {"x": x, "y": y, "w": w, "h": h}
+        result["tracked"] = True
+        return result
+
+    def stats(self):
+        """Return detection and tracking counters"""
+        return {
+            "full_detections": self.full_detections,
+            "tracked_frames": self.tracked_frames,
+            "lost_tracks": self.lost_tracks,
+        }
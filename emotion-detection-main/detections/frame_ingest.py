@@ -0,0 +1,226 @@
+"""
+Image ingest helpers
+Read images from raw binary bodies, multipart uploads or base64 JSON and
+decode them straight into BGR arrays with cv2.imdecode, using reduced-size
+JPEG decoding for frames larger than the face detector's working resolution.
+Payload size and decode time are recorded per transport.
+"""
+
+import os
+import time
+import base64
+import struct
+import threading
+
+import cv2
+import numpy as np
+
+# Longest image side the face detector needs; larger JPEGs are decoded at 1/2, 1/4 or 1/8 scale
+FRAME_MAX_SIDE = int(os.getenv('FRAME_MAX_SIDE', '960'))
+
+# Largest encoded image accepted from a raw body or upload, in bytes
+FRAME_MAX_UPLOAD_BYTES = int(os.getenv('FRAME_MAX_UPLOAD_BYTES', str(20 * 1024 * 1024)))
+
+# Characters searched for the comma that ends a data URL header
+DATA_URL_HEADER_LIMIT = 128
+
+# Request bodies sent as the image itself rather than multipart or JSON
+RAW_IMAGE_MIMETYPES = ('image/jpeg', 'image/png', 'image/webp', 'application/octet-stream')
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+TRANSPORT_RAW = 'raw'
+TRANSPORT_MULTIPART = 'multipart'
+TRANSPORT_BASE64 = 'base64'
+TRANSPORT_WEBSOCKET = 'websocket'
+
+REDUCED_JPEG_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# JPEG start-of-frame markers (baseline, progressive, ...) that carry the image size
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def read_jpeg_size(data):
+    """Return (width, height) from a JPEG header without decoding it, or None"""
+    if data[:2] != b'\xff\xd8':
+        return None
+    offset = 2
+    while offset + 9 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:  # Fill byte
+            offset += 1
+            continue
+        length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+            return width, height
+        offset += 2 + length
+    return None
+
+
+def decode_image(data, max_side=FRAME_MAX_SIDE):
+    """
+    Decode JPEG/PNG bytes into a BGR array
+
+    JPEGs whose longest side is at least twice max_side are decoded at the
+    largest 1/2, 1/4 or 1/8 scale that keeps them at or above max_side, so
+    the full-size image is never materialized.
+
+    Args:
+        data (bytes): Encoded image
+        max_side (int): Detector working resolution (0 decodes at full size)
+
+    Returns:
+        tuple: (image, scale) where scale maps decoded pixel coordinates back to the original
+
+    Raises:
+        ValueError: If the bytes are not a decodable image
+    """
+    flag, scale = cv2.IMREAD_COLOR, 1
+    size = read_jpeg_size(data) if max_side else None
+    if size:
+        longest = max(size)
+        for factor, reduced_flag in REDUCED_JPEG_FLAGS:
+            if longest >= max_side * factor:
+                flag, scale = reduced_flag, factor
+                break
+
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+    if image is None:
+        raise ValueError("Could not decode image data")
+    return image, scale
+
+
+def decode_base64_image(value, max_side=FRAME_MAX_SIDE):
+    """
+    Decode a base64 string or data URL ("data:image/jpeg;base64,...") into a BGR array
+
+    Only the header is searched for the comma, so the payload is not scanned twice.
+
+    Returns:
+        tuple: (image, scale) as returned by decode_image
+    """
+    comma = value.find(',', 0, DATA_URL_HEADER_LIMIT)
+    if comma != -1:
+        value = value[comma + 1:]
+    try:
+        data = base64.b64decode(value)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid base64 image data: {e}")
+    return decode_image(data, max_side)
+
+
+def encode_jpeg_data_url(image, quality=90):
+    """Encode a BGR array as a JPEG data URL (for responses that echo the image back)"""
+    ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Could not encode image")
+    return f"data:image/jpeg;base64,{base64.b64encode(encoded.tobytes()).decode('ascii')}"
+
+
+class IngestMetrics:
+    """Per-transport counters of received image bytes and decode time"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def record(self, transport, payload_bytes, decode_seconds):
+        with self._lock:
+            entry = self._data.setdefault(transport, {'images': 0, 'bytes': 0, 'decode_seconds': 0.0, 'max_decode_seconds': 0.0})
+            entry['images'] += 1
+            entry['bytes'] += payload_bytes
+            entry['decode_seconds'] += decode_seconds
+            entry['max_decode_seconds'] = max(entry['max_decode_seconds'], decode_seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                transport: {
+                    'images': entry['images'],
+                    'average_bytes': int(entry['bytes'] / entry['images']),
+                    'average_decode_ms': round(entry['decode_seconds'] * 1000 / entry['images'], 2),
+                    'max_decode_ms': round(entry['max_decode_seconds'] * 1000, 2),
+                }
+                for transport, entry in self._data.items()
+            }
+
+
+ingest_metrics = IngestMetrics()
+
+
+def read_stream(stream, limit=FRAME_MAX_UPLOAD_BYTES):
+    """
+    Read a request or upload stream in chunks
+
+    Raises:
+        ValueError: If the stream holds more than limit bytes
+    """
+    buffer = bytearray()
+    while True:
+        chunk = stream.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer.extend(chunk)
+        if len(buffer) > limit:
+            raise ValueError(f"Image is larger than {limit} bytes")
+    return bytes(buffer)
+
+
+def ingest_bytes(data, transport, max_side=FRAME_MAX_SIDE):
+    """decode_image() that records the payload size and decode time under transport"""
+    started = time.perf_counter()
+    result = decode_image(data, max_side)
+    ingest_metrics.record(transport, len(data), time.perf_counter() - started)
+    return result
+
+
+def ingest_base64(value, max_side=FRAME_MAX_SIDE):
+    """decode_base64_image() that records the payload size and decode time (base64 included)"""
+    started = time.perf_counter()
+    result = decode_base64_image(value, max_side)
+    ingest_metrics.record(TRANSPORT_BASE64, len(value), time.perf_counter() - started)
+    return result
+
+
+def read_request_image(req, fields=("image", "file"), max_side=FRAME_MAX_SIDE):
+    """
+    Decode the image carried by a Flask request
+
+    Accepts, in order: a raw image body (Content-Type image/jpeg, image/png,
+    image/webp or application/octet-stream), a multipart upload in one of
+    fields, or "image_base64" in a JSON body (kept for older clients).
+
+    Returns:
+        tuple: (image, scale, transport), or (None, 1, None) if the request has no image
+
+    Raises:
+        ValueError: If the image is too large or cannot be decoded
+    """
+    if req.mimetype in RAW_IMAGE_MIMETYPES:
+        data = read_stream(req.stream)
+        if not data:
+            return None, 1, None
+        image, scale = ingest_bytes(data, TRANSPORT_RAW, max_side)
+        return image, scale, TRANSPORT_RAW
+
+    if req.mimetype == 'multipart/form-data':
+        for field in fields:
+            upload = req.files.get(field)
+            if upload:
+                image, scale = ingest_bytes(read_stream(upload.stream), TRANSPORT_MULTIPART, max_side)
+                return image, scale, TRANSPORT_MULTIPART
+
+    if req.is_json:
+        value = (req.get_json(silent=True) or {}).get("image_base64")
+        if value:
+            image, scale = ingest_base64(value, max_side)
+            return image, scale, TRANSPORT_BASE64
+
+    return None, 1, None
@@ -0,0 +1,24 @@
+"""
+Frame motion checks
+Small grayscale thumbnails of frames and their mean difference, used by
+video sampling and live sessions to skip inference on frames that barely
+changed.
+"""
+
+import cv2
+
+# Size of the grayscale thumbnail frames are compared on
+MOTION_THUMBNAIL_SIZE = (64, 36)
+
+
+def frame_signature(frame):
+    """Return a small grayscale thumbnail of a frame for cheap motion checks"""
+    small = cv2.resize(frame, MOTION_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return small
+
+
+def frame_difference(signature, reference):
+    """Mean absolute difference (0-255) between two frame signatures"""
+    return float(cv2.absdiff(signature, reference).mean())
@@ -1,11 +1,6 @@
-import base64
-import numpy as np
 import os
 import sys
-from io import BytesIO
-from PIL import Image
 from flask import request
-from groq import Groq
 import logging
 from dotenv import load_dotenv
 
@@ -15,34 +10,31 @@ from deepface_config import setup_deepface_path, get_deepface_config
 setup_deepface_path()
 
 from deepface import DeepFace
+from model_registry import register_model
+from groq_gateway import groq_gateway
+from detections.frame_ingest import decode_image, decode_base64_image, encode_jpeg_data_url
 
 # Load environment variables
 load_dotenv()
 
-# Global Groq client
-groq_client = None
+
+def load_face_emotion_model():
+    """Build DeepFace's facial emotion model so the first analysis does not pay for it"""
+    try:
+        return DeepFace.build_model(model_name="Emotion", task="facial_attribute")
+    except TypeError:
+        # Older DeepFace releases take only the model name
+        return DeepFace.build_model("Emotion")
+
+
+register_model("face_emotion", load_face_emotion_model)
 
 # Emotion confidence threshold - if below this, mark as uncertain
 CONFIDENCE_THRESHOLD = 0.35
 
-def get_groq_client():
-    global groq_client
-    if groq_client:
-        return groq_client
-    
-    api_key = os.getenv('GROQ_API_KEY')
-    if api_key:
-        try:
-            groq_client = Groq(api_key=api_key)
-            return groq_client
-        except Exception as e:
-            logging.error(f"Failed to initialize Groq client: {e}")
-    return None
-
 def generate_face_analysis(emotion, confidence_score, emotion_dict=None, is_ambiguous=False):
     """Generate AI-powered insights for detected face emotion using Groq"""
-    client = get_groq_client()
-    if not client:
+    if not groq_gateway.is_available():
         return None
     
     try:
@@ -71,8 +63,8 @@ Provide a detailed analysis including:
 
 Keep the response concise but insightful (2-3 paragraphs)."""
 
-        chat_completion = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        chat_completion = groq_gateway.chat_completion(
+            "face_analysis",
             messages=[
                 {"role": "system", "content": "You are an expert in emotional psychology and facial expression analysis. Provide insightful, empathetic analysis of detected emotions. If the detection shows ambiguity, acknowledge it."},
                 {"role": "user", "content": prompt}
@@ -86,22 +78,25 @@ Keep the response concise but insightful (2-3 paragraphs)."""
         logging.error(f"Error generating face analysis: {e}")
         return None
 
-def process_image(file=None):
+def process_image(file=None, echo_image=False, image=None):
+    """
+    Detect face emotions in an image: an already decoded BGR array (image),
+    an uploaded file or path (file), or the JSON image_base64 of the request.
+    The image is only re-encoded and sent back as image_base64 when echo_image is True.
+    """
     try:
-        if file:  # If file is uploaded
-            image = Image.open(file)
+        # Decode straight to the BGR array DeepFace expects
+        if image is not None:
+            image_np = image
+        elif isinstance(file, str):  # Path on disk
+            with open(file, "rb") as f:
+                image_np, _ = decode_image(f.read())
+        elif file:  # If file is uploaded
+            image_np, _ = decode_image(file.read())
         else:  # If Base64 image is sent (from Camera)
-            data = request.json["image_base64"]
-            image_data = base64.b64decode(data.split(",")[1])
-            image = Image.open(BytesIO(image_data))
-
-        # Convert image to NumPy array for DeepFace
-        image_np = np.array(image)
+            image_np, _ = decode_base64_image(request.json["image_base64"])
 
-        # Encode image properly for frontend
-        buffered = BytesIO()
-        image.save(buffered, format="JPEG")
-        img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
+        echo = {"image_base64": encode_jpeg_data_url(image_np)} if echo_image else {}
 
         # Perform Emotion Detection with better model parameters
         # Using enforce_detection=False to handle various lighting/angles
@@ -122,9 +117,9 @@ def process_image(file=None):
             return {
                 "error": "No faces detected",
                 "message": "No faces detected in the image. Please try with a clearer photo showing a face.",
-                "image_base64": f"data:image/jpeg;base64,{img_str}",
                 "faces_detected": 0,
-                "success": False
+                "success": False,
+                **echo
             }
 
         # Process detected faces
@@ -176,7 +171,6 @@ def process_image(file=None):
             "emotion": primary_face["emotion"],
             "confidence": primary_face["confidence"],
             "confidence_percentage": primary_face["confidence_percentage"],
-            "image_base64": f"data:image/jpeg;base64,{img_str}",
             "faces": faces_data,
             "faces_detected": len(faces_data),
             "emotion_scores": primary_face["emotion_scores"],
@@ -184,6 +178,7 @@ def process_image(file=None):
             "is_ambiguous": primary_face["is_ambiguous"],
             "ambiguity_note": primary_face["ambiguity_note"]
         }
+        response.update(echo)
 
         # Generate AI-powered analysis
         analysis = generate_face_analysis(
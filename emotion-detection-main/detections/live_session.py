@@ -0,0 +1,331 @@
+"""
+Live camera sessions
+Per-stream state for real-time emotion detection (face track, smoothed
+emotion distribution, last result), shared by the /detect_live_emotion
+route and the /ws/live-emotion socket
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from detections.face_tracking import FaceTracker, FACE_TRACKING, DeepFace
+from detections.emotion_timeline import EMOTION_LABELS, scores_to_vector
+from detections.frame_motion import frame_signature, frame_difference
+
+# Live sessions kept at once, and how long an idle one is kept
+LIVE_MAX_SESSIONS = int(os.getenv('LIVE_MAX_SESSIONS', '256'))
+LIVE_SESSION_IDLE_SECONDS = int(os.getenv('LIVE_SESSION_IDLE_SECONDS', '120'))
+
+# Longest a frame waits behind the session's in-flight frame before it is dropped as stale
+LIVE_MAX_WAIT_MS = int(os.getenv('LIVE_MAX_WAIT_MS', '1000'))
+
+# Lower bound of the capture interval suggested to clients
+LIVE_MIN_INTERVAL_MS = int(os.getenv('LIVE_MIN_INTERVAL_MS', '100'))
+
+# Weight of the newest frame in the moving average of the emotion distribution (1 = no smoothing)
+LIVE_EMA_ALPHA = float(os.getenv('LIVE_EMA_ALPHA', '0.4'))
+
+# Hysteresis: another emotion must lead the shown one by this much (0-1)
+# for LIVE_SWITCH_FRAMES analyzed frames in a row before the label changes
+LIVE_SWITCH_MARGIN = float(os.getenv('LIVE_SWITCH_MARGIN', '0.1'))
+LIVE_SWITCH_FRAMES = int(os.getenv('LIVE_SWITCH_FRAMES', '2'))
+
+# Inference is skipped when the label held for LIVE_STABLE_FRAMES analyzed frames and the
+# frame differs from the last analyzed one by less than LIVE_SKIP_THRESHOLD (mean grayscale
+# difference, 0-255); at most LIVE_MAX_SKIPS frames in a row are skipped (0 = never skip)
+LIVE_STABLE_FRAMES = int(os.getenv('LIVE_STABLE_FRAMES', '3'))
+LIVE_SKIP_THRESHOLD = float(os.getenv('LIVE_SKIP_THRESHOLD', '3'))
+LIVE_MAX_SKIPS = int(os.getenv('LIVE_MAX_SKIPS', '5'))
+
+# Weight of the newest inference time in the per-session latency average
+LATENCY_SMOOTHING = 0.3
+
+# Headroom over the average inference time in the suggested capture interval
+INTERVAL_HEADROOM = 1.25
+
+
+def _scores_percent(vector):
+    return {label: round(float(value) * 100, 2) for label, value in zip(EMOTION_LABELS, vector)}
+
+
+def build_live_payload(result, scale=1):
+    """Convert a DeepFace result into the JSON payload sent to live clients (region in original frame pixels)"""
+    # DeepFace returns numpy floats, convert to native Python float
+    emotion_dict = {k: float(v) for k, v in result['emotion'].items()}
+    detected_emotion = result['dominant_emotion']
+    confidence = float(emotion_dict.get(detected_emotion, 0)) / 100
+
+    # Extract face region for bounding box
+    region = result.get('region', {})
+    face_box = {
+        'x': int(region.get('x', 0) * scale),
+        'y': int(region.get('y', 0) * scale),
+        'w': int(region.get('w', 0) * scale),
+        'h': int(region.get('h', 0) * scale)
+    }
+
+    return {
+        "emotion": detected_emotion,
+        "confidence": round(confidence, 4),
+        "confidence_percentage": round(confidence * 100, 2),
+        "emotion_scores": emotion_dict,
+        "region": face_box,
+        "tracked": bool(result.get('tracked', False)),
+        "success": True
+    }
+
+
+class LiveSession:
+    """
+    State of one camera stream.
+
+    Results are smoothed per session: an exponential moving average of the
+    7-way emotion distribution, with hysteresis on the reported label. While
+    the label is stable and the picture barely changes, the last result is
+    returned without running inference (skipped_inference=True).
+
+    Frames of a session are analyzed one at a time. Request and socket
+    handlers go through analyze_latest(), which admits at most one in-flight
+    and one waiting frame: a newer frame replaces the waiting one, so results
+    never lag behind a backlog of old frames (a socket and HTTP requests of
+    the same stream may overlap while a client falls back from one to the other).
+    """
+
+    def __init__(self, key=None):
+        self.key = key
+        self.tracker = FaceTracker() if FACE_TRACKING else None
+        self._admission = threading.Condition()
+        self._busy = False
+        self._waiting = None
+        self._tickets = 0
+        self.latency_ema = None
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.last_region = None
+        self.last_result = None
+        self.frames = 0
+        self.faces = 0
+        self.dropped = 0
+        self.skipped = 0
+        self._reset_smoothing()
+
+    def _reset_smoothing(self):
+        self.smoothed = None
+        self.label = None
+        self._pending_label = None
+        self._pending_frames = 0
+        self.stable_frames = 0
+        self.consecutive_skips = 0
+        self.reference = None
+
+    def reset(self):
+        """Drop the face track and last result (e.g. after the camera was switched)"""
+        if self.tracker is not None:
+            self.tracker.reset()
+        self.last_region = None
+        self.last_result = None
+        self._reset_smoothing()
+
+    def analyze(self, image, scale=1):
+        """
+        Detect the emotion in one frame of the stream
+
+        Args:
+            image (numpy.ndarray): BGR frame
+            scale (int): Factor the frame was downscaled by when decoded (regions are scaled back)
+
+        Returns:
+            dict: Payload for the client (success=False when no face was found)
+        """
+        self.last_used = time.time()
+        self.frames += 1
+
+        signature = frame_signature(image) if LIVE_MAX_SKIPS > 0 else None
+        if self._can_skip(signature):
+            self.skipped += 1
+            self.consecutive_skips += 1
+            payload = dict(self.last_result)
+            payload["skipped_inference"] = True
+            payload["suggested_interval_ms"] = self.suggested_interval_ms()
+            return payload
+
+        started = time.monotonic()
+
+        if self.tracker is not None:
+            result = self.tracker.analyze(image)
+        else:
+            results = DeepFace.analyze(image, actions=['emotion'], enforce_detection=False, silent=True)
+            result = results[0] if results and isinstance(results, list) else None
+
+        elapsed = time.monotonic() - started
+        self.latency_ema = elapsed if self.latency_ema is None else (
+            LATENCY_SMOOTHING * elapsed + (1 - LATENCY_SMOOTHING) * self.latency_ema
+        )
+
+        if not result:
+            self.last_region = None
+            self._reset_smoothing()
+            return {"error": "No face detected", "success": False, "suggested_interval_ms": self.suggested_interval_ms()}
+
+        payload = build_live_payload(result, scale)
+        self._smooth(payload)
+        self.reference = signature
+        self.consecutive_skips = 0
+        payload["skipped_inference"] = False
+        payload["suggested_interval_ms"] = self.suggested_interval_ms()
+        self.faces += 1
+        self.last_region = payload["region"]
+        self.last_result = payload
+        return payload
+
+    def _can_skip(self, signature):
+        if signature is None or self.reference is None or self.last_result is None:
+            return False
+        if self.stable_frames < LIVE_STABLE_FRAMES or self.consecutive_skips >= LIVE_MAX_SKIPS:
+            return False
+        if signature.shape != self.reference.shape:
+            return False
+        return frame_difference(signature, self.reference) < LIVE_SKIP_THRESHOLD
+
+    def _smooth(self, payload):
+        """Fold the frame's scores into the moving average and report the hysteresis label"""
+        scores = scores_to_vector(payload["emotion_scores"])
+        if self.smoothed is None:
+            self.smoothed = scores
+        else:
+            self.smoothed = LIVE_EMA_ALPHA * scores + (1 - LIVE_EMA_ALPHA) * self.smoothed
+
+        leader = EMOTION_LABELS[int(self.smoothed.argmax())]
+        previous = self.label
+        if self.label is None:
+            self.label = leader
+        elif leader != self.label:
+            margin = self.smoothed[EMOTION_LABELS.index(leader)] - self.smoothed[EMOTION_LABELS.index(self.label)]
+            if margin >= LIVE_SWITCH_MARGIN and leader == self._pending_label:
+                self._pending_frames += 1
+            elif margin >= LIVE_SWITCH_MARGIN:
+                self._pending_label, self._pending_frames = leader, 1
+            else:
+                self._pending_label, self._pending_frames = None, 0
+            if self._pending_frames >= LIVE_SWITCH_FRAMES:
+                self.label = leader
+                self._pending_label, self._pending_frames = None, 0
+        else:
+            self._pending_label, self._pending_frames = None, 0
+        self.stable_frames = self.stable_frames + 1 if self.label == previous else 0
+
+        confidence = float(self.smoothed[EMOTION_LABELS.index(self.label)])
+        payload.update({
+            "raw_emotion": payload["emotion"],
+            "raw_confidence": payload["confidence"],
+            "raw_emotion_scores": payload["emotion_scores"],
+            "emotion": self.label,
+            "confidence": round(confidence, 4),
+            "confidence_percentage": round(confidence * 100, 2),
+            "emotion_scores": _scores_percent(self.smoothed),
+        })
+
+    def analyze_latest(self, image, scale=1, max_wait_ms=LIVE_MAX_WAIT_MS):
+        """
+        Analyze image unless a newer frame of this session supersedes it
+
+        Waits while another frame of the session is being analyzed. If a newer
+        frame arrives meanwhile, or the wait exceeds max_wait_ms, the frame is
+        dropped and a cheap payload (dropped=True, last_result) is returned.
+        """
+        with self._admission:
+            self._tickets += 1
+            ticket = self._tickets
+            if self._waiting is not None:
+                self._admission.notify_all()  # Wake the frame this one replaces
+            self._waiting = ticket
+
+            deadline = time.monotonic() + max_wait_ms / 1000
+            while self._busy and self._waiting == ticket:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._admission.wait(remaining)
+
+            if self._waiting != ticket:
+                return self._dropped_payload("superseded")
+            self._waiting = None
+            if self._busy:
+                return self._dropped_payload("stale")
+            self._busy = True
+
+        try:
+            return self.analyze(image, scale)
+        finally:
+            with self._admission:
+                self._busy = False
+                self._admission.notify_all()
+
+    def _dropped_payload(self, reason):
+        self.dropped += 1
+        return {
+            "error": f"Frame dropped ({reason})",
+            "dropped": True,
+            "reason": reason,
+            "last_result": self.last_result,
+            "suggested_interval_ms": self.suggested_interval_ms(),
+            "success": False
+        }
+
+    def suggested_interval_ms(self):
+        """Capture interval this session can currently sustain, from its average inference time"""
+        if self.latency_ema is None:
+            return LIVE_MIN_INTERVAL_MS
+        return max(LIVE_MIN_INTERVAL_MS, int(self.latency_ema * 1000 * INTERVAL_HEADROOM))
+
+    def stats(self):
+        """Return frame counters and tracker counters"""
+        stats = {"frames": self.frames, "faces": self.faces, "dropped": self.dropped, "skipped_inference": self.skipped}
+        if self.tracker is not None:
+            stats.update(self.tracker.stats())
+        return stats
+
+
+class LiveSessionRegistry:
+    """LiveSession per stream key, dropped after LIVE_SESSION_IDLE_SECONDS of inactivity"""
+
+    def __init__(self, max_sessions=LIVE_MAX_SESSIONS, idle_seconds=LIVE_SESSION_IDLE_SECONDS):
+        self.max_sessions = max(1, max_sessions)
+        self.idle_seconds = idle_seconds
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the session for key, creating it on first use"""
+        with self._lock:
+            self._prune()
+            live = self._sessions.pop(key, None) or LiveSession(key)
+            live.last_used = time.time()
+            self._sessions[key] = live
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return live
+
+    def discard(self, key):
+        with self._lock:
+            self._sessions.pop(key, None)
+
+    def _prune(self):
+        cutoff = time.time() - self.idle_seconds
+        for key in [key for key, live in self._sessions.items() if live.last_used < cutoff]:
+            del self._sessions[key]
+
+    def stats(self):
+        """Return the number of sessions and their summed counters"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        totals = {"sessions": len(sessions)}
+        for live in sessions:
+            for key, value in live.stats().items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+
+live_sessions = LiveSessionRegistry()
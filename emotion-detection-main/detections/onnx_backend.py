@@ -0,0 +1,210 @@
+"""
+ONNX Runtime backend for the go_emotions text classifier
+Exports SamLowe/roberta-base-go_emotions to ONNX once, applies dynamic int8
+quantization and serves it on CPU through onnxruntime.
+
+Requires the optional packages: pip install onnx onnxruntime
+Re-export, re-quantize and re-run the parity check from the command line:
+    python -m detections.onnx_backend
+"""
+
+import os
+import json
+import logging
+import numpy as np
+
+MODEL_NAME = "SamLowe/roberta-base-go_emotions"
+
+# Where the exported and quantized model, tokenizer and parity report are stored
+ONNX_MODEL_DIR = os.getenv(
+    'ONNX_MODEL_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', 'onnx_go_emotions')
+)
+INT8_MODEL_FILE = "model.int8.onnx"
+PARITY_REPORT_FILE = "parity.json"
+
+# Largest absolute probability difference tolerated against the torch pipeline
+PARITY_TOLERANCE = float(os.getenv('ONNX_PARITY_TOLERANCE', '0.05'))
+
+# onnxruntime intra-op threads (0 lets onnxruntime decide)
+ONNX_THREADS = int(os.getenv('ONNX_THREADS', '0'))
+
+PARITY_SAMPLES = [
+    "I am so happy today, everything is going great!",
+    "This is the worst day of my life and I can't stop crying.",
+    "How dare you speak to me like that, I'm furious.",
+    "I'm really nervous about the exam tomorrow.",
+    "Wow, I did not expect that at all!",
+    "Thank you so much for your help, I really appreciate it.",
+    "The meeting is at 3pm in room 204.",
+    "That food was disgusting, I nearly threw up.",
+]
+
+
+def export_onnx_model(model_name=MODEL_NAME, output_dir=ONNX_MODEL_DIR, force=False):
+    """
+    Export the model to ONNX and quantize its weights to int8 (skipped if already exported unless force)
+
+    Returns:
+        str: Path to the quantized ONNX model
+    """
+    int8_path = os.path.join(output_dir, INT8_MODEL_FILE)
+    if os.path.exists(int8_path) and not force:
+        return int8_path
+
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, "model.fp32.onnx")
+
+    logging.info(f"Exporting {model_name} to ONNX in {output_dir}...")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    dummy = tokenizer(["export sample text"], return_tensors="pt")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=14,
+        )
+
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+
+    tokenizer.save_pretrained(output_dir)
+    model.config.save_pretrained(output_dir)
+    logging.info(f"Quantized ONNX model written to {int8_path}")
+    return int8_path
+
+
+class OnnxEmotionClassifier:
+    """
+    Drop-in replacement for the text-classification pipeline (top_k=None)
+    that runs the quantized model with onnxruntime on CPU
+    """
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR, threads=ONNX_THREADS):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer, AutoConfig
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, INT8_MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        config = AutoConfig.from_pretrained(model_dir)
+        self.labels = [config.id2label[i] for i in range(len(config.id2label))]
+        self.multi_label = config.problem_type == "multi_label_classification"
+        self.max_length = min(self.tokenizer.model_max_length, 512)
+
+    def __call__(self, texts, batch_size=None, truncation=True, **kwargs):
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+        batch_size = batch_size or len(texts) or 1
+
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            chunk = list(texts[start:start + batch_size])
+            encoded = self.tokenizer(
+                chunk, padding=True, truncation=truncation, max_length=self.max_length, return_tensors="np"
+            )
+            logits = self.session.run(["logits"], {
+                "input_ids": encoded["input_ids"].astype(np.int64),
+                "attention_mask": encoded["attention_mask"].astype(np.int64),
+            })[0]
+            for row in self._activate(logits):
+                scores = [{"label": label, "score": float(score)} for label, score in zip(self.labels, row)]
+                outputs.append(sorted(scores, key=lambda x: x["score"], reverse=True))
+
+        return outputs[0] if single else outputs
+
+    def _activate(self, logits):
+        # go_emotions is multi-label, so the pipeline applies a sigmoid per label
+        if self.multi_label:
+            return 1 / (1 + np.exp(-logits))
+        shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+def check_parity(onnx_classifier, torch_pipeline, texts=PARITY_SAMPLES, tolerance=PARITY_TOLERANCE):
+    """
+    Compare the ONNX classifier against the torch pipeline on sample texts
+
+    Returns:
+        dict: Parity report with max_abs_diff, top_label_agreement and passed flag
+    """
+    onnx_outputs = onnx_classifier(texts)
+    torch_outputs = torch_pipeline(texts, batch_size=len(texts), truncation=True)
+
+    max_diff = 0.0
+    agreements = 0
+    for onnx_scores, torch_scores in zip(onnx_outputs, torch_outputs):
+        onnx_map = {item["label"]: item["score"] for item in onnx_scores}
+        torch_map = {item["label"]: item["score"] for item in torch_scores}
+        max_diff = max(max_diff, max(abs(onnx_map[label] - torch_map.get(label, 0.0)) for label in onnx_map))
+        if onnx_scores[0]["label"] == max(torch_scores, key=lambda x: x["score"])["label"]:
+            agreements += 1
+
+    report = {
+        "samples": len(texts),
+        "max_abs_diff": round(max_diff, 5),
+        "top_label_agreement": round(agreements / len(texts), 4) if texts else 1.0,
+        "tolerance": tolerance,
+    }
+    report["passed"] = max_diff <= tolerance and agreements == len(texts)
+    return report
+
+
+def load_onnx_emotion_model(model_dir=ONNX_MODEL_DIR):
+    """
+    Load the quantized classifier, exporting it and running the parity check on first use
+
+    Raises:
+        RuntimeError: If the quantized model fails the parity check
+    """
+    report_path = os.path.join(model_dir, PARITY_REPORT_FILE)
+    export_onnx_model(output_dir=model_dir)
+    classifier = OnnxEmotionClassifier(model_dir)
+
+    if os.path.exists(report_path):
+        with open(report_path) as f:
+            report = json.load(f)
+    else:
+        from transformers import pipeline
+        torch_pipeline = pipeline("text-classification", model=MODEL_NAME, top_k=None)
+        report = check_parity(classifier, torch_pipeline)
+        del torch_pipeline
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    logging.info(f"ONNX parity: max_abs_diff={report['max_abs_diff']}, top_label_agreement={report['top_label_agreement']}")
+    if not report.get("passed"):
+        raise RuntimeError(f"ONNX int8 model failed parity check: {report}")
+    return classifier
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    # The parity report belongs to the old export, so it is rebuilt for the new one
+    if os.path.exists(os.path.join(ONNX_MODEL_DIR, PARITY_REPORT_FILE)):
+        os.remove(os.path.join(ONNX_MODEL_DIR, PARITY_REPORT_FILE))
+    export_onnx_model(force=True)
+    load_onnx_emotion_model()
+    print(f"ONNX int8 model ready in {ONNX_MODEL_DIR}")
@@ -1,11 +1,17 @@
 import os
 import sys
+import math
+import time
+import uuid
+import queue
 import cv2
 import imageio
 import numpy as np
-from collections import Counter
 from werkzeug.utils import secure_filename
 import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Setup local DeepFace path
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
@@ -13,12 +19,52 @@ from deepface_config import setup_deepface_path, get_deepface_config
 setup_deepface_path()
 
 from deepface import DeepFace
+from detections.face_tracking import FaceTracker, FACE_TRACKING
+from detections.emotion_timeline import EmotionAggregator
+from detections.frame_motion import frame_signature, frame_difference
 
 UPLOAD_FOLDER = "static/uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-def analyze_frame(frame, frame_count=0):
-    """Analyze a frame for emotion with detailed error logging"""
+# Analyzed frames per second of video when no frame_skip is given (~every 5th frame at 30 FPS)
+VIDEO_SAMPLE_FPS = float(os.getenv('VIDEO_SAMPLE_FPS', '6'))
+
+# Upper bound on analyzed frames per video (0 = no limit); long videos are sampled more sparsely
+VIDEO_MAX_FRAMES = int(os.getenv('VIDEO_MAX_FRAMES', '0'))
+
+# Gaps of at least this many frames between samples are skipped with a seek instead of grab()
+VIDEO_SEEK_MIN_GAP = int(os.getenv('VIDEO_SEEK_MIN_GAP', '60'))
+
+# Containers whose frame seeks are not frame-exact (variable frame rate, sparse index);
+# they are read with grab() only, so every frame number is exact
+UNSEEKABLE_VIDEO_EXTENSIONS = ('.webm', '.mkv')
+
+# Decoded frames buffered between the decode thread and inference (0 = decode and infer in turn)
+VIDEO_DECODE_QUEUE_SIZE = int(os.getenv('VIDEO_DECODE_QUEUE_SIZE', '8'))
+
+# Worker processes for segment-parallel video analysis (1 = analyze in the request thread)
+VIDEO_WORKERS = int(os.getenv('VIDEO_WORKERS', '1'))
+
+# Videos shorter than this are analyzed sequentially (process start-up is not worth it)
+VIDEO_PARALLEL_MIN_FRAMES = int(os.getenv('VIDEO_PARALLEL_MIN_FRAMES', '900'))
+
+# Mean grayscale difference (0-255, on a downscaled frame) below which a sampled frame
+# reuses the previous detection instead of running DeepFace (0 = analyze every sample)
+VIDEO_MOTION_THRESHOLD = float(os.getenv('VIDEO_MOTION_THRESHOLD', '3'))
+
+# Most consecutive samples that may reuse one detection before a fresh analysis is forced
+VIDEO_MAX_REUSE = int(os.getenv('VIDEO_MAX_REUSE', '10'))
+
+# Difference treated as a scene change; the next VIDEO_SCENE_BOOST_SAMPLES sample
+# intervals are then sampled at twice the normal rate
+VIDEO_SCENE_CHANGE_THRESHOLD = float(os.getenv('VIDEO_SCENE_CHANGE_THRESHOLD', '20'))
+VIDEO_SCENE_BOOST_SAMPLES = int(os.getenv('VIDEO_SCENE_BOOST_SAMPLES', '3'))
+
+def analyze_frame(frame, frame_count=0, tracker=None):
+    """
+    Analyze a frame for emotion with detailed error logging.
+    With a FaceTracker, face detection only runs when the tracker needs it.
+    """
     try:
         # Ensure frame is in correct format
         if frame is None or frame.size == 0:
@@ -35,12 +81,16 @@ def analyze_frame(frame, frame_count=0):
         logging.debug(f"Frame {frame_count}: Shape={frame_rgb.shape}, dtype={frame_rgb.dtype}")
         
         # Analyze with DeepFace
-        results = DeepFace.analyze(
-            frame_rgb, 
-            actions=['emotion'], 
-            enforce_detection=False,
-            silent=True
-        )
+        if tracker is not None:
+            result = tracker.analyze(frame_rgb)
+            results = [result] if result else None
+        else:
+            results = DeepFace.analyze(
+                frame_rgb, 
+                actions=['emotion'], 
+                enforce_detection=False,
+                silent=True
+            )
         
         # Extract emotion from results
         if results and isinstance(results, list):
@@ -52,7 +102,8 @@ def analyze_frame(frame, frame_count=0):
                     logging.debug(f"Frame {frame_count}: Detected {emotion} ({confidence:.2%})")
                     return {
                         "emotion": emotion,
-                        "confidence": confidence
+                        "confidence": confidence,
+                        "scores": result.get("emotion")
                     }
                 else:
                     logging.debug(f"Frame {frame_count}: Result has no 'dominant_emotion' key. Keys: {result.keys()}")
@@ -67,16 +118,58 @@ def analyze_frame(frame, frame_count=0):
     return None
 
 
-def process_video(file, is_live_recording=False, frame_skip=5):
+def save_video_upload(file, is_live_recording=False, unique=False):
+    """
+    Save an uploaded video to UPLOAD_FOLDER and return its path.
+    unique=True prefixes a random id so concurrent background jobs never share a file.
+    """
+    filename = "recorded_video.webm" if is_live_recording else secure_filename(file.filename)
+    if unique:
+        filename = f"{uuid.uuid4().hex}_{filename or 'video'}"
+    video_path = os.path.join(UPLOAD_FOLDER, filename)
+    file.save(video_path)
+    return video_path
+
+
+def process_video(file, is_live_recording=False, frame_skip=None, sample_fps=None, max_frames=None):
     """
     Process video file and detect emotions frame-by-frame.
-    frame_skip=5 means analyze every 5th frame (faster processing)
+    By default VIDEO_SAMPLE_FPS frames are analyzed per second of video;
+    frame_skip=5 instead analyzes every 5th frame.
     """
     try:
-        filename = "recorded_video.webm" if is_live_recording else secure_filename(file.filename)
-        video_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(video_path)
+        video_path = save_video_upload(file, is_live_recording)
+    except Exception as e:
+        logging.error(f"Error saving video: {str(e)}")
+        return {
+            "error": str(e),
+            "message": "Failed to process video. Please try again with a different video file.",
+            "success": False
+        }
+    return analyze_video(video_path, frame_skip=frame_skip, sample_fps=sample_fps, max_frames=max_frames)
 
+
+def analyze_video(video_path, frame_skip=None, progress_callback=None, sample_fps=None, max_frames=None):
+    """
+    Detect emotions frame-by-frame in a saved video file.
+    
+    Frames are sampled by time (sample_fps per second of video, capped at
+    max_frames) so the cost depends on duration, not on the source FPS.
+    Videos of at least VIDEO_PARALLEL_MIN_FRAMES frames are split into
+    segments analyzed in parallel by VIDEO_WORKERS processes (seekable
+    containers only).
+    
+    Args:
+        video_path (str): Path of the video file
+        frame_skip (int): Analyze every Nth frame instead of sampling by time (optional)
+        progress_callback (callable): Called with (percent, message) while frames are processed
+        sample_fps (float): Analyzed frames per second of video (default VIDEO_SAMPLE_FPS)
+        max_frames (int): Most frames to analyze (default VIDEO_MAX_FRAMES, 0 = no limit)
+        
+    Returns:
+        dict: Analysis result (success=False with an error message on failure)
+    """
+    try:
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             return {
@@ -89,78 +182,43 @@ def process_video(file, is_live_recording=False, frame_skip=5):
         fps = cap.get(cv2.CAP_PROP_FPS) or 30
         duration = total_frames / fps if fps > 0 else 0
 
-        emotions_detected = []
-        emotions_with_confidence = []
-        frame_count = 0
-        analyzed_frames = 0
+        step = resolve_sample_step(fps, total_frames, frame_skip, sample_fps, max_frames)
+        seek = is_frame_seekable(video_path)
 
-        logging.info(f"Processing video: {total_frames} frames, {fps:.1f} FPS, {duration:.1f}s duration")
+        logging.info(f"Processing video: {total_frames} frames, {fps:.1f} FPS, {duration:.1f}s duration, analyzing every {step:.2f} frames")
 
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+        aggregator = None
+        # Segments start with a seek, so containers without an exact frame index are read
+        # in one sequential pass rather than each worker grabbing its way from frame 0
+        if VIDEO_WORKERS > 1 and seek and total_frames >= VIDEO_PARALLEL_MIN_FRAMES:
+            cap.release()
+            try:
+                aggregator, analyzed_frames, pipeline_stats = analyze_video_parallel(
+                    video_path, total_frames, fps, step, progress_callback
+                )
+            except Exception as e:
+                logging.warning(f"Parallel video analysis failed ({e}). Falling back to sequential analysis.")
+                cap = cv2.VideoCapture(video_path)
 
-            # Analyze every Nth frame
-            if frame_count % frame_skip == 0:
-                analyzed_frames += 1
-                detected = analyze_frame(frame, frame_count)
-                
-                if detected:
-                    emotions_detected.append(detected["emotion"])
-                    emotions_with_confidence.append({
-                        "emotion": detected["emotion"],
-                        "confidence": detected["confidence"],
-                        "frame": frame_count,
-                        "timestamp": frame_count / fps
-                    })
-                else:
-                    if analyzed_frames <= 3:  # Log first few failures for debugging
-                        logging.debug(f"No emotion detected in analyzed frame {frame_count}")
-
-            frame_count += 1
+        if aggregator is None:
+            def report(frames_read, analyzed):
+                if progress_callback and total_frames > 0:
+                    progress_callback(min(99, int(frames_read * 100 / total_frames)), f"Analyzed {analyzed} frames")
 
-        cap.release()
+            aggregator, analyzed_frames, pipeline_stats = analyze_frame_range(
+                cap, 0, None, step, fps, progress=report, seek=seek
+            )
+            cap.release()
 
-        # Check if any emotions were detected
-        if not emotions_detected:
-            logging.warning(f"No faces detected in video. Analyzed {analyzed_frames} frames out of {total_frames}")
-            return {
-                "error": "No faces detected in the video",
-                "message": "No faces or emotions could be detected in the video. Try with a clearer video showing faces.",
-                "frames_analyzed": analyzed_frames,
-                "total_frames": total_frames,
-                "success": False
-            }
-
-        # Calculate emotion distribution
-        emotion_counts = Counter(emotions_detected)
-        most_common_emotion = emotion_counts.most_common(1)[0][0]
-        
-        # Calculate confidence for dominant emotion
-        dominant_emotion_data = [e for e in emotions_with_confidence if e["emotion"] == most_common_emotion]
-        dominant_confidence = np.mean([e["confidence"] for e in dominant_emotion_data]) if dominant_emotion_data else 0
-
-        # Prepare detailed response
-        response = {
-            "success": True,
-            "dominant_emotion": most_common_emotion,
-            "dominant_emotion_confidence": round(float(dominant_confidence), 4),
-            "total_emotions_detected": len(emotions_detected),
-            "frames_analyzed": analyzed_frames,
-            "total_frames": total_frames,
-            "video_duration": round(duration, 2),
-            "emotion_distribution": dict(emotion_counts),
-            "emotion_percentages": {
-                emotion: round((count / len(emotions_detected)) * 100, 1)
-                for emotion, count in emotion_counts.items()
-            },
-            "emotions_timeline": emotions_with_confidence[:50],  # Return first 50 detailed emotions
-            "emotions": emotions_with_confidence,  # For frontend compatibility with more complete data
-            "model_used": "deepface-vggface2 (frame-by-frame analysis)"
+        reused_frames = pipeline_stats.get("reused_frames", 0)
+        response = summarize_video_emotions(aggregator, analyzed_frames, total_frames, duration, reused_frames)
+        response["sampling"] = {
+            "frame_step": round(step, 3),
+            "analyzed_fps": round(fps / step, 3),
+            "motion_threshold": VIDEO_MOTION_THRESHOLD,
+            "reuse_ratio": round(reused_frames / (analyzed_frames + reused_frames), 3) if analyzed_frames + reused_frames else 0.0
         }
-
-        logging.info(f"Video analysis complete: {most_common_emotion} detected in {len(emotions_detected)}/{analyzed_frames} analyzed frames")
+        response["pipeline"] = pipeline_stats
         return response
 
     except Exception as e:
@@ -170,3 +228,413 @@ def process_video(file, is_live_recording=False, frame_skip=5):
             "message": "Failed to process video. Please try again with a different video file.",
             "success": False
         }
+
+
+def resolve_sample_step(fps, total_frames, frame_skip=None, sample_fps=None, max_frames=None):
+    """
+    Return the (possibly fractional) number of source frames between analyzed frames
+    
+    frame_skip wins when given; otherwise the step follows sample_fps, widened
+    so no more than max_frames frames are analyzed.
+    """
+    if frame_skip:
+        step = float(frame_skip)
+    else:
+        step = fps / (sample_fps or VIDEO_SAMPLE_FPS)
+    max_frames = VIDEO_MAX_FRAMES if max_frames is None else max_frames
+    if max_frames and total_frames > 0:
+        step = max(step, total_frames / max_frames)
+    return max(1.0, step)
+
+
+def is_frame_seekable(video_path):
+    """Whether seeking by frame number lands on the exact frame for this file's container"""
+    return not video_path.lower().endswith(UNSEEKABLE_VIDEO_EXTENSIONS)
+
+
+def seek_to_frame(cap, target):
+    """
+    Seek cap to target and return the frame number the next grab() reads, or None if the seek failed
+    
+    The position is read back from the capture rather than assumed, so frame
+    numbers (and timestamps) follow where the decoder actually landed.
+    """
+    if not cap.set(cv2.CAP_PROP_POS_FRAMES, target):
+        return None
+    position = cap.get(cv2.CAP_PROP_POS_FRAMES)
+    return int(position) if position >= 0 else None
+
+
+def iter_sampled_frames(cap, start_frame, end_frame, step, seek=True):
+    """
+    Yield (frame_number, frame, reuse) for the sampled frames in [start_frame, end_frame)
+    
+    cap must be freshly opened (positioned at frame 0). Sampled frames are
+    round(k * step) for whole k. Frames in between are skipped with grab()
+    (no colour conversion) or, for long gaps when seek is True, a seek, and
+    only sampled frames are retrieved.
+    
+    Seeks are only frame-exact for containers with a reliable frame index, so
+    segments read separately pick the same frames as one sequential pass only
+    there; after a seek the frame number is taken from the capture, and a seek
+    that overshoots moves the sample to the first frame after it. With
+    seek=False (.webm/.mkv) frames are only grabbed and numbering is exact;
+    the first failed seek switches the rest of the range to the same mode.
+    
+    Each sample is compared with the last frame that was analyzed: reuse is
+    True when it differs by less than VIDEO_MOTION_THRESHOLD, so the previous
+    detection can stand in for it. After a scene change extra samples are
+    taken halfway between the regular ones for VIDEO_SCENE_BOOST_SAMPLES intervals.
+    """
+    frame_count = 0
+    sample_index = math.ceil(start_frame / step)
+    regular_sample = round(sample_index * step)
+    if regular_sample < start_frame:
+        sample_index += 1
+        regular_sample = round(sample_index * step)
+    next_sample = regular_sample
+
+    half_step = max(1, int(step // 2))
+    boost_until = -1
+    reference = None
+    reuse_run = 0
+
+    while end_frame is None or next_sample < end_frame:
+        # Jump over long gaps instead of grabbing every frame in between
+        if seek and next_sample - frame_count >= VIDEO_SEEK_MIN_GAP:
+            position = seek_to_frame(cap, next_sample)
+            if position is not None:
+                frame_count = position
+            else:
+                # The backend cannot seek this file; grab the rest instead of retrying on every sample
+                logging.debug(f"Seek to frame {next_sample} failed; reading the rest of the range with grab()")
+                seek = False
+
+        if not cap.grab():
+            return
+
+        if frame_count >= next_sample:
+            ret, frame = cap.retrieve()
+            if not ret:
+                return
+
+            reuse = False
+            if VIDEO_MOTION_THRESHOLD > 0:
+                signature = frame_signature(frame)
+                if reference is not None:
+                    difference = frame_difference(signature, reference)
+                    if difference < VIDEO_MOTION_THRESHOLD and reuse_run < VIDEO_MAX_REUSE:
+                        reuse = True
+                    elif difference >= VIDEO_SCENE_CHANGE_THRESHOLD:
+                        boost_until = frame_count + step * VIDEO_SCENE_BOOST_SAMPLES
+                if reuse:
+                    reuse_run += 1
+                else:
+                    # Compare against the last analyzed frame so slow drift still triggers analysis
+                    reference = signature
+                    reuse_run = 0
+
+            yield frame_count, frame, reuse
+
+            while regular_sample <= frame_count:
+                sample_index += 1
+                regular_sample = round(sample_index * step)
+            next_sample = regular_sample
+            if frame_count < boost_until:
+                next_sample = min(regular_sample, frame_count + half_step)
+
+        frame_count += 1
+
+
+class _DecodeError:
+    """Carries an exception raised in the decode thread to the inference loop"""
+
+    def __init__(self, error):
+        self.error = error
+
+
+_END_OF_STREAM = object()
+
+
+def _put_unless_stopped(frame_queue, item, stop):
+    # Blocks while the queue is full, but gives up once the consumer has stopped
+    while not stop.is_set():
+        try:
+            frame_queue.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def _decode_into_queue(frames, frame_queue, stop, timings):
+    """Decode-thread body: fill frame_queue from the frames iterator until exhausted or stopped"""
+    try:
+        while not stop.is_set():
+            started = time.perf_counter()
+            item = next(frames, _END_OF_STREAM)
+            timings["decode_seconds"] += time.perf_counter() - started
+            if item is _END_OF_STREAM:
+                break
+
+            started = time.perf_counter()
+            _put_unless_stopped(frame_queue, item, stop)
+            timings["decode_blocked_seconds"] += time.perf_counter() - started
+    except Exception as e:
+        _put_unless_stopped(frame_queue, _DecodeError(e), stop)
+        return
+    _put_unless_stopped(frame_queue, _END_OF_STREAM, stop)
+
+
+def analyze_frame_range(cap, start_frame, end_frame, step, fps, progress=None, seek=True):
+    """
+    Analyze the sampled frames in [start_frame, end_frame) of an open capture
+    
+    A decode thread reads sampled frames into a bounded queue of
+    VIDEO_DECODE_QUEUE_SIZE frames while this thread runs DeepFace on them,
+    so decoding and inference overlap (OpenCV and TensorFlow release the GIL).
+    Samples that barely differ from the last analyzed frame reuse its
+    detection (marked "reused": True) instead of running DeepFace again,
+    and with FACE_TRACKING the face is tracked between full detections.
+    
+    Args:
+        cap: Freshly opened cv2.VideoCapture
+        start_frame (int): First frame that may be sampled
+        end_frame (int): First frame not to read (None reads to the end)
+        step (float): Frames between analyzed frames
+        progress (callable): Called with (frames_read, analyzed_frames) every 10 analyzed frames
+        seek (bool): Skip long gaps with seeks (False for containers without exact seeking)
+        
+    Returns:
+        tuple: (EmotionAggregator, analyzed_frames, pipeline_stats);
+        analyzed_frames counts frames DeepFace ran on, pipeline_stats["reused_frames"] the rest
+    """
+    aggregator = EmotionAggregator()
+    analyzed_frames = 0
+    reused_frames = 0
+    last_detected = None
+    tracker = FaceTracker() if FACE_TRACKING else None
+    timings = {"decode_seconds": 0.0, "decode_blocked_seconds": 0.0, "inference_seconds": 0.0, "inference_wait_seconds": 0.0}
+    max_depth = 0
+    depth_total = 0
+    wall_start = time.perf_counter()
+
+    frames = iter_sampled_frames(cap, start_frame, end_frame, step, seek)
+    stop = threading.Event()
+    decoder = None
+    if VIDEO_DECODE_QUEUE_SIZE > 0:
+        frame_queue = queue.Queue(maxsize=VIDEO_DECODE_QUEUE_SIZE)
+        decoder = threading.Thread(
+            target=_decode_into_queue, args=(frames, frame_queue, stop, timings), name="video-decode", daemon=True
+        )
+        decoder.start()
+
+    try:
+        while True:
+            if decoder is not None:
+                depth = frame_queue.qsize()
+                max_depth = max(max_depth, depth)
+                depth_total += depth
+                started = time.perf_counter()
+                item = frame_queue.get()
+                timings["inference_wait_seconds"] += time.perf_counter() - started
+                if isinstance(item, _DecodeError):
+                    raise item.error
+            else:
+                started = time.perf_counter()
+                item = next(frames, _END_OF_STREAM)
+                timings["decode_seconds"] += time.perf_counter() - started
+            if item is _END_OF_STREAM:
+                break
+
+            frame_count, frame, reuse = item
+            if reuse:
+                reused_frames += 1
+                if last_detected:
+                    aggregator.add(
+                        last_detected["emotion"], last_detected["confidence"], frame_count / fps,
+                        last_detected.get("scores"), reused=True
+                    )
+                continue
+
+            analyzed_frames += 1
+            started = time.perf_counter()
+            detected = analyze_frame(frame, frame_count, tracker)
+            timings["inference_seconds"] += time.perf_counter() - started
+            last_detected = detected
+            
+            if detected:
+                aggregator.add(detected["emotion"], detected["confidence"], frame_count / fps, detected.get("scores"))
+            else:
+                if analyzed_frames <= 3:  # Log first few failures for debugging
+                    logging.debug(f"No emotion detected in analyzed frame {frame_count}")
+            
+            if progress and analyzed_frames % 10 == 0:
+                progress(frame_count + 1, analyzed_frames)
+    finally:
+        stop.set()
+        if decoder is not None:
+            decoder.join()
+
+    pipeline_stats = {key: round(value, 3) for key, value in timings.items()}
+    pipeline_stats.update({
+        "wall_seconds": round(time.perf_counter() - wall_start, 3),
+        "queue_size": VIDEO_DECODE_QUEUE_SIZE,
+        "max_queue_depth": max_depth,
+        "average_queue_depth": round(depth_total / analyzed_frames, 2) if analyzed_frames else 0.0,
+        "reused_frames": reused_frames,
+    })
+    if tracker is not None:
+        pipeline_stats.update(tracker.stats())
+    return aggregator, analyzed_frames, pipeline_stats
+
+
+def merge_pipeline_stats(stats_list):
+    """Combine the pipeline stats of several segments (times summed, queue depth maxed)"""
+    merged = {}
+    for stats in stats_list:
+        for key, value in stats.items():
+            if key in ("max_queue_depth", "queue_size"):
+                merged[key] = max(merged.get(key, 0), value)
+            elif key == "average_queue_depth":
+                continue
+            else:
+                merged[key] = round(merged.get(key, 0) + value, 3)
+    return merged
+
+
+def split_into_segments(total_frames, segments):
+    """
+    Split [0, total_frames) into contiguous frame ranges
+    
+    The last range is open-ended (end None) because frame counts reported by
+    containers are often approximate.
+    """
+    size = max(1, -(-total_frames // segments))
+    bounds = list(range(0, total_frames, size))
+    return [(start, bounds[i + 1] if i + 1 < len(bounds) else None) for i, start in enumerate(bounds)]
+
+
+_segment_pool = None
+_segment_pool_pid = None
+_segment_pool_lock = threading.Lock()
+_worker_start_lock = threading.Lock()
+
+
+class SegmentWorkerProcess(multiprocessing.context.SpawnProcess):
+    """
+    Spawned process that starts from detections.video_worker
+    
+    A spawned child re-runs the parent's __main__ module first (as __mp_main__),
+    which for `python app.py` is the whole web app. While the child is started,
+    __main__ is pointed at the small worker module so that is what it runs.
+    """
+
+    def start(self):
+        import detections.video_worker as worker_module
+
+        with _worker_start_lock:
+            main_module = sys.modules['__main__']
+            sys.modules['__main__'] = worker_module
+            try:
+                super().start()
+            finally:
+                sys.modules['__main__'] = main_module
+
+
+class SegmentWorkerContext(multiprocessing.context.SpawnContext):
+    """Spawn context whose processes are SegmentWorkerProcess"""
+
+    Process = SegmentWorkerProcess
+
+
+def get_segment_pool():
+    """
+    Return the shared process pool for segment analysis
+    
+    Workers are spawned, so they never inherit threads, and start from the
+    small detections.video_worker module, which loads only the face model.
+    """
+    from detections.video_worker import init_segment_worker
+
+    global _segment_pool, _segment_pool_pid
+    with _segment_pool_lock:
+        if _segment_pool is None or _segment_pool_pid != os.getpid():
+            _segment_pool = ProcessPoolExecutor(
+                max_workers=VIDEO_WORKERS,
+                mp_context=SegmentWorkerContext(),
+                initializer=init_segment_worker
+            )
+            _segment_pool_pid = os.getpid()
+        return _segment_pool
+
+
+def analyze_video_parallel(video_path, total_frames, fps, step, progress_callback=None):
+    """
+    Analyze a video as segments spread over the process pool and merge them in frame order
+    
+    Returns:
+        tuple: (EmotionAggregator, analyzed_frames, pipeline_stats)
+    """
+    wall_start = time.perf_counter()
+    # Two segments per worker evens out segments that take longer (more faces to analyze)
+    segments = split_into_segments(total_frames, VIDEO_WORKERS * 2)
+    from detections.video_worker import analyze_segment
+
+    pool = get_segment_pool()
+    futures = {
+        pool.submit(analyze_segment, video_path, start, end, step, fps): index
+        for index, (start, end) in enumerate(segments)
+    }
+    logging.info(f"Analyzing {len(segments)} video segments on {VIDEO_WORKERS} worker processes")
+
+    results = [None] * len(segments)
+    try:
+        for done_count, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if progress_callback:
+                progress_callback(min(99, int(done_count * 100 / len(segments))), f"Analyzed {done_count} of {len(segments)} segments")
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+
+    aggregator = EmotionAggregator()
+    analyzed_frames = 0
+    for segment_aggregator, segment_analyzed, _ in results:
+        aggregator.extend(segment_aggregator)
+        analyzed_frames += segment_analyzed
+    
+    # Stage times are summed over segments; wall_seconds is the elapsed time of the whole run
+    pipeline_stats = merge_pipeline_stats([stats for _, _, stats in results])
+    pipeline_stats["wall_seconds"] = round(time.perf_counter() - wall_start, 3)
+    pipeline_stats["segments"] = len(segments)
+    return aggregator, analyzed_frames, pipeline_stats
+
+
+def summarize_video_emotions(aggregator, analyzed_frames, total_frames, duration, reused_frames=0):
+    """Build the video analysis response from the aggregated detections"""
+    # Check if any emotions were detected
+    if not aggregator.frames:
+        logging.warning(f"No faces detected in video. Analyzed {analyzed_frames} frames out of {total_frames}")
+        return {
+            "error": "No faces detected in the video",
+            "message": "No faces or emotions could be detected in the video. Try with a clearer video showing faces.",
+            "frames_analyzed": analyzed_frames,
+            "frames_reused": reused_frames,
+            "total_frames": total_frames,
+            "success": False
+        }
+
+    # Prepare detailed response
+    response = {
+        "success": True,
+        "frames_analyzed": analyzed_frames,
+        "frames_reused": reused_frames,
+        "total_frames": total_frames,
+        "video_duration": round(duration, 2),
+        "model_used": "deepface-vggface2 (frame-by-frame analysis)"
+    }
+    response.update(aggregator.to_response())
+
+    logging.info(f"Video analysis complete: {response['dominant_emotion']} detected in {aggregator.frames} frames ({analyzed_frames} analyzed, {reused_frames} reused)")
+    return response
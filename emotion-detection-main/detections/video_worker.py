@@ -0,0 +1,30 @@
+"""
+Video segment worker
+Entry points of the spawned processes that analyze video segments. Kept
+apart from the package's other modules so a worker imports only OpenCV,
+DeepFace and the frame-range analysis, not the text models or Groq.
+"""
+
+import logging
+
+import cv2
+
+from detections.video_detection import DeepFace, analyze_frame_range
+
+
+def init_segment_worker():
+    """Load DeepFace and its emotion model once per worker process"""
+    logging.basicConfig(level=logging.INFO)
+    try:
+        DeepFace.build_model(model_name="Emotion", task="facial_attribute")
+    except TypeError:
+        DeepFace.build_model("Emotion")
+
+
+def analyze_segment(video_path, start_frame, end_frame, step, fps):
+    """Process pool entry point: analyze one frame range of a video (seekable containers only)"""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        return analyze_frame_range(cap, start_frame, end_frame, step, fps)
+    finally:
+        cap.release()
@@ -0,0 +1,323 @@
+"""
+Groq API Gateway
+One shared Groq client for every module, with pooled HTTP connections,
+per-call deadlines, a circuit breaker and per-call latency/error metrics
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+import httpx
+from groq import Groq
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables (fall back to the project .env when run from elsewhere)
+load_dotenv()
+if not os.getenv('GROQ_API_KEY'):
+    root_env = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+    if os.path.exists(root_env):
+        load_dotenv(root_env)
+
+GROQ_MODEL = "llama-3.1-8b-instant"
+
+# Default deadline for one Groq call, in seconds
+GROQ_TIMEOUT_SECONDS = float(os.getenv('GROQ_TIMEOUT_SECONDS', '8'))
+
+# SDK-level retries per call (kept low so the deadline is honoured)
+GROQ_MAX_RETRIES = int(os.getenv('GROQ_MAX_RETRIES', '0'))
+
+# HTTP connection pool size shared by all request threads
+GROQ_MAX_CONNECTIONS = int(os.getenv('GROQ_MAX_CONNECTIONS', '20'))
+
+# Consecutive failures that open the breaker, and how long it stays open
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('GROQ_BREAKER_FAILURES', '5'))
+BREAKER_RESET_SECONDS = float(os.getenv('GROQ_BREAKER_RESET_SECONDS', '30'))
+
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half_open'
+
+
+class GroqUnavailable(Exception):
+    """Raised when Groq is not configured or the circuit breaker is open"""
+
+
+class GroqStreamInterrupted(Exception):
+    """Raised when a streamed reply fails after part of it was already sent to the client"""
+
+
+class CircuitBreaker:
+    """
+    Opens after a run of consecutive failures so callers skip straight to
+    their local fallback. After the reset period one probe call is let
+    through; its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self, consume=True):
+        """Return True if a call may go through (consume=False only peeks)"""
+        with self._lock:
+            if self.state == BREAKER_CLOSED:
+                return True
+            if self.state == BREAKER_OPEN:
+                if time.time() - self.opened_at < self.reset_seconds:
+                    return False
+                if consume:
+                    self.state = BREAKER_HALF_OPEN
+                    self._probe_in_flight = True
+                return True
+            # Half-open: only the single probe call is allowed
+            if self._probe_in_flight:
+                return False
+            if consume:
+                self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = BREAKER_CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        """Free the probe slot of a call that ended without an outcome (e.g. an abandoned stream)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == BREAKER_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != BREAKER_OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Groq circuit breaker opened after {self.consecutive_failures} failures")
+                self.state = BREAKER_OPEN
+                self.opened_at = time.time()
+
+    def status(self):
+        status = {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'times_opened': self.times_opened,
+        }
+        if self.state == BREAKER_OPEN:
+            status['retry_in_seconds'] = round(max(0.0, self.reset_seconds - (time.time() - self.opened_at)), 1)
+        return status
+
+
+class CallMetrics:
+    """Per-purpose call counters and latency percentiles"""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def record(self, purpose, latency=None, error=None, rejected=False):
+        with self._lock:
+            entry = self._data.setdefault(purpose, {
+                'calls': 0, 'errors': 0, 'timeouts': 0, 'rejected': 0,
+                'latencies': deque(maxlen=self.window),
+            })
+            if rejected:
+                entry['rejected'] += 1
+                return
+            entry['calls'] += 1
+            if latency is not None:
+                entry['latencies'].append(latency)
+            if error is not None:
+                entry['errors'] += 1
+                if isinstance(error, httpx.TimeoutException) or 'timeout' in type(error).__name__.lower():
+                    entry['timeouts'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for purpose, entry in self._data.items():
+                latencies = sorted(entry['latencies'])
+                result[purpose] = {
+                    'calls': entry['calls'],
+                    'errors': entry['errors'],
+                    'timeouts': entry['timeouts'],
+                    'rejected': entry['rejected'],
+                    'p50_ms': round(_percentile(latencies, 0.50) * 1000, 1) if latencies else None,
+                    'p95_ms': round(_percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+                    'max_ms': round(latencies[-1] * 1000, 1) if latencies else None,
+                }
+            return result
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class GroqGateway:
+    """Shared entry point for every Groq chat completion in the app"""
+
+    def __init__(self):
+        self.breaker = CircuitBreaker()
+        self.metrics = CallMetrics()
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get_client(self):
+        """Return the pooled Groq client, or None if GROQ_API_KEY is not set"""
+        # Rebuild after a fork so worker processes do not share sockets
+        if self._client is not None and self._pid == os.getpid():
+            return self._client
+
+        api_key = os.getenv('GROQ_API_KEY')
+        if not api_key:
+            return None
+
+        with self._lock:
+            if self._client is None or self._pid != os.getpid():
+                try:
+                    http_client = httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=GROQ_MAX_CONNECTIONS,
+                            max_keepalive_connections=GROQ_MAX_CONNECTIONS,
+                        ),
+                        timeout=GROQ_TIMEOUT_SECONDS,
+                    )
+                    self._client = Groq(
+                        api_key=api_key,
+                        http_client=http_client,
+                        timeout=GROQ_TIMEOUT_SECONDS,
+                        max_retries=GROQ_MAX_RETRIES,
+                    )
+                    self._pid = os.getpid()
+                except Exception as e:
+                    logger.error(f"Failed to initialize Groq client: {e}")
+                    self._client = None
+        return self._client
+
+    def is_available(self):
+        """True when Groq is configured and the circuit breaker would let a call through"""
+        return bool(os.getenv('GROQ_API_KEY')) and self.breaker.allow(consume=False)
+
+    def chat_completion(self, purpose, messages, timeout=None, model=GROQ_MODEL, **kwargs):
+        """
+        Create a chat completion through the shared client
+
+        Args:
+            purpose (str): Metrics label for the caller (e.g. "text_emotion")
+            messages (list): Chat messages
+            timeout (float): Deadline for this call in seconds (default GROQ_TIMEOUT_SECONDS)
+
+        Raises:
+            GroqUnavailable: If Groq is not configured or the breaker is open
+        """
+        client = self.get_client()
+        if client is None:
+            raise GroqUnavailable("GROQ_API_KEY is not configured")
+        if not self.breaker.allow():
+            self.metrics.record(purpose, rejected=True)
+            raise GroqUnavailable("Groq circuit breaker is open")
+
+        start = time.monotonic()
+        try:
+            completion = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                timeout=timeout or GROQ_TIMEOUT_SECONDS,
+                **kwargs
+            )
+        except Exception as e:
+            self.breaker.record_failure()
+            self.metrics.record(purpose, time.monotonic() - start, error=e)
+            raise
+
+        self.breaker.record_success()
+        self.metrics.record(purpose, time.monotonic() - start)
+        return completion
+
+    def stream_chat_completion(self, purpose, messages, timeout=None, model=GROQ_MODEL, **kwargs):
+        """
+        Stream a chat completion, yielding text deltas as they arrive
+
+        The deadline applies to each read from the stream. Breaker and
+        metrics are updated once the stream finishes, fails or is abandoned
+        (closed by the consumer, e.g. a client that disconnects mid-reply),
+        and the upstream response is always closed.
+
+        Raises:
+            GroqUnavailable: If Groq is not configured or the breaker is open
+        """
+        client = self.get_client()
+        if client is None:
+            raise GroqUnavailable("GROQ_API_KEY is not configured")
+        if not self.breaker.allow():
+            self.metrics.record(purpose, rejected=True)
+            raise GroqUnavailable("Groq circuit breaker is open")
+
+        start = time.monotonic()
+        stream = None
+        received = False
+        finished = False
+        error = None
+        try:
+            stream = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                timeout=timeout or GROQ_TIMEOUT_SECONDS,
+                stream=True,
+                **kwargs
+            )
+            for chunk in stream:
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        received = True
+                        yield delta
+            finished = True
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # Also runs on GeneratorExit, so an abandoned probe never leaves the breaker half-open for good
+            if stream is not None and hasattr(stream, 'close'):
+                try:
+                    stream.close()
+                except Exception as e:
+                    logger.debug(f"Closing Groq stream failed: {e}")
+            elapsed = time.monotonic() - start
+            if error is not None:
+                self.breaker.record_failure()
+                self.metrics.record(purpose, elapsed, error=error)
+            elif finished or received:
+                self.breaker.record_success()
+                self.metrics.record(purpose, elapsed)
+            else:
+                # Abandoned before Groq answered: no verdict on Groq's health
+                self.breaker.release()
+                self.metrics.record(purpose, elapsed)
+
+    def stats(self):
+        """Return breaker state and per-call metrics"""
+        return {
+            'configured': bool(os.getenv('GROQ_API_KEY')),
+            'timeout_seconds': GROQ_TIMEOUT_SECONDS,
+            'circuit_breaker': self.breaker.status(),
+            'calls': self.metrics.snapshot(),
+        }
+
+
+groq_gateway = GroqGateway()
@@ -0,0 +1,216 @@
+"""
+Background Job Module
+Runs long analyses (video, bulk text) on a bounded worker pool with
+progress reporting; job state and results are persisted to MongoDB
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from models import create_job, update_job, find_job
+
+logger = logging.getLogger(__name__)
+
+# Jobs running at the same time
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+
+# Jobs allowed to wait for a worker before new submissions are refused
+JOB_QUEUE_LIMIT = int(os.getenv('JOB_QUEUE_LIMIT', '32'))
+
+# Finished jobs are kept in memory this long (MongoDB keeps them afterwards)
+JOB_RETENTION_SECONDS = int(os.getenv('JOB_RETENTION_SECONDS', '3600'))
+
+# Progress is written to MongoDB at most this often per job
+PROGRESS_PERSIST_SECONDS = 1.0
+
+STATE_QUEUED = 'queued'
+STATE_RUNNING = 'running'
+STATE_SUCCEEDED = 'succeeded'
+STATE_FAILED = 'failed'
+TERMINAL_STATES = (STATE_SUCCEEDED, STATE_FAILED)
+
+
+class JobQueueFull(Exception):
+    """Raised when JOB_QUEUE_LIMIT jobs are already waiting"""
+
+
+class Job:
+    """State of one background job"""
+
+    def __init__(self, job_type, params=None, user_id=None, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.type = job_type
+        self.params = params or {}
+        self.user_id = user_id
+        self.state = STATE_QUEUED
+        self.progress = 0
+        self.message = None
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return self.state in TERMINAL_STATES
+
+    def to_dict(self, include_result=True):
+        data = {
+            'job_id': self.id,
+            'job_type': self.type,
+            'state': self.state,
+            'progress': self.progress,
+            'message': self.message,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if include_result and self.state == STATE_SUCCEEDED:
+            data['result'] = self.result
+        return data
+
+    @classmethod
+    def from_document(cls, doc):
+        """Rebuild a job from its MongoDB document"""
+        job = cls(doc['job_type'], doc.get('params'), doc.get('user_id'), job_id=doc['job_id'])
+        job.state = doc.get('state', STATE_QUEUED)
+        job.progress = doc.get('progress', 0)
+        job.message = doc.get('message')
+        job.result = doc.get('result')
+        job.error = doc.get('error')
+        job.created_at = doc.get('created_at') or job.created_at
+        job.started_at = doc.get('started_at')
+        job.finished_at = doc.get('finished_at')
+        return job
+
+
+class JobManager:
+    """
+    Bounded pool of background workers.
+
+    Handlers are registered per job type as handler(params, progress) and
+    return a JSON-serializable result; progress(percent, message) reports
+    how far along the job is. Jobs keep running when the client that
+    submitted them disconnects.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, queue_limit=JOB_QUEUE_LIMIT):
+        self.workers = max(1, workers)
+        self.queue_limit = max(1, queue_limit)
+        self._handlers = {}
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def register_handler(self, job_type, handler):
+        """Register the function that runs jobs of job_type"""
+        self._handlers[job_type] = handler
+
+    def submit(self, job_type, params=None, user_id=None, on_success=None):
+        """
+        Queue a job and return it immediately
+
+        Args:
+            job_type (str): A registered job type
+            params (dict): Arguments passed to the handler (persisted with the job)
+            user_id (str): Owner of the job (optional)
+            on_success (callable): Called with the result after the job succeeds
+
+        Raises:
+            KeyError: If job_type has no handler
+            JobQueueFull: If too many jobs are already waiting
+        """
+        handler = self._handlers[job_type]
+        job = Job(job_type, params, user_id)
+
+        with self._lock:
+            self._prune()
+            waiting = sum(1 for j in self._jobs.values() if j.state == STATE_QUEUED)
+            if waiting >= self.queue_limit:
+                raise JobQueueFull(f"{waiting} jobs are already queued")
+            self._jobs[job.id] = job
+
+        create_job(job.id, job_type, user_id=user_id, params=job.params)
+        self._get_executor().submit(self._run, job, handler, on_success)
+        logger.info(f"Queued {job_type} job {job.id}")
+        return job
+
+    def get(self, job_id):
+        """Return a job by id from memory, or from MongoDB once it has been pruned"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        doc = find_job(job_id)
+        return Job.from_document(doc) if doc else None
+
+    def stats(self):
+        """Return job counts by state"""
+        counts = {}
+        for job in list(self._jobs.values()):
+            counts[job.state] = counts.get(job.state, 0) + 1
+        return {'workers': self.workers, 'queue_limit': self.queue_limit, 'jobs': counts}
+
+    def _get_executor(self):
+        # Recreate after a fork so each gunicorn worker has its own threads
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, job, handler, on_success):
+        job.state = STATE_RUNNING
+        job.started_at = datetime.utcnow()
+        update_job(job.id, state=job.state, started_at=job.started_at)
+
+        last_persist = [0.0]
+
+        def progress(percent, message=None):
+            job.progress = max(job.progress, min(100, int(percent)))
+            job.message = message
+            now = time.monotonic()
+            if now - last_persist[0] >= PROGRESS_PERSIST_SECONDS:
+                last_persist[0] = now
+                update_job(job.id, progress=job.progress, message=message)
+
+        try:
+            job.result = handler(job.params, progress)
+            job.progress = 100
+            job.state = STATE_SUCCEEDED
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.type}) failed: {e}", exc_info=True)
+            job.error = str(e)
+            job.state = STATE_FAILED
+        finally:
+            job.finished_at = datetime.utcnow()
+            update_job(
+                job.id, state=job.state, progress=job.progress, message=job.message,
+                result=job.result, error=job.error, finished_at=job.finished_at
+            )
+
+        if job.state == STATE_SUCCEEDED and on_success:
+            try:
+                on_success(job.result)
+            except Exception as e:
+                logger.warning(f"Job {job.id} success callback failed: {e}")
+        logger.info(f"Job {job.id} ({job.type}) {job.state}")
+
+    def _prune(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=JOB_RETENTION_SECONDS)
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.done and job.finished_at and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+job_manager = JobManager()
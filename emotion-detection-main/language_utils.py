@@ -3,9 +3,12 @@ Language Detection and Multilingual Support Module
 Detects user language and provides multilingual responses
 """
 
+import os
+import re
 import logging
-from langdetect import detect, DetectorFactory
-from deep_translator import GoogleTranslator
+from functools import lru_cache
+from langdetect import detect_langs, DetectorFactory
+from translation import translator
 from dotenv import load_dotenv
 
 # Fix seed for consistent results
@@ -57,12 +60,187 @@ SUPPORTED_LANGUAGES = {
     'tr': 'Turkish',
     'el': 'Greek',
     'he': 'Hebrew',
+    'ur': 'Urdu',
 }
 
+# Unicode blocks of each script; 'cyrillic', 'arabic' and 'devanagari' are shared
+# by several languages and resolved from distinguishing letters and words
+SCRIPT_RANGES = [
+    (0x0370, 0x03FF, 'el'),
+    (0x0400, 0x04FF, 'cyrillic'),
+    (0x0590, 0x05FF, 'he'),
+    (0x0600, 0x06FF, 'arabic'),
+    (0x0750, 0x077F, 'arabic'),
+    (0x0900, 0x097F, 'devanagari'),
+    (0x0980, 0x09FF, 'bn'),
+    (0x0A00, 0x0A7F, 'pa'),
+    (0x0A80, 0x0AFF, 'gu'),
+    (0x0B00, 0x0B7F, 'or'),
+    (0x0B80, 0x0BFF, 'ta'),
+    (0x0C00, 0x0C7F, 'te'),
+    (0x0C80, 0x0CFF, 'kn'),
+    (0x0D00, 0x0D7F, 'ml'),
+    (0x0E00, 0x0E7F, 'th'),
+    (0x1100, 0x11FF, 'ko'),
+    (0x3040, 0x30FF, 'ja'),
+    (0x3130, 0x318F, 'ko'),
+    (0x3400, 0x4DBF, 'zh-cn'),
+    (0x4E00, 0x9FFF, 'zh-cn'),
+    (0xAC00, 0xD7AF, 'ko'),
+]
+
+# Letters only found in Ukrainian among Cyrillic languages
+UKRAINIAN_LETTERS = set('іїєґІЇЄҐ')
+
+# Urdu letters not used in Arabic (tteh, ddal, rreh, noon ghunna, yeh barree, do-chashmee heh, heh goal)
+URDU_LETTERS = set('ٹڈڑںےۓھہ')
+
+# Arabic letters not used in Urdu (teh marbuta, alef maksura)
+ARABIC_LETTERS = set('ةى')
+
+# Frequent function words that tell Hindi and Marathi apart
+HINDI_WORDS = {'है', 'हैं', 'हूं', 'हूँ', 'मैं', 'में', 'नहीं', 'और', 'का', 'की', 'के', 'को', 'से', 'था', 'थी', 'बहुत', 'क्या', 'यह'}
+MARATHI_WORDS = {'आहे', 'आहेत', 'मी', 'आणि', 'नाही', 'खूप', 'मला', 'माझा', 'माझी', 'माझे', 'काय', 'होते', 'होता', 'पण', 'तुम्ही'}
+
+# Marathi letter not used in Hindi
+MARATHI_LETTER = 'ळ'
+
+# Frequent words that are distinctly English, used by the ASCII fast path. Words that are
+# also common in Spanish, German, Italian, French or Dutch ('a', 'me', 'in', 'so', 'was',
+# 'am', 'do', ...) are left out so those texts still reach langdetect
+ENGLISH_MARKER_WORDS = {
+    'my', 'you', 'your', 'she', 'it', 'they', 'them', 'is', 'are', 'were', 'be', 'been',
+    'have', 'had', 'does', 'did', 'the', 'and', 'but', 'with', 'about', 'this', 'that',
+    'what', 'why', 'how', 'when', 'not', "don't", "i'm", "it's", "i've", "can't", 'can',
+    'just', 'feel', 'feeling', 'today', 'really', 'very', 'too',
+}
+
+# Share of words that must be English markers before langdetect is skipped
+ENGLISH_MARKER_RATIO = 0.3
+
+# Texts of one or two words are only taken as English when every word is in this list
+# (or ENGLISH_MARKER_WORDS); anything else goes to langdetect
+SHORT_ENGLISH_WORDS = {
+    'hi', 'hello', 'hey', 'ok', 'okay', 'yes', 'no', 'yeah', 'thanks', 'thank', 'please',
+    'good', 'bad', 'fine', 'great', 'happy', 'sad', 'angry', 'tired', 'bored', 'lonely',
+    'scared', 'love', 'hate', 'sorry', 'wow', 'lol', 'morning', 'night', 'bye',
+}
+
+# Only the start of long texts is inspected
+DETECTION_SAMPLE_CHARS = 1000
+
+# Number of distinct texts whose detected language is remembered
+LANGUAGE_CACHE_SIZE = int(os.getenv('LANGUAGE_CACHE_SIZE', '4096'))
+
+_word_pattern = re.compile(r"[a-z']+")
+
+
+def _script_language(text):
+    """
+    Identify the language from the dominant non-Latin script
+
+    Returns:
+        tuple: (language_code, share of letters in that script), or (None, 0.0)
+    """
+    counts = {}
+    letters = 0
+    for char in text:
+        if not char.isalpha():
+            continue
+        letters += 1
+        code_point = ord(char)
+        if code_point < 0x0370:
+            continue
+        for low, high, lang_code in SCRIPT_RANGES:
+            if low <= code_point <= high:
+                counts[lang_code] = counts.get(lang_code, 0) + 1
+                break
+
+    if not counts:
+        return None, 0.0
+
+    # Kana marks Japanese even when most characters are shared CJK ideographs
+    if 'ja' in counts and 'zh-cn' in counts:
+        counts['ja'] += counts.pop('zh-cn')
+
+    lang_code, count = max(counts.items(), key=lambda item: item[1])
+    share = count / letters
+    if share < 0.5:
+        return None, 0.0
+    if lang_code == 'cyrillic':
+        lang_code = 'uk' if any(char in UKRAINIAN_LETTERS for char in text) else 'ru'
+    elif lang_code == 'arabic':
+        lang_code = _arabic_script_language(text)
+    elif lang_code == 'devanagari':
+        lang_code = _devanagari_language(text)
+    if lang_code is None:
+        return None, 0.0
+    return lang_code, share
+
+
+def _arabic_script_language(text):
+    """Tell Urdu from Arabic by letters only one of them uses (None if neither appears)"""
+    urdu = sum(1 for char in text if char in URDU_LETTERS)
+    arabic = sum(1 for char in text if char in ARABIC_LETTERS)
+    if urdu > arabic:
+        return 'ur'
+    if arabic > urdu:
+        return 'ar'
+    return None
+
+
+def _devanagari_language(text):
+    """Tell Marathi from Hindi by frequent function words and the letter ळ (None if undecided)"""
+    words = [word.strip('।॥.,!?;:"\'()') for word in text.split()]
+    hindi = sum(1 for word in words if word in HINDI_WORDS)
+    marathi = sum(1 for word in words if word in MARATHI_WORDS) + text.count(MARATHI_LETTER)
+    if marathi > hindi:
+        return 'mr'
+    if hindi > marathi:
+        return 'hi'
+    return None
+
+
+def _looks_english(text):
+    """Cheap check for plain ASCII text that is clearly English"""
+    if not text.isascii():
+        return False
+    tokens = _word_pattern.findall(text.lower())
+    if not tokens:
+        return False
+    if len(tokens) <= 2:
+        # Too short for the ratio below; only a few common English words are trusted
+        return all(token in ENGLISH_MARKER_WORDS or token in SHORT_ENGLISH_WORDS for token in tokens)
+    hits = sum(1 for token in tokens if token in ENGLISH_MARKER_WORDS)
+    return hits >= 2 and hits / len(tokens) >= ENGLISH_MARKER_RATIO
+
+
+@lru_cache(maxsize=LANGUAGE_CACHE_SIZE)
+def _detect_language_cached(sample):
+    lang_code, confidence = _script_language(sample)
+    if lang_code:
+        return lang_code, confidence, 'script'
+
+    if _looks_english(sample):
+        return 'en', 1.0, 'heuristic'
+
+    # Slow path: langdetect for Latin-script languages and undecided Arabic/Devanagari text
+    best = detect_langs(sample)[0]
+    lang_code = best.lang
+    if lang_code.startswith('zh') and lang_code not in ('zh-cn', 'zh-tw'):
+        lang_code = 'zh-cn'  # Default to Simplified Chinese
+    return lang_code, round(best.prob, 4), 'langdetect'
+
+
 def detect_language(text):
     """
     Detect the language of the given text.
     
+    Non-Latin scripts are identified directly from their Unicode block (Arabic
+    script and Devanagari by letters and words that separate Urdu/Arabic and
+    Marathi/Hindi) and plain English is caught by a check for distinctly
+    English words; langdetect only runs for the remaining text. Results are memoized per text.
+    
     Args:
         text (str): The text to analyze
         
@@ -73,28 +251,32 @@ def detect_language(text):
         if not text or len(text.strip()) < 2:
             return 'en', 'English', 1.0
         
-        # Detect language
-        lang_code = detect(text)
-        
-        # Map to standard codes (langdetect uses specific format)
-        if lang_code == 'zh-cn':
-            lang_code = 'zh-cn'
-        elif lang_code == 'zh-tw':
-            lang_code = 'zh-tw'
-        elif lang_code.startswith('zh'):
-            lang_code = 'zh-cn'  # Default to Simplified Chinese
-        
+        sample = " ".join(text[:DETECTION_SAMPLE_CHARS].split())
+        lang_code, confidence, method = _detect_language_cached(sample)
         lang_name = SUPPORTED_LANGUAGES.get(lang_code, 'English')
         
-        logger.info(f"Detected language: {lang_code} ({lang_name}) for text: {text[:50]}")
+        logger.debug(f"Detected language: {lang_code} ({lang_name}) via {method} for text: {text[:50]}")
         
-        return lang_code, lang_name, 1.0
+        return lang_code, lang_name, confidence
         
     except Exception as e:
         logger.warning(f"Language detection failed: {e}. Defaulting to English.")
         return 'en', 'English', 0.0
 
 
+def get_language_detection_stats():
+    """Return hit/miss counters of the language detection memo"""
+    info = _detect_language_cached.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'hit_rate': round(info.hits / lookups, 4) if lookups else 0.0,
+        'entries': info.currsize,
+        'max_entries': info.maxsize,
+    }
+
+
 def translate_to_english(text, source_language=None):
     """
     Translate text to English if not already in English.
@@ -118,9 +300,8 @@ def translate_to_english(text, source_language=None):
         if source_language == 'en':
             return text, 'en', False
         
-        # Translate to English
-        translator = GoogleTranslator(source_auto=True, target='en')
-        translated = translator.translate(text)
+        # Translate to English (cached per text, bounded by TRANSLATION_TIMEOUT_SECONDS)
+        translated = translator.translate(text, target='en')
         
         logger.info(f"Translated from {source_language} to English")
         
@@ -131,6 +312,33 @@ def translate_to_english(text, source_language=None):
         return text, source_language or 'unknown', False
 
 
+def translate_many_to_english(texts, languages):
+    """
+    Translate a list of texts to English with one bulk (chunked) translation.
+    
+    Args:
+        texts (list): The texts to translate
+        languages (list): Language code of each text; English texts are left as is
+        
+    Returns:
+        list: (translated_text, was_translated) tuples in the same order as texts
+    """
+    results = [(text, False) for text in texts]
+    pending = [i for i, (text, lang) in enumerate(zip(texts, languages))
+               if lang != 'en' and text and len(text.strip()) >= 2]
+    if not pending:
+        return results
+    
+    try:
+        translations = translator.translate_many([texts[i] for i in pending], target='en')
+        for index, translated in zip(pending, translations):
+            results[index] = (translated, True)
+        logger.info(f"Translated {len(pending)} texts to English")
+    except Exception as e:
+        logger.warning(f"Bulk translation to English failed: {e}. Using original texts.")
+    return results
+
+
 def translate_to_language(text, target_language='en'):
     """
     Translate text to target language.
@@ -151,8 +359,7 @@ def translate_to_language(text, target_language='en'):
             return text, True
         
         # Translate
-        translator = GoogleTranslator(source_auto=True, target=target_language)
-        translated = translator.translate(text)
+        translated = translator.translate(text, target=target_language)
         
         logger.info(f"Translated to {target_language}")
         
@@ -163,6 +370,64 @@ def translate_to_language(text, target_language='en'):
         return text, False
 
 
+def get_language_name(language_code):
+    """Return the display name for a language code (the code itself if unknown)"""
+    return SUPPORTED_LANGUAGES.get(language_code, language_code)
+
+
+class TextAnalysisContext:
+    """
+    Per-request state for analyzing one text.
+    
+    Built once per request and passed through the detection layers so that
+    language detection and translation each run at most once. Language is
+    detected on first access unless given; the English translation is made
+    on first access of english_text. The gibberish verdict and emotion
+    result are filled in by the detection module.
+    """
+    
+    def __init__(self, text, language=None):
+        self.text = text
+        self._language = language
+        self._language_name = get_language_name(language) if language else None
+        self._english_text = None
+        self._was_translated = False
+        self.gibberish = None
+        self.emotion_result = None
+        self.status_code = None
+    
+    @property
+    def language(self):
+        if self._language is None:
+            self._language, self._language_name, _ = detect_language(self.text)
+        return self._language
+    
+    @property
+    def language_name(self):
+        self.language
+        return self._language_name
+    
+    @property
+    def english_text(self):
+        """The text in English (translated on first access when needed)"""
+        if self._english_text is None:
+            if self.language == 'en':
+                self._english_text = self.text
+            else:
+                self._english_text, _, self._was_translated = translate_to_english(self.text, self.language)
+        return self._english_text
+    
+    @property
+    def was_translated(self):
+        self.english_text
+        return self._was_translated
+    
+    def set_english_text(self, english_text, was_translated):
+        """Record a translation made elsewhere (e.g. by a bulk translation call)"""
+        self._english_text = english_text
+        self._was_translated = was_translated
+
+
 def get_multilingual_emotion_response(emotion_label, user_language='en'):
     """
     Get emotion-aware responses in multiple languages.
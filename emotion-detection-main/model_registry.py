@@ -0,0 +1,153 @@
+"""
+Model Loading Registry
+Single-flight, background-warmed loading of heavy ML models with
+per-model readiness states (idle / loading / ready / failed)
+"""
+
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+STATE_IDLE = 'idle'
+STATE_LOADING = 'loading'
+STATE_READY = 'ready'
+STATE_FAILED = 'failed'
+
+# Seconds a client is told to wait (Retry-After) while a model warms up
+RETRY_AFTER_SECONDS = int(os.getenv('MODEL_RETRY_AFTER_SECONDS', '5'))
+
+# A failed model is retried on demand once this many seconds have passed
+FAILED_RETRY_SECONDS = int(os.getenv('MODEL_FAILED_RETRY_SECONDS', '60'))
+
+
+class ModelNotReady(Exception):
+    """Raised when a model is requested before it has finished loading"""
+
+    def __init__(self, name, state, error=None):
+        self.name = name
+        self.state = state
+        self.error = error
+        self.retry_after = RETRY_AFTER_SECONDS
+        message = f"Model '{name}' is {state}"
+        if error:
+            message += f": {error}"
+        super().__init__(message)
+
+
+class ModelSlot:
+    """Holds one lazily loaded model; concurrent callers share a single load"""
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.state = STATE_IDLE
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._value = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self):
+        """Begin loading in a background thread unless already loading or loaded"""
+        with self._lock:
+            if self.state in (STATE_LOADING, STATE_READY):
+                return
+            if self.state == STATE_FAILED and time.time() - (self.finished_at or 0) < FAILED_RETRY_SECONDS:
+                return
+            self.state = STATE_LOADING
+            self.error = None
+            self.started_at = time.time()
+            self._done.clear()
+        threading.Thread(target=self._load, name=f"load-{self.name}", daemon=True).start()
+
+    def get(self, wait=False, timeout=None):
+        """
+        Return the loaded model.
+
+        Starts loading if needed. Without wait, raises ModelNotReady
+        immediately while the model is loading or after it failed.
+        """
+        if self.state == STATE_READY:
+            return self._value
+        self.start()
+        if wait:
+            self._done.wait(timeout)
+        if self.state == STATE_READY:
+            return self._value
+        raise ModelNotReady(self.name, self.state, self.error)
+
+    def status(self):
+        """Return the readiness state and load timings"""
+        status = {'state': self.state}
+        if self.started_at:
+            end = self.finished_at if self.state != STATE_LOADING else time.time()
+            status['load_seconds'] = round((end or time.time()) - self.started_at, 2)
+        if self.error:
+            status['error'] = self.error
+        return status
+
+    def _load(self):
+        logger.info(f"Loading model '{self.name}'...")
+        try:
+            value = self.loader()
+            with self._lock:
+                self._value = value
+                self.state = STATE_READY
+                self.finished_at = time.time()
+            logger.info(f"Model '{self.name}' ready in {self.finished_at - self.started_at:.1f}s")
+        except Exception as e:
+            with self._lock:
+                self.state = STATE_FAILED
+                self.error = str(e)
+                self.finished_at = time.time()
+            logger.error(f"Model '{self.name}' failed to load: {e}")
+        finally:
+            self._done.set()
+
+
+_models = {}
+_registry_lock = threading.Lock()
+
+
+def register_model(name, loader):
+    """Register a loader under name (the first registration wins)"""
+    with _registry_lock:
+        if name not in _models:
+            _models[name] = ModelSlot(name, loader)
+        return _models[name]
+
+
+def get_model(name, wait=False, timeout=None):
+    """Return a registered model, raising ModelNotReady while it is unavailable"""
+    slot = _models.get(name)
+    if slot is None:
+        raise ModelNotReady(name, STATE_IDLE, "not registered")
+    return slot.get(wait=wait, timeout=timeout)
+
+
+def is_model_ready(name, start=True):
+    """Check whether a model is ready, optionally starting its load"""
+    slot = _models.get(name)
+    if slot is None:
+        return False
+    if start and slot.state != STATE_READY:
+        slot.start()
+    return slot.state == STATE_READY
+
+
+def warm_models(*names):
+    """Load the given (or all registered) models one after another, blocking"""
+    for name in names or list(_models):
+        try:
+            get_model(name, wait=True)
+        except ModelNotReady:
+            pass  # Already logged by the slot
+
+
+def get_model_states():
+    """Return the status of every registered model"""
+    return {name: slot.status() for name, slot in list(_models.items())}
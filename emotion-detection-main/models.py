@@ -322,3 +322,51 @@ def get_global_chat_stats(start_date=None, end_date=None):
     except Exception as e:
         logger.error(f"Error getting global chat stats: {e}")
         return {'text_emotion_distribution': {}, 'face_emotion_distribution': {}}
+
+# Helper functions for background job operations
+def create_job(job_id, job_type, user_id=None, state='queued', params=None):
+    """Create a background job document"""
+    try:
+        if not is_db_connected():
+            logger.warning("Database not connected in create_job")
+            return None
+        job_doc = {
+            'job_id': job_id,
+            'job_type': job_type,
+            'user_id': user_id,
+            'state': state,
+            'progress': 0,
+            'message': None,
+            'params': params or {},
+            'result': None,
+            'error': None,
+            'created_at': datetime.utcnow(),
+            'started_at': None,
+            'finished_at': None
+        }
+        mongo.db.jobs.insert_one(job_doc)
+        return job_doc
+    except Exception as e:
+        logger.error(f"Error creating job: {e}")
+        return None
+
+def update_job(job_id, **fields):
+    """Update fields of a background job document"""
+    try:
+        if not is_db_connected():
+            return None
+        return mongo.db.jobs.update_one({'job_id': job_id}, {'$set': fields})
+    except Exception as e:
+        logger.error(f"Error updating job: {e}")
+        return None
+
+def find_job(job_id):
+    """Find a background job by its id"""
+    try:
+        if not is_db_connected():
+            logger.warning("Database not connected in find_job")
+            return None
+        return mongo.db.jobs.find_one({'job_id': job_id})
+    except Exception as e:
+        logger.error(f"Error finding job: {e}")
+        return None
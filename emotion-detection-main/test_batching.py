@@ -0,0 +1,46 @@
+import threading
+import unittest
+
+from detections.batching import MicroBatcher
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_concurrent_items_share_a_batch(self):
+        batches = []
+        release = threading.Event()
+
+        def batch_fn(items):
+            release.wait(1)
+            batches.append(list(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=200)
+        futures = [batcher.submit(i) for i in range(5)]
+        release.set()
+
+        self.assertEqual([future.result(2) for future in futures], [0, 2, 4, 6, 8])
+        self.assertEqual(sum(len(batch) for batch in batches), 5)
+        self.assertLess(len(batches), 5)
+
+    def test_max_batch_size(self):
+        batcher = MicroBatcher(lambda items: items, max_batch_size=2, max_wait_ms=50)
+        futures = [batcher.submit(i) for i in range(5)]
+        self.assertEqual([future.result(2) for future in futures], list(range(5)))
+        self.assertLessEqual(batcher.stats()["largest_batch"], 2)
+
+    def test_batch_errors_reach_every_caller(self):
+        def batch_fn(items):
+            raise RuntimeError("model failed")
+
+        batcher = MicroBatcher(batch_fn, max_wait_ms=1)
+        with self.assertRaises(RuntimeError):
+            batcher.run("text", timeout=2)
+
+    def test_wrong_output_length_is_an_error(self):
+        batcher = MicroBatcher(lambda items: [], max_wait_ms=1)
+        with self.assertRaises(ValueError):
+            batcher.run("text", timeout=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
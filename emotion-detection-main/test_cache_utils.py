@@ -0,0 +1,58 @@
+import os
+import time
+import tempfile
+import unittest
+
+from cache_utils import TieredCache, make_cache_key, normalize_text
+
+
+class TestTieredCache(unittest.TestCase):
+    def test_memory_hit_and_miss(self):
+        cache = TieredCache("test", max_entries=4, ttl_seconds=60)
+        self.assertIsNone(cache.get("missing"))
+        cache.set("key", {"emotion": "joy"})
+        self.assertEqual(cache.get("key"), {"emotion": "joy"})
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = TieredCache("test", max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now the least recently used
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+
+    def test_expired_entries_are_misses(self):
+        cache = TieredCache("test", max_entries=4, ttl_seconds=0.01)
+        cache.set("key", 1)
+        time.sleep(0.05)
+        self.assertIsNone(cache.get("key"))
+
+    def test_disk_tier_survives_a_new_instance(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db_path = os.path.join(directory, "cache.db")
+            TieredCache("test", ttl_seconds=60, db_path=db_path).set("key", [1, 2])
+            cache = TieredCache("test", ttl_seconds=60, db_path=db_path)
+            self.assertEqual(cache.get("key"), [1, 2])
+            self.assertEqual(cache.stats()["disk_hits"], 1)
+
+    def test_uncacheable_values_are_skipped(self):
+        cache = TieredCache("test")
+        cache.set("key", object())
+        self.assertIsNone(cache.get("key"))
+
+
+class TestCacheKeys(unittest.TestCase):
+    def test_normalize_text(self):
+        self.assertEqual(normalize_text("  I am   HAPPY "), "I am HAPPY")
+        self.assertNotEqual(normalize_text("NO"), normalize_text("no"))
+
+    def test_keys_depend_on_every_part(self):
+        self.assertNotEqual(make_cache_key("text", "en", "groq"), make_cache_key("text", "en", "local-torch"))
+        self.assertNotEqual(make_cache_key("a", "bc"), make_cache_key("ab", "c"))
+
+
+if __name__ == "__main__":
+    unittest.main()
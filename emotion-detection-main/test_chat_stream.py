@@ -0,0 +1,64 @@
+import os
+import unittest
+from contextlib import closing
+from unittest import mock
+
+from groq_gateway import BREAKER_CLOSED
+from test_groq_gateway import FakeStream, make_gateway, open_breaker
+
+os.environ.setdefault('MODEL_WARMUP', '0')
+
+try:
+    import app as app_module
+except ImportError:
+    app_module = None
+
+
+@unittest.skipIf(app_module is None, "Flask app dependencies are not installed")
+class TestChatStreamDisconnect(unittest.TestCase):
+    def setUp(self):
+        self.upstream = FakeStream(["Hello", " there", "!"])
+        self.gateway = make_gateway(self.upstream)
+        open_breaker(self.gateway.breaker)
+
+        def stream_reply(user_message, emotion_label, emotion_score, user_language='en'):
+            # Same shape as detections.detection.stream_emotion_aware_response
+            with closing(self.gateway.stream_chat_completion("chat_reply_stream", messages=[])) as stream:
+                for delta in stream:
+                    yield delta
+
+        self.create_chat = mock.Mock()
+        patches = [
+            mock.patch.object(app_module, 'ML_AVAILABLE', True),
+            mock.patch.object(app_module, 'stream_emotion_aware_response', stream_reply),
+            mock.patch.object(app_module, 'detect_chat_emotion', return_value=('en', 'English', 'joy', 0.9)),
+            mock.patch.object(app_module, 'create_chat', self.create_chat),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.client = app_module.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['user_id'] = 'user-1234567890'
+
+    def test_disconnect_mid_reply_releases_breaker_probe(self):
+        response = self.client.post('/api/chat/stream', json={'message': 'hi'}, buffered=False)
+        events = iter(response.response)
+        self.assertIn(b'event: emotion', next(events))
+        self.assertIn(b'event: token', next(events))
+
+        # The probe call is in flight, so nothing else may reach Groq
+        self.assertFalse(self.gateway.breaker.allow(consume=False))
+
+        # Client goes away before the reply is finished
+        response.close()
+
+        self.assertTrue(self.upstream.closed)
+        self.assertEqual(self.gateway.breaker.state, BREAKER_CLOSED)
+        self.assertTrue(self.gateway.breaker.allow())
+        self.create_chat.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from detections.emotion_timeline import EmotionAggregator, scores_to_vector
+
+
+class TestEmotionAggregator(unittest.TestCase):
+    def build(self, frames, **kwargs):
+        aggregator = EmotionAggregator(**kwargs)
+        for emotion, confidence, timestamp in frames:
+            aggregator.add(emotion, confidence, timestamp)
+        return aggregator
+
+    def test_counts_and_dominant_emotion(self):
+        aggregator = self.build([("happy", 0.9, 0.0), ("happy", 0.7, 0.5), ("sad", 0.6, 1.0)])
+        response = aggregator.to_response()
+        self.assertEqual(response["dominant_emotion"], "happy")
+        self.assertEqual(response["emotion_distribution"], {"happy": 2, "sad": 1})
+        self.assertAlmostEqual(response["dominant_emotion_confidence"], 0.8, places=4)
+
+    def test_segments_are_run_length_encoded(self):
+        aggregator = self.build([("happy", 0.9, 0.0), ("happy", 0.9, 0.5), ("sad", 0.6, 1.0), ("happy", 0.8, 1.5)])
+        segments = aggregator.segment_timeline()
+        self.assertEqual([segment["emotion"] for segment in segments], ["happy", "sad", "happy"])
+        self.assertEqual((segments[0]["start"], segments[0]["end"], segments[0]["frames"]), (0.0, 0.5, 2))
+
+    def test_segment_limit(self):
+        frames = [("happy" if i % 2 else "sad", 0.5, i) for i in range(10)]
+        aggregator = self.build(frames, max_segments=3)
+        self.assertEqual(len(aggregator.segment_timeline()), 3)
+        self.assertTrue(aggregator.to_response()["timeline_segments_truncated"])
+
+    def test_extend_matches_a_single_pass(self):
+        frames = [("happy", 0.9, 0.0), ("happy", 0.8, 0.5), ("sad", 0.6, 1.0), ("sad", 0.7, 1.5)]
+        whole = self.build(frames)
+        first, second = self.build(frames[:2]), self.build(frames[2:])
+        first.extend(second)
+        self.assertEqual(first.to_response(), whole.to_response())
+
+    def test_series_is_downsampled(self):
+        frames = [("happy", 0.9, 0.1), ("happy", 0.9, 0.6), ("sad", 0.8, 1.2)]
+        series = self.build(frames, series=True, series_interval=1.0).downsampled_series()
+        self.assertEqual([(point["timestamp"], point["emotion"], point["frames"]) for point in series],
+                         [(0.0, "happy", 2), (1.0, "sad", 1)])
+
+    def test_scores_to_vector(self):
+        vector = scores_to_vector({"happy": 50, "sad": 25, "unknown": 10})
+        self.assertAlmostEqual(float(vector.sum()), 0.75, places=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
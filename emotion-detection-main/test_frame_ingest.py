@@ -0,0 +1,40 @@
+import base64
+import unittest
+
+from detections.frame_ingest import read_jpeg_size, decode_image, decode_base64_image
+
+
+class TestFrameIngest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open("sample_happy_face.jpg", "rb") as f:
+            cls.jpeg = f.read()
+
+    def test_read_jpeg_size(self):
+        self.assertEqual(read_jpeg_size(self.jpeg), (238, 180))
+
+    def test_read_jpeg_size_rejects_other_data(self):
+        self.assertIsNone(read_jpeg_size(b"\x89PNG\r\n\x1a\n"))
+        self.assertIsNone(read_jpeg_size(b""))
+
+    def test_decode_full_size(self):
+        image, scale = decode_image(self.jpeg, max_side=960)
+        self.assertEqual((image.shape[1], image.shape[0], scale), (238, 180, 1))
+
+    def test_decode_reduced(self):
+        image, scale = decode_image(self.jpeg, max_side=100)
+        self.assertEqual(scale, 2)
+        self.assertEqual((image.shape[1], image.shape[0]), (119, 90))
+
+    def test_decode_data_url(self):
+        data_url = "data:image/jpeg;base64," + base64.b64encode(self.jpeg).decode("ascii")
+        image, _ = decode_base64_image(data_url)
+        self.assertEqual(image.shape[:2], (180, 238))
+
+    def test_undecodable_bytes(self):
+        with self.assertRaises(ValueError):
+            decode_image(b"not an image")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import unittest
+from types import SimpleNamespace
+
+from groq_gateway import GroqGateway, CircuitBreaker, BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN
+
+
+def chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeStream:
+    def __init__(self, parts, error=None):
+        self.parts = parts
+        self.error = error
+        self.closed = False
+
+    def __iter__(self):
+        for part in self.parts:
+            yield chunk(part)
+        if self.error:
+            raise self.error
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    def __init__(self, stream):
+        self.stream = stream
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: self.stream))
+
+
+def make_gateway(stream):
+    gateway = GroqGateway()
+    gateway._client = FakeClient(stream)
+    gateway._pid = os.getpid()
+    return gateway
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.reset_seconds
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, BREAKER_CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, BREAKER_OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_single_probe_when_half_open(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+        open_breaker(breaker)
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, BREAKER_HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, BREAKER_CLOSED)
+        self.assertTrue(breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_seconds=60)
+        open_breaker(breaker)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, BREAKER_OPEN)
+
+
+class TestStreamChatCompletion(unittest.TestCase):
+    def test_completed_stream_closes_breaker(self):
+        stream = FakeStream(["Hel", "lo"])
+        gateway = make_gateway(stream)
+        open_breaker(gateway.breaker)
+        self.assertEqual("".join(gateway.stream_chat_completion("test", [])), "Hello")
+        self.assertEqual(gateway.breaker.state, BREAKER_CLOSED)
+        self.assertTrue(stream.closed)
+
+    def test_abandoned_probe_releases_the_breaker(self):
+        # A client that disconnects mid-reply closes the generator (GeneratorExit)
+        stream = FakeStream(["Hel", "lo"])
+        gateway = make_gateway(stream)
+        open_breaker(gateway.breaker)
+        replies = gateway.stream_chat_completion("test", [])
+        self.assertEqual(next(replies), "Hel")
+        replies.close()
+        self.assertTrue(stream.closed)
+        self.assertTrue(gateway.breaker.allow())
+        self.assertEqual(gateway.metrics.snapshot()["test"]["calls"], 1)
+
+    def test_probe_interrupted_by_base_exception_frees_the_slot(self):
+        class Interrupted(BaseException):
+            pass
+
+        stream = FakeStream([], error=Interrupted())
+        gateway = make_gateway(stream)
+        open_breaker(gateway.breaker)
+        with self.assertRaises(Interrupted):
+            list(gateway.stream_chat_completion("test", []))
+        self.assertTrue(gateway.breaker.allow(consume=False))
+
+    def test_interrupted_stream_records_failure(self):
+        stream = FakeStream(["Hel"], error=ConnectionError("reset"))
+        gateway = make_gateway(stream)
+        with self.assertRaises(ConnectionError):
+            list(gateway.stream_chat_completion("test", []))
+        self.assertEqual(gateway.breaker.consecutive_failures, 1)
+        self.assertEqual(gateway.metrics.snapshot()["test"]["errors"], 1)
+        self.assertTrue(stream.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from language_utils import _looks_english, detect_language
+
+
+class TestEnglishShortcut(unittest.TestCase):
+    def test_plain_english_skips_langdetect(self):
+        for text in (
+            "I feel really sad today",
+            "I don't know what to do with my life",
+            "The weather is nice and I am happy",
+            "hello",
+            "thank you",
+        ):
+            self.assertTrue(_looks_english(text), text)
+
+    def test_words_shared_with_other_languages_do_not_count(self):
+        for text in (
+            "Me siento muy triste a veces",
+            "Was ist das in dem Haus",
+            "Ich habe so viel Angst am Abend",
+            "Io sono a casa con i miei amici",
+            "Non so cosa fare, sono in crisi",
+        ):
+            self.assertFalse(_looks_english(text), text)
+
+    def test_non_english_text_is_left_to_langdetect(self):
+        cases = {
+            "Me siento muy triste a veces": "es",
+            "Was ist das in dem Haus": "de",
+            "Ich habe so viel Angst am Abend": "de",
+            "Io sono a casa con i miei amici": "it",
+            "Non so cosa fare, sono in crisi": "it",
+        }
+        for text, expected in cases.items():
+            self.assertEqual(detect_language(text)[0], expected, text)
+
+    def test_non_ascii_text_is_not_english(self):
+        self.assertFalse(_looks_english("Je suis très fatigué aujourd'hui"))
+
+
+if __name__ == '__main__':
+    unittest.main()
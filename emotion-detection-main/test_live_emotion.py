@@ -0,0 +1,61 @@
+import json
+import os
+import unittest
+
+os.environ.setdefault('MODEL_WARMUP', '0')
+
+try:
+    import app as app_module
+    import detections.live_session  # noqa: F401 (needs OpenCV and DeepFace)
+except ImportError:
+    app_module = None
+
+
+class FakeSocket:
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.sent = []
+
+    def receive(self):
+        return self.messages.pop(0) if self.messages else None
+
+    def send(self, data):
+        self.sent.append(json.loads(data))
+
+
+@unittest.skipIf(app_module is None, "Flask app or face detection dependencies are not installed")
+class TestLiveEmotionSocket(unittest.TestCase):
+    def test_non_object_commands_get_an_error_frame(self):
+        ws = FakeSocket(['[1, 2]', '"reset"', '42', 'not json', '{"type": "reset"}'])
+        # flask-sock runs the handler inside the handshake's request context
+        with app_module.app.test_request_context('/ws/live-emotion'):
+            app_module.live_emotion_socket(ws)
+        self.assertEqual(len(ws.sent), 4)
+        for frame in ws.sent:
+            self.assertFalse(frame["success"])
+            self.assertIn("error", frame)
+
+
+@unittest.skipIf(app_module is None, "Flask app or face detection dependencies are not installed")
+class TestLiveStreamKey(unittest.TestCase):
+    def key(self, stream_id, user_id=None, remote_addr="10.0.0.1"):
+        with app_module.app.test_request_context(environ_base={"REMOTE_ADDR": remote_addr}):
+            if user_id:
+                app_module.session["user_id"] = user_id
+            return app_module.live_stream_key(stream_id)
+
+    def test_no_stream_id_means_no_shared_session(self):
+        self.assertIsNone(self.key(None))
+        self.assertIsNone(self.key("", user_id="alice"))
+
+    def test_streams_behind_one_address_are_kept_apart(self):
+        self.assertNotEqual(self.key("cam-1"), self.key("cam-2"))
+        self.assertEqual(self.key("cam-1"), self.key("cam-1"))
+
+    def test_stream_id_is_scoped_to_the_user(self):
+        self.assertNotEqual(self.key("cam-1", user_id="alice"), self.key("cam-1", user_id="bob"))
+        self.assertEqual(self.key("cam-1", user_id="alice", remote_addr="10.0.0.2"), self.key("cam-1", user_id="alice"))
+
+
+if __name__ == '__main__':
+    unittest.main()
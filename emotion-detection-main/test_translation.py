@@ -0,0 +1,74 @@
+import threading
+import time
+import unittest
+
+from cache_utils import TieredCache
+from translation import GoogleBackend, TranslationBackend, TranslationError, Translator
+
+
+class FakeBackend(TranslationBackend):
+    name = "fake"
+
+    def __init__(self, delay=0.0, hang_on=None):
+        self.delay = delay
+        self.hang_on = hang_on
+        self.release = threading.Event()
+        self.batches = []
+
+    def translate(self, text, source, target):
+        if text == self.hang_on:
+            self.release.wait(5)
+        time.sleep(self.delay)
+        return text.upper()
+
+    def translate_batch(self, texts, source, target):
+        self.batches.append(list(texts))
+        return super().translate_batch(texts, source, target)
+
+
+def make_translator(backend, timeout=0.5, chunk_size=2):
+    return Translator(backend=backend, cache=TieredCache("translation-test"), timeout=timeout, chunk_size=chunk_size)
+
+
+class TestTranslator(unittest.TestCase):
+    def test_cache_and_duplicates(self):
+        backend = FakeBackend()
+        translator = make_translator(backend)
+        self.assertEqual(translator.translate_many(["a", "b", "a", ""]), ["A", "B", "A", ""])
+        self.assertEqual(translator.translate("b"), "B")
+        self.assertEqual(translator.backend_calls, 1)
+
+    def test_deadline_applies_per_chunk(self):
+        # Three chunks of 0.2s each take longer than one 0.3s deadline in total
+        translator = make_translator(FakeBackend(delay=0.1), timeout=0.3, chunk_size=2)
+        texts = ["a", "b", "c", "d", "e", "f"]
+        self.assertEqual(translator.translate_many(texts), [text.upper() for text in texts])
+        self.assertEqual(translator.backend_calls, 3)
+
+    def test_finished_chunks_are_cached_when_a_later_chunk_times_out(self):
+        backend = FakeBackend(hang_on="c")
+        self.addCleanup(backend.release.set)
+        translator = make_translator(backend, timeout=0.2, chunk_size=2)
+
+        with self.assertRaises(TranslationError):
+            translator.translate_many(["a", "b", "c", "d"])
+        self.assertEqual(translator.timeouts, 1)
+
+        # The retry only sends what is still missing
+        backend.hang_on = None
+        self.assertEqual(translator.translate_many(["a", "b", "c", "d"]), ["A", "B", "C", "D"])
+        self.assertEqual(backend.batches, [["a", "b"], ["c", "d"], ["c", "d"]])
+
+
+class TestGoogleBackend(unittest.TestCase):
+    def test_request_timeout_is_not_patched_globally(self):
+        import requests
+        from deep_translator import google as google_module
+
+        backend = GoogleBackend(request_timeout=1.5)
+        self.assertIs(google_module.requests, requests)
+        self.assertEqual(backend._new_translator('auto', 'en')._request_timeout, 1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+try:
+    from detections.video_detection import iter_sampled_frames, is_frame_seekable, resolve_sample_step
+except ImportError:
+    iter_sampled_frames = None
+
+
+class FakeCapture:
+    """Stands in for cv2.VideoCapture over a video of blank frames"""
+
+    def __init__(self, total_frames, seekable=True):
+        self.total_frames = total_frames
+        self.seekable = seekable
+        self.position = 0
+        self.seeks = 0
+
+    def set(self, prop, value):
+        self.seeks += 1
+        if not self.seekable:
+            return False
+        self.position = int(value)
+        return True
+
+    def get(self, prop):
+        return self.position
+
+    def grab(self):
+        if self.position >= self.total_frames:
+            return False
+        self.position += 1
+        return True
+
+    def retrieve(self):
+        return True, np.zeros((8, 8, 3), np.uint8)
+
+
+@unittest.skipIf(iter_sampled_frames is None, "OpenCV or DeepFace is not installed")
+class TestFrameSampling(unittest.TestCase):
+    def sampled(self, cap, step, start=0, end=None, seek=True):
+        return [frame_number for frame_number, _, _ in iter_sampled_frames(cap, start, end, step, seek=seek)]
+
+    def test_samples_every_step(self):
+        self.assertEqual(self.sampled(FakeCapture(600), 100.0), [0, 100, 200, 300, 400, 500])
+
+    def test_segment_start_is_rounded_up_to_a_sample(self):
+        self.assertEqual(self.sampled(FakeCapture(600), 100.0, start=150, end=400), [200, 300])
+
+    def test_failed_seek_is_not_retried(self):
+        cap = FakeCapture(600, seekable=False)
+        self.assertEqual(self.sampled(cap, 100.0), [0, 100, 200, 300, 400, 500])
+        self.assertEqual(cap.seeks, 1)
+
+    def test_step_and_container_checks(self):
+        self.assertEqual(resolve_sample_step(30, 3000, sample_fps=6, max_frames=0), 5.0)
+        self.assertEqual(resolve_sample_step(30, 3000, sample_fps=6, max_frames=100), 30.0)
+        self.assertFalse(is_frame_seekable("clip.WEBM"))
+        self.assertTrue(is_frame_seekable("clip.mp4"))
+
+
+if __name__ == "__main__":
+    unittest.main()
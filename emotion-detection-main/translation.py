@@ -0,0 +1,297 @@
+"""
+Translation Module
+Pluggable translation backends behind a persistent (text, source, target)
+cache, with per-call timeouts and bulk translation
+"""
+
+import os
+import logging
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from cache_utils import TieredCache, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+# Backend: "google" (deep_translator, network), "none" (returns text unchanged)
+# or "package.module:ClassName" for a custom/offline TranslationBackend
+TRANSLATION_BACKEND = os.getenv('TRANSLATION_BACKEND', 'google')
+
+# Deadline for one backend call (one string, or one chunk of a bulk translation), in seconds
+TRANSLATION_TIMEOUT_SECONDS = float(os.getenv('TRANSLATION_TIMEOUT_SECONDS', '5'))
+
+# Strings sent to the backend per call in a bulk translation; each chunk is cached as soon
+# as it returns, so a bulk call that hits the deadline still makes progress for the retry
+TRANSLATION_CHUNK_SIZE = int(os.getenv('TRANSLATION_CHUNK_SIZE', '4'))
+
+# Threads that run backend calls so callers can give up at the deadline
+TRANSLATION_MAX_WORKERS = int(os.getenv('TRANSLATION_MAX_WORKERS', '8'))
+
+# Connect/read timeout of each HTTP request made by the google backend, in seconds,
+# so a call abandoned at the deadline does not hold a worker thread indefinitely
+TRANSLATION_REQUEST_TIMEOUT_SECONDS = float(
+    os.getenv('TRANSLATION_REQUEST_TIMEOUT_SECONDS', str(TRANSLATION_TIMEOUT_SECONDS))
+)
+
+
+class TranslationError(Exception):
+    """Raised when a backend fails or misses the deadline"""
+
+
+class TranslationBackend:
+    """
+    Interface for translation backends.
+
+    Subclasses implement translate(); translate_batch() may be overridden
+    when the backend can translate several strings in one request.
+    """
+
+    name = "base"
+
+    def translate(self, text, source, target):
+        """Return text translated from source ('auto' to detect) to target"""
+        raise NotImplementedError
+
+    def translate_batch(self, texts, source, target):
+        """Return the translations of texts, in order"""
+        return [self.translate(text, source, target) for text in texts]
+
+
+def _google_translator_class():
+    """Build a GoogleTranslator subclass whose requests go through a session with a timeout"""
+    from bs4 import BeautifulSoup
+    from deep_translator import GoogleTranslator
+    from deep_translator.exceptions import RequestError, TooManyRequests, TranslationNotFound
+    from deep_translator.validate import is_empty, is_input_valid, request_failed
+
+    class GoogleTranslatorWithTimeout(GoogleTranslator):
+        # deep_translator's translate() calls requests.get without a timeout; this is the
+        # same request and parsing, sent through the backend's session with one
+        def __init__(self, session, request_timeout, **kwargs):
+            super().__init__(**kwargs)
+            self._session = session
+            self._request_timeout = request_timeout
+
+        def translate(self, text, **kwargs):
+            is_input_valid(text, max_chars=5000)
+            text = text.strip()
+            if self._same_source_target() or is_empty(text):
+                return text
+            self._url_params["tl"] = self._target
+            self._url_params["sl"] = self._source
+            self._url_params[self.payload_key] = text
+
+            response = self._session.get(
+                self._base_url, params=self._url_params, proxies=self.proxies, timeout=self._request_timeout
+            )
+            try:
+                if response.status_code == 429:
+                    raise TooManyRequests()
+                if request_failed(status_code=response.status_code):
+                    raise RequestError()
+                soup = BeautifulSoup(response.text, "html.parser")
+            finally:
+                response.close()
+
+            element = soup.find(self._element_tag, self._element_query)
+            if not element:
+                element = soup.find(self._element_tag, self._alt_element_query)
+                if not element:
+                    raise TranslationNotFound(text)
+            return element.get_text(strip=True)
+
+    return GoogleTranslatorWithTimeout
+
+
+class GoogleBackend(TranslationBackend):
+    """Google Translate through deep_translator (one HTTP round trip per string)"""
+
+    name = "google"
+
+    def __init__(self, request_timeout=TRANSLATION_REQUEST_TIMEOUT_SECONDS):
+        self.request_timeout = request_timeout
+        self._translator_class = _google_translator_class()
+        self._local = threading.local()
+
+    def _session(self):
+        # One pooled session per worker thread (requests.Session is not thread-safe)
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def _new_translator(self, source, target):
+        # GoogleTranslator stores the text and languages of a call on the instance, so one
+        # instance per call keeps concurrent calls from sending each other's text
+        return self._translator_class(self._session(), self.request_timeout, source=source, target=target)
+
+    def translate(self, text, source, target):
+        return self._new_translator(source, target).translate(text)
+
+    def translate_batch(self, texts, source, target):
+        return self._new_translator(source, target).translate_batch(list(texts))
+
+
+class IdentityBackend(TranslationBackend):
+    """Offline no-op backend: returns text unchanged (useful for tests and air-gapped hosts)"""
+
+    name = "none"
+
+    def translate(self, text, source, target):
+        return text
+
+
+def load_backend(spec=TRANSLATION_BACKEND):
+    """
+    Create the backend named by spec
+
+    Args:
+        spec (str): "google", "none" or "package.module:ClassName"
+
+    Returns:
+        TranslationBackend: The backend instance
+    """
+    if spec == 'google':
+        return GoogleBackend()
+    if spec in ('none', 'identity'):
+        return IdentityBackend()
+    module_name, _, class_name = spec.partition(':')
+    if not class_name:
+        raise ValueError(f"Unknown translation backend '{spec}'")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class Translator:
+    """Cached, deadline-bounded front end for a TranslationBackend"""
+
+    def __init__(self, backend=None, cache=None, timeout=TRANSLATION_TIMEOUT_SECONDS, chunk_size=TRANSLATION_CHUNK_SIZE):
+        self._backend = backend
+        self.cache = cache or TieredCache("translation")
+        self.timeout = timeout
+        self.chunk_size = max(1, int(chunk_size))
+        self._executor = ThreadPoolExecutor(max_workers=TRANSLATION_MAX_WORKERS, thread_name_prefix="translate")
+        self._lock = threading.Lock()
+
+        self.backend_calls = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    @property
+    def backend(self):
+        # Created on first use so importing this module never touches the network stack
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = load_backend()
+        return self._backend
+
+    def set_backend(self, backend):
+        """Replace the backend (cached entries are keyed by backend name)"""
+        with self._lock:
+            self._backend = backend
+
+    def translate(self, text, target='en', source='auto', timeout=None):
+        """
+        Translate one string, using the cache when possible
+
+        Raises:
+            TranslationError: If the backend fails or misses the deadline
+        """
+        return self.translate_many([text], target, source, timeout)[0]
+
+    def translate_many(self, texts, target='en', source='auto', timeout=None):
+        """
+        Translate a list of strings, sending cache misses to the backend in chunks
+
+        Duplicates are translated once. Empty strings are returned unchanged.
+        Each chunk has its own deadline and is cached as soon as it returns,
+        so when a later chunk fails the finished ones are not lost.
+
+        Args:
+            texts (list): Strings to translate
+            target (str): Target language code
+            source (str): Source language code, or 'auto'
+            timeout (float): Deadline in seconds for each backend call
+
+        Returns:
+            list: Translations in the same order as texts
+
+        Raises:
+            TranslationError: If the backend fails or misses the deadline
+        """
+        backend = self.backend
+        results = [None] * len(texts)
+        missing = {}
+
+        for index, text in enumerate(texts):
+            if not text or not text.strip():
+                results[index] = text
+                continue
+            key = make_cache_key(backend.name, source, target, text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[index] = cached
+            else:
+                missing.setdefault(text, []).append(index)
+
+        unique_texts = list(missing)
+        for start in range(0, len(unique_texts), self.chunk_size):
+            chunk = unique_texts[start:start + self.chunk_size]
+            translations = self._call_backend(backend, chunk, source, target, timeout)
+            for text, translated in zip(chunk, translations):
+                if translated is None:
+                    translated = text
+                else:
+                    self.cache.set(make_cache_key(backend.name, source, target, text), translated)
+                for index in missing[text]:
+                    results[index] = translated
+
+        return results
+
+    def _call_backend(self, backend, texts, source, target, timeout):
+        with self._lock:
+            self.backend_calls += 1
+        if len(texts) == 1:
+            future = self._executor.submit(lambda: [backend.translate(texts[0], source, target)])
+        else:
+            future = self._executor.submit(backend.translate_batch, texts, source, target)
+        try:
+            translations = future.result(timeout=timeout or self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+            raise TranslationError(f"{backend.name} translation to {target} timed out")
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            raise TranslationError(f"{backend.name} translation to {target} failed: {e}") from e
+
+        if len(translations) != len(texts):
+            raise TranslationError(f"{backend.name} returned {len(translations)} translations for {len(texts)} texts")
+        return translations
+
+    def stats(self):
+        """Return backend call counters and cache statistics"""
+        return {
+            'backend': self._backend.name if self._backend else TRANSLATION_BACKEND,
+            'timeout_seconds': self.timeout,
+            'chunk_size': self.chunk_size,
+            'backend_calls': self.backend_calls,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'cache': self.cache.stats(),
+        }
+
+
+translator = Translator(cache=TieredCache(
+    "translation",
+    max_entries=int(os.getenv('TRANSLATION_CACHE_SIZE', '4096')),
+    ttl_seconds=int(os.getenv('TRANSLATION_CACHE_TTL', '604800')),
+    db_path=os.getenv(
+        'TRANSLATION_CACHE_DB',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'translation_cache.db')
+    ) or None
+))